@@ -5,18 +5,22 @@ save it to the database. The information is mainly crawled from [Cambridge Onlin
 and [iStockPhoto](https://www.istockphoto.com/).
 """
 
+from __future__ import annotations
+
 import os
-import requests
 import webbrowser
+from library.logic.audio import get_audio_manager
+from library.logic.lazy_import import lazy_import
 from library.logic.online_dictionary import CambridgeDictionary
 from kivy.app import App
 from kivy.clock import Clock
-from kivy.core.audio import SoundLoader
 from kivy.properties import ObjectProperty
 from kivy.uix.label import Label
 from kivy.uix.popup import Popup
 from kivy.uix.widget import Widget
 
+requests = lazy_import('requests')
+
 
 class AddVocab(Widget):
     """
@@ -54,6 +58,7 @@ class AddVocab(Widget):
         self.words_added = 0
 
         # dictionary
+        self.entry = None  # the full result saved with the vocabulary
         self.dict = []
         self.meaning = []
         self.curr_usage = {}
@@ -78,11 +83,13 @@ class AddVocab(Widget):
 
         self.clear_gui()
         self.sound = None
+        self.entry = None
         App.get_running_app().__getattribute__('select_photo').photo_to_be_added = ''
         if result:
             self.dict = result[self.region]
             if not self.dict:
                 return
+            self.entry = {'word': self.ti_search.text.strip(), 'translation': translation, 'dictionary': result}
             self.sound = sound
             self.save_sound_file()
             self.refresh_gui()
@@ -185,6 +192,12 @@ class AddVocab(Widget):
             level = ""
         self.lbl_word_func.text = f"      {self.curr_usage['word_function']}   {level}"
 
+    def current_level(self) -> str:
+        """Return the CEFR level of the usage shown, e.g. 'B2', or an empty string if it has no level."""
+        if not self.curr_usage:
+            return ''
+        return self.curr_usage['definitions'][0]['level'] or ''
+
     def update_explanation(self) -> None:
         """Update the definition text-input `ti_def`."""
         self.ti_def.text = self.curr_usage['definitions'][0]['explanation']  # only display the first definition
@@ -404,4 +417,4 @@ class AddVocab(Widget):
             instance: This is a kivy's widget. This argument will be passed from a caller widget automatically.
         """
         file = os.path.join(App.get_running_app().working_dir, 'library', 'sounds', 'temp.mp3')
-        SoundLoader.load(file).play()
+        get_audio_manager().play(file)
@@ -6,11 +6,16 @@ This module consists of:
 """
 
 import threading as th
+from datetime import datetime, timedelta
+
 from kivy.app import App
 from kivy.clock import Clock
+from kivy.properties import ListProperty, StringProperty
 from kivy.uix.popup import Popup
 from kivy.uix.widget import Widget
 
+from library.logic.keys import LEVELS
+
 
 class CoverPage(Widget):
     """A main page contains 8 main buttons: **Add Vocabulary**, **Practice Vocabulary**, **Learn Grammar**,
@@ -126,9 +131,53 @@ class PopupQuestionNumberOfWords(Popup):
         self.dismiss()
         PopupQuestionPracticeMethod().open()
 
+    def resume(self) -> None:
+        """
+        Callback method from Resume Button. Resume the last unfinished session by
+        [`resume_practice`](/reference/#front_ends.practice_vocab.PracticeVocab.resume_practice).
+        """
+        self.dismiss()
+        App.get_running_app().__getattribute__('practice_vocab').resume_practice()
+
 
 class PopupQuestionPracticeMethod(Popup):
-    """A popup window which ask user to select practice method (latest words/ random words from the database)."""
+    """A popup window which ask user to select practice method (latest words/ random words/ words due for review from
+    the database), and optionally the level, the word type and the period the words were added."""
+
+    any_level = StringProperty('Any level')
+    any_type = StringProperty('Any type')
+    any_time = StringProperty('Any time')
+    levels = ListProperty(['Any level', *LEVELS])
+    periods = ListProperty(['Any time', 'This week', 'This month', 'This year'])
+
+    def on_open(self) -> None:
+        """List the word types in the database in the type spinner."""
+        # the cover page is built before the first frame, the service is imported when it is needed
+        from library.logic.database import get_service
+        self.ids['sp_type'].values = [self.any_type, *get_service().distinct('Type')]
+
+    def filters(self) -> dict:
+        """
+        Return the filters selected in the spinners.
+
+        Returns:
+            The keyword arguments of [`get_data`](/reference/#library.logic.database.get_data), the filters which are
+            not selected are left out.
+        """
+        filters = {}
+        if self.ids['sp_level'].text != self.any_level:
+            filters['level'] = self.ids['sp_level'].text
+        if self.ids['sp_type'].text != self.any_type:
+            filters['word_type'] = self.ids['sp_type'].text
+
+        now = datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        since = {'This week': today - timedelta(days=today.weekday()),
+                 'This month': today.replace(day=1),
+                 'This year': today.replace(month=1, day=1)}.get(self.ids['sp_period'].text)
+        if since:
+            filters['since'] = since
+        return filters
 
     def go_back(self, instance: Widget) -> None:
         """
@@ -144,14 +193,15 @@ class PopupQuestionPracticeMethod(Popup):
 
     def get_method(self, method: str) -> None:
         """
-        Callback method from Rounded Button (The latest words/ All words). Set value of
-        `front_ends.practice_vocab.PracticeVocab.practice_method` and call
+        Callback method from Rounded Button (The latest words/ All words/ Words due for review). Set value of
+        `front_ends.practice_vocab.PracticeVocab.practice_method` and `practice_filters`, and call
         [`start_practice`](/reference/#front_ends.practice_vocab.PracticeVocab.start_practice).
 
         Args:
             method: Define how to get words to practice, random words or the latest words from the database.
-                    Receive 'all' or 'latest' from button's callback.
+                    Receive 'all', 'latest' or 'review' from button's callback.
         """
         App.get_running_app().__getattribute__('practice_vocab').practice_method = method
+        App.get_running_app().__getattribute__('practice_vocab').practice_filters = self.filters()
         self.dismiss()
         App.get_running_app().__getattribute__('practice_vocab').start_practice()
@@ -3,17 +3,17 @@
 This module consists of `Database` which is a page let user amend the information of the vocabulary from the database.
 """
 
-import pandas as pd
 import os
 
 from front_ends.cover_page import Popup
 from front_ends.preview import Preview
 from front_ends.select_photo import SelectPhoto
-from library.logic.database import update_database
+from library.logic.audio import get_audio_manager
+from library.logic.database import get_service, update_database
+from library.logic.metrics import get_metrics
 
 from kivy.app import App
 from kivy.clock import Clock
-from kivy.core.audio import SoundLoader
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.widget import Widget
@@ -40,6 +40,7 @@ class Database(Widget):
         )
         self.ids['data_table'].clear_widgets()
 
+    @get_metrics().timed('database.load')
     def init_data(self) -> None:
         """
         Extract all vocabulary from the database and show them to the data_table.
@@ -47,23 +48,20 @@ class Database(Widget):
         # reset search box
         self.ids['ti_search'].text = ''
 
-        # verify existence of database
-        file_path = os.path.join(App.get_running_app().working_dir, 'database', 'vocabulary.csv')
-        if not os.path.isfile(file_path):
+        # read data, the table is kept by the service until the csv file changes
+        self.vocabs = get_service().vocabularies()
+        if not self.vocabs:
             return
 
-        # read data
-        data = pd.read_csv(file_path, index_col=0)
-
         # add vocabulary to the table
         self.ids['data_table'].cols = 1
-        self.vocabs = data['Vocabulary'].tolist()
         self.vocabs.sort()
         self.show_data(self.vocabs)
 
         # show total vocab
-        self.ids['total_vocab'].text = str(data.shape[0])
+        self.ids['total_vocab'].text = str(len(self.vocabs))
 
+    @get_metrics().timed('database.show')
     def show_data(self, data: list):
         """
         Show the given data in the data_table.
@@ -113,6 +111,7 @@ class Database(Widget):
              text: A string as a hint to find vocabulary from the database.
         """
         if self.count == 1:
+            get_metrics().count('database.search')
             filtered_list = [vocab for vocab in self.vocabs if text.lower() in vocab.lower().strip()]
             self.show_data(filtered_list)
             self.count -= 1
@@ -130,6 +129,8 @@ class PreviewUpdate(Preview):
         super(PreviewUpdate, self).__init__()
         self.working_dir = os.path.join(App.get_running_app().working_dir)
         self.vocab = ''
+        self.senses = None  # decoded at the first press of More Senses Button
+        self.sense_index = -1
         self.ids['btn_confirm'].text = 'confirm update'
 
     def update_gui(self) -> None:
@@ -140,23 +141,49 @@ class PreviewUpdate(Preview):
         self.show_photo(Widget())
         self.set_sound()
         self.set_text_input(vocab_searching)
+        self.reset_senses()
+
+    def reset_senses(self) -> None:
+        """Show More Senses Button if the full dictionary entry of the vocabulary was saved."""
+        self.senses = None
+        self.sense_index = -1
+        button = self.ids['btn_senses']
+        has_senses = get_service().has_senses(self.vocab)
+        button.text = 'more senses'
+        button.disabled = not has_senses
+        button.opacity = 1 if has_senses else 0
+        button.size = (120, 40) if has_senses else (0, 0)
+
+    def next_sense(self, instance: Widget) -> None:
+        """
+        Callback method from More Senses Button. Show the next sense of the vocabulary saved from the dictionary in the
+        definition and the example, they are saved to the database by Confirm Button.
+
+        Args:
+            instance: This is a kivy's widget. This argument will be passed from a caller widget automatically.
+        """
+        if self.senses is None:
+            self.senses = get_service().senses(self.vocab)
+        if not self.senses:
+            return
+
+        self.sense_index = (self.sense_index + 1) % len(self.senses)
+        sense = self.senses[self.sense_index]
+        self.ti_definition.text = sense['explanation']
+        self.ti_example.text = sense['examples'][0] if sense['examples'] else ''
+        level = f" {sense['level']}" if sense['level'] else ''
+        instance.text = f"{self.sense_index + 1}/{len(self.senses)}{level}"
 
     def show_photo(self, instance: Widget = Widget()) -> None:
         """
         Show photo of the vocabulary from the database.
         """
-        # data cleaning for self.vocab
-        if '(' in self.vocab:
-            self.vocab = self.vocab[:self.vocab.index('(')]
-        self.vocab = self.vocab.strip().replace(' ', '_').lower()
-
-        # fetch the photo from database
-        vocab_image = os.path.join(self.working_dir, 'database', 'images', f'{self.vocab}.jpg')
-        print(vocab_image)
+        # fetch the photo from database, it is named by the canonical key of the vocabulary
+        vocab_image = get_service().media_file('image', self.vocab)
         no_photo_image = os.path.join(self.working_dir, 'library', 'images', f'no_image.png')
 
         # declare photo source
-        image = vocab_image if os.path.isfile(vocab_image) else no_photo_image
+        image = vocab_image or no_photo_image
 
         # change photo
         self.photo.source = image
@@ -192,42 +219,33 @@ class PreviewUpdate(Preview):
         """
         dimming_color = (0.3, 0.3, 0.3, 0.5)
         normal_color = (1.0, 1.0, 1.0, 1.0)
-        sound_file = os.path.join(self.working_dir, 'database', 'sounds', f'{self.vocab}.mp3')
-        if os.path.isfile(sound_file):
+        sound_file = get_service().media_file('sound', self.vocab)
+        if sound_file:
             color = normal_color
-            player = SoundLoader.load(sound_file)
-            player.play()
+            get_audio_manager().play(sound_file)
         else:
             color = dimming_color
 
         self.speaker.background_color = color
 
+    @get_metrics().timed('database.read_entry')
     def set_text_input(self, vocab_searching: str) -> None:
         """
         Fetch information from the database and show it.
 
         Args:
-            vocab_searching: A text to search exactly the same value in the 'Vocabulary' column from the database.
+            vocab_searching: The vocabulary to be found by its canonical key from the database.
         """
-        # verify existence of database
-        file_path = os.path.join(App.get_running_app().working_dir, 'database', 'vocabulary.csv')
-        if not os.path.isfile(file_path):
-            return
-
-        # read data
-        data = pd.read_csv(file_path, index_col=0)
-
-        # extract information
-        data = data[data['Vocabulary'].str[:] == vocab_searching].reset_index(drop=True).fillna('')
-        if data.empty:
+        entry = get_service().entry(vocab_searching)
+        if entry is None:
             return
 
         # set text
-        self.ti_word.text = data['Vocabulary'][0]
-        if data['Type'][0]:
-            self.ti_word.text += f" ( {data['Type'][0]} )"
-        self.ti_definition.text = data['Description'][0]
-        self.ti_example.text = data['Example'][0]
+        self.ti_word.text = entry['vocabulary']
+        if entry['type']:
+            self.ti_word.text += f" ( {entry['type']} )"
+        self.ti_definition.text = entry['description']
+        self.ti_example.text = entry['example']
 
     def go_back(self) -> None:
         """
@@ -253,7 +271,8 @@ class PreviewUpdate(Preview):
                                  self.ti_definition.text,
                                  self.ti_example.text,
                                  self.photo.source,
-                                 sound=None)
+                                 sound=None,
+                                 on_media_done=self.media_done)
 
         # # go to slide
         App.get_running_app().main_container.load_slide(
@@ -300,5 +319,5 @@ class SearchPhoto(SelectPhoto):
         App.get_running_app().main_container.load_slide(
             App.get_running_app().__getattribute__('preview_update')
         )
-        App.get_running_app().__getattribute__('preview_update').update_photo(instance.source)
+        App.get_running_app().__getattribute__('preview_update').update_photo(self.photo_source(instance))
         self.reset_photos()
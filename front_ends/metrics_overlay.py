@@ -0,0 +1,70 @@
+"""
+`front_ends/metrics_overlay.py`\n
+This module consists of `MetricsOverlay` which shows the metrics of
+[`get_metrics`](/reference/#library.logic.metrics.get_metrics) on top of the pages. Press F12 to show or hide it.
+"""
+
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle
+from kivy.uix.label import Label
+from library.logic.metrics import get_metrics
+
+F12 = 293
+
+
+class MetricsOverlay(Label):
+    """A translucent label listing the p50/p95 latency of each operation, the counters and the gauges."""
+
+    def __init__(self, **kwargs):
+        super(MetricsOverlay, self).__init__(font_size=12, font_name='RobotoMono-Regular', halign='left', valign='top',
+                                             markup=True, size_hint=(None, None), **kwargs)
+        with self.canvas.before:
+            Color(0, 0, 0, 0.7)
+            self.background = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self.update_background, size=self.update_background)
+        self.refresh_event = None
+
+    def install(self) -> None:
+        """Listen to the F12 key of the window."""
+        Window.bind(on_keyboard=self.on_keyboard)
+
+    def on_keyboard(self, window, key, *args) -> bool:
+        """Toggle the overlay by the F12 key."""
+        if key != F12:
+            return False
+        self.toggle()
+        return True
+
+    def toggle(self) -> None:
+        """Show the overlay if it is hidden, otherwise hide it."""
+        if self.parent:
+            Window.remove_widget(self)
+            self.refresh_event.cancel()
+            return
+
+        self.size = (Window.width, Window.height * 0.45)
+        self.text_size = (self.width - 20, self.height - 20)
+        self.pos = (0, Window.height - self.height)
+        self.refresh()
+        Window.add_widget(self)
+        self.refresh_event = Clock.schedule_interval(self.refresh, 1)
+
+    def refresh(self, *args) -> None:
+        """Show the latest metrics."""
+        snapshot = get_metrics().snapshot()
+        lines = ['[b]operation                count   p50 ms   p95 ms[/b]']
+        for name, h in snapshot['histograms'].items():
+            lines.append(f"{name[:24]:<24} {h['count']:>6} {h['p50_ms']:>8.1f} {h['p95_ms']:>8.1f}")
+        if snapshot['counters']:
+            lines.append('')
+            lines += [f"{name}: {value}" for name, value in sorted(snapshot['counters'].items())]
+        if snapshot['gauges']:
+            lines.append('')
+            lines += [f"{name}: {value:g}" for name, value in sorted(snapshot['gauges'].items())]
+        self.text = '\n'.join(lines)
+
+    def update_background(self, *args) -> None:
+        """Keep the background under the label."""
+        self.background.pos = self.pos
+        self.background.size = self.size
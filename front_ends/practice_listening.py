@@ -1,15 +1,138 @@
+"""
+`front_ends/practice_listening.py`
+\nThis module consists of `PracticeListening` which is a page of listening resources and a dictation of the vocabulary
+from the database.
+"""
+
+import os
+import sys
+import time
+from front_ends.practice_vocab import grade_answer, show_answer
+from library.logic.audio import AudioQueue, get_audio_manager
+from library.logic.database import get_data
+from library.logic.lazy_import import lazy_import
+from library.logic.practice_session import PracticeSession
 from kivy.app import App
+from kivy.clock import Clock
+from kivy.properties import ObjectProperty
 from kivy.uix.widget import Widget
 
+pd = lazy_import('pandas')
+
 
 class PracticeListening(Widget):
+    """
+    A page of listening websites and channels, and a dictation: the pronunciation of a vocabulary is played, the user
+    types the vocabulary, and the answer is checked the same way as
+    [`PracticeVocab.check_answer`](/reference/#front_ends.practice_vocab.PracticeVocab.check_answer). The spelling is
+    logged to the 'dictation' review log and does not change the review schedule of the meaning. The next
+    pronunciations are loaded by an [`AudioQueue`](/reference/#library.logic.audio.AudioQueue) while the user is typing.
+    """
+    id = 'practice_listening'
+    ti_dictation = ObjectProperty(None)
+    lbl_dictation = ObjectProperty(None)
+
     def __init__(self):
         super().__init__()
+        self.session = None
+        self.testing_word = None
+        self.shown_at = 0.0
+        self.next_event = None
+        self.audio_queue = AudioQueue(get_audio_manager())
 
     def go_back(self):
         """
-        Callback method from Go-Back Button. Redirect to [`CoverPage`](/reference/#front_ends.cover_page.CoverPage) page.
+        Callback method from Go-Back Button. Stop the dictation and redirect to
+        [`CoverPage`](/reference/#front_ends.cover_page.CoverPage) page.
         """
+        self.stop_dictation()
         App.get_running_app().main_container.load_slide(
             App.get_running_app().__getattribute__('cover_page')
-        )
\ No newline at end of file
+        )
+
+    def stop_dictation(self) -> None:
+        """Stop the dictation, the next word scheduled after an answer is not played."""
+        if self.next_event:
+            self.next_event.cancel()
+            self.next_event = None
+        self.audio_queue.stop()
+        self.session = None
+        self.testing_word = None
+        self.ti_dictation.text = ''
+        self.ti_dictation.disabled = True
+        self.lbl_dictation.text = ''
+
+    def start_dictation(self, num: int = 0) -> None:
+        """
+        Callback method from Dictation Buttons. Get the vocabulary with a pronunciation from the database in random
+        order and play the first one.
+
+        Args:
+            num: Number of vocabulary, 0 for all the vocabulary.
+        """
+        self.stop_dictation()
+        data = get_data(num or sys.maxsize, 'all')
+        if not isinstance(data, pd.DataFrame):
+            self.lbl_dictation.text = "no vocabulary in the database"
+            return
+
+        session = PracticeSession.from_dataframe(data, os.path.join(App.get_running_app().working_dir, 'database'))
+        session.cards = [card for card in session.cards if card.sound]
+        if not session.cards:
+            self.lbl_dictation.text = "no pronunciation in the database"
+            return
+
+        self.session = session
+        self.audio_queue.start([card.sound for card in session.cards])
+        self.next_word()
+
+    def next_word(self, *args) -> None:
+        """Play the pronunciation of the next vocabulary and wait for the answer."""
+        self.next_event = None
+        if not self.session:
+            return
+
+        self.testing_word = self.session.next_card()
+        if not self.testing_word:
+            self.audio_queue.stop()
+            self.update_statistic(finished=True)
+            return
+
+        self.ti_dictation.text = ''
+        self.ti_dictation.disabled = False
+        self.ti_dictation.focus = True
+        self.audio_queue.next()
+        self.shown_at = time.time()
+        self.update_statistic()
+
+    def replay(self) -> None:
+        """Callback method from Replay Button. Play the pronunciation again."""
+        if self.testing_word:
+            self.audio_queue.replay()
+            self.ti_dictation.focus = True
+
+    def check_dictation(self, instance) -> None:
+        """
+        Check the vocabulary typed by the user, update the marks and play the next vocabulary after the answer is
+        shown.
+
+        Args:
+            instance: This is a kivy's widget. This argument will be passed from a caller widget automatically.
+        """
+        if not self.testing_word or self.ti_dictation.disabled:
+            return
+
+        self.ti_dictation.disabled = True
+        self.session.tested += 1
+        is_correct = grade_answer(self.testing_word, instance.text, self.shown_at, mode='dictation')
+        if is_correct:
+            self.session.correct += 1
+        t = show_answer(instance.text, self.testing_word.answer, is_correct)
+        self.update_statistic()
+        self.next_event = Clock.schedule_once(self.next_word, t)
+
+    def update_statistic(self, finished: bool = False) -> None:
+        """Show the progress and the number of correct answers of the dictation."""
+        tested, correct = self.session.tested, self.session.correct
+        progress = "finished" if finished else f"word {self.session.cursor} of {len(self.session)}"
+        self.lbl_dictation.text = f"{progress}    {correct}/{tested} correct"
@@ -1,21 +1,82 @@
 """
 `front_ends/practice_vocab.py`\n
-This module consists of `PracticeVocab` which allow user to practice vocabulary from the database.
+This module consists of `PracticeVocab` which allow user to practice vocabulary from the database, and `grade_answer`
+and `show_answer` which check an answer the same way for every practice.
 """
 
-import pandas as pd
 import os
+import random
 import time
+from library.logic.audio import get_audio_manager
 from library.logic.database import get_data
-from library.logic.database import get_sound
+from library.logic.distractors import get_distractor_index
+from library.logic.lazy_import import lazy_import
+from library.logic.photo_cache import PhotoPrefetcher, TextureCache
+from library.logic.practice_session import Card, PracticeSession
+from library.logic.review_log import get_review_log
+from library.logic.scheduler import get_scheduler
 from kivy.app import App
 from kivy.clock import Clock
-from kivy.core.audio import SoundLoader
 from kivy.properties import ObjectProperty
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.popup import Popup
 from kivy.uix.widget import Widget
 
+pd = lazy_import('pandas')
+
+
+def grade_answer(card: Card, answer: str, shown_at: float, mode: str = 'review') -> bool:
+    """
+    Check the answer of a card and log it. The answer of the practice updates the review schedule of the card as well,
+    the spelling of the dictation is logged separately and does not change the schedule of the meaning.
+
+    Args:
+        card: The card tested.
+        answer: The answer of the user.
+        shown_at: The time the card was shown, to log the response time.
+        mode: 'review' for the practice, 'dictation' for the dictation.
+
+    Returns:
+        True if the answer is correct.
+    """
+    is_correct = card.is_correct(answer)
+    get_review_log(mode).record(card.key, is_correct, time.time() - shown_at)
+    if mode != 'review':
+        return is_correct
+
+    scheduler = get_scheduler()
+    scheduler.review(card.key, 4 if is_correct else 1)
+    scheduler.save()
+    return is_correct
+
+
+def show_answer(answer: str, correct_answer: str, is_correct: bool) -> int:
+    """
+    Show the result of an answer in a popup message box.
+
+    Args:
+        answer: The answer of the user.
+        correct_answer: The answer of the card.
+        is_correct: The result from `grade_answer`.
+
+    Returns:
+        Seconds the message is shown.
+    """
+    msg = Popup(title='Answer', size_hint=(0.7, None), size=(0, 150), auto_dismiss=False)
+    if is_correct:
+        msg.content = Label(text=f"({answer}) Correct")
+        msg.background_color = (0.2, 1.0, 0.2, 1.0)
+        t = 1
+    else:
+        msg.content = Label(text=correct_answer)
+        msg.background_color = (1.0, 0.2, 0.2, 1.0)
+        t = 3
+    msg.open()
+    Clock.schedule_once(msg.dismiss, t)
+    return t
+
 
 class PracticeVocab(Widget):
     """
@@ -34,36 +95,76 @@ class PracticeVocab(Widget):
         super(PracticeVocab, self).__init__()
         self.practice_num = 0
         self.practice_method = 'all'
-        self.data = None
+        self.practice_filters = {}
+        self.session = None
         self.testing_word = None
-        self.tested = 0
-        self.correct = 0
+        self.shown_at = 0.0
+        self.session_file = os.path.join(App.get_running_app().working_dir, 'database', 'practice_session.json')
+
+        # images of the upcoming cards
+        self.texture_cache = TextureCache(max_bytes=32 * 1024 * 1024)
+        self.preloader = PhotoPrefetcher(self.texture_cache)
 
     def go_back(self) -> None:
         """
-        Callback method from Go-Back Button. Redirect to [`CoverPage`](/reference/#front_ends.cover_page.CoverPage)
+        Callback method from Go-Back Button. Redirect to [`CoverPage`](/reference/#front_ends.cover_page.CoverPage),
+        and save the unfinished session to be resumed.
         """
         App.get_running_app().main_container.load_slide(
             App.get_running_app().__getattribute__('cover_page')
         )
+        if self.session and self.session.tested < len(self.session):
+            self.session.save(self.session_file)
+
+    def free_textures(self) -> None:
+        """
+        Release the preloaded images when the page is detached by
+        [`PageContainer`](/reference/#library.logic.pages.PageContainer).
+        """
+        self.preloader.cancel()
+        self.texture_cache.clear()
+
+    def restore_textures(self) -> None:
+        """Preload the images of the next cards again when the page is attached."""
+        if self.session and self.testing_word:
+            self.preload_cards()
 
     def start_practice(self) -> None:
         """Get information from the database and count number of correct answer."""
-        # self.practice_num and self.practice_method are decided by cover_page popup
-        self.data = get_data(self.practice_num, self.practice_method)
+        # self.practice_num, self.practice_method and self.practice_filters are decided by cover_page popup
+        data = get_data(self.practice_num, self.practice_method, **self.practice_filters)
+        if not isinstance(data, pd.DataFrame):
+            return
+
+        data_dir = os.path.join(App.get_running_app().working_dir, 'database')
+        self.run_session(PracticeSession.from_dataframe(data, data_dir))
+
+    def resume_practice(self) -> None:
+        """Resume the session saved when the user left the page, the unanswered card is tested again."""
+        session = PracticeSession.load(self.session_file)
+        if not session:
+            print('no session to resume')
+            return
+
+        session.cursor = session.tested
+        self.run_session(session)
+
+    def run_session(self, session: PracticeSession) -> None:
+        """
+        Reset the user interface and start testing the cards of the session.
 
-        # reset params
-        self.tested = 0
-        self.correct = 0
+        Args:
+            session: A new or resumed practice session.
+        """
+        self.session = session
         self.testing_word = None
+        self.texture_cache.clear()  # images may be updated since the last session
         self.ti_answer.text = ''
-        if not isinstance(self.data, pd.DataFrame):
-            return
+        if os.path.isfile(self.session_file):
+            os.remove(self.session_file)
 
         # update statistic
-        self.lbl_words_tested.text = f"{self.tested} words tested"
-        self.lbl_words_correct.text = f"{self.correct} words correct"
-        self.lbl_percent_correct.text = "0% correct"
+        self.update_statistic()
 
         # start testing
         self.next_word()
@@ -79,58 +180,59 @@ class PracticeVocab(Widget):
         self.ti_answer.focus = True
         self.ti_answer.select_all()
         word = self.get_word()
-        if isinstance(word, pd.DataFrame):
+        if word:
             self.refresh_gui(word)
 
-    def get_word(self) -> pd.DataFrame | None:
+    def get_word(self) -> Card | None:
         """
-        Return a row of data(Dataframe) from a testing dataset. Return None if the testing data is finished.
+        Return the next card from the practice session. Return None if the testing data is finished.
 
         Returns:
-            A row of data in DataFrame format, including word, description, example, etc.
+            A card of the word, including word, description, example, etc.
         """
-        if len(self.data) == 0:
+        self.testing_word = self.session.next_card()
+        if not self.testing_word:
             print('no word to test')
-            return
-
-        # get word
-        self.testing_word = self.data.tail(1).reset_index()
-        self.data.drop(self.data.tail(1).index, inplace=True)
 
         return self.testing_word
 
-    def refresh_gui(self, word: pd.DataFrame) -> None:
+    def refresh_gui(self, word: Card) -> None:
         """
         Update the user interface according to the information of 'word' and the image file from the database.
 
         Args:
-            word: A row of DataFrame includes description, examples, etc. of the word/ phrase.
+            word: A card includes description, examples, etc. of the word/ phrase.
         """
-        vocab = word['Vocabulary'][0]
-
-        # set image
-        if '(' in vocab:
-            vocab_raw = vocab[:vocab.find('(')].strip()
-        else:
-            vocab_raw = vocab
-        file_name = vocab_raw.replace(' ', '_').lower()
-        image_1 = f'{App.get_running_app().working_dir}/database/images/{file_name}.png'
-        image_2 = f'{App.get_running_app().working_dir}/database/images/{file_name}.jpeg'
-        image_3 = f'{App.get_running_app().working_dir}/database/images/{file_name}.jpg'
-        if os.path.isfile(image_1):
-            self.image.source = image_1
-        elif os.path.isfile(image_2):
-            self.image.source = image_2
-        elif os.path.isfile(image_3):
-            self.image.source = image_3
+        # set image, use the decoded texture if it is preloaded
+        no_image = os.path.join(App.get_running_app().working_dir, 'library', 'images', 'no_image.png')
+        texture = self.texture_cache.get(word.image) if word.image else None
+        if texture:
+            self.image.source = ''
+            self.image.texture = texture
         else:
-            self.image.source = f'{App.get_running_app().working_dir}/library/images/no_image.png'
+            self.image.source = word.image or no_image
 
         # set definition and example
-        word_type = vocab[vocab.find('('):vocab.find(')')+1]
-        mask = "*" * len(vocab_raw)
-        self.lbl_def.text = f"{word_type} {word['Description'][0]}"
-        self.lbl_ex.text = word['Example'][0].replace(vocab_raw, mask)
+        mask = "*" * len(word.word)
+        self.lbl_def.text = f"{word.type} {word.description}"
+        self.lbl_ex.text = word.example.replace(word.word, mask)
+        self.shown_at = time.time()
+
+        # offer the options in multiple-choice mode
+        if self.ids['cb_multiple_choice'].active:
+            PopupMultipleChoice(self, word).open()
+
+        # preload the next cards while the user is answering
+        Clock.schedule_once(self.preload_cards, 0.2)
+
+    def preload_cards(self, *args) -> None:
+        """
+        Decode the images of the next 2 cards in the background, and load the sounds of the current card and the next 2
+        cards, so the sound is played without delay and the next card is shown without decoding.
+        """
+        cards = self.session.peek(2)
+        self.preloader.prefetch([card.image for card in cards if card.image])
+        get_audio_manager().preload([card.sound for card in [self.testing_word] + cards if card and card.sound])
 
     def check_answer(self, instance):
         """
@@ -139,41 +241,82 @@ class PracticeVocab(Widget):
         Args:
             instance: This is a kivy's widget. This argument will be passed from a caller widget automatically.
         """
-        if self.tested == self.practice_num:
+        if not self.testing_word or self.session.tested == len(self.session):
             return
 
         self.ti_answer.disabled = True
         self.ti_answer.select_all()
 
-        # define answer
-        vocab = self.testing_word['Vocabulary'][0].lower().strip()
-        if '(' in vocab:
-            ans = vocab[:vocab.find('(')].strip()
-        else:
-            ans = vocab
-
-        # check answer
-        self.tested += 1
-        msg = Popup(title='Answer', size_hint=(0.7, None), size=(0, 150), auto_dismiss=False)
-        if instance.text.lower().strip() == ans:
-            self.correct += 1
-            msg.content = Label(text=f"({instance.text}) Correct")
-            msg.background_color = (0.2, 1.0, 0.2, 1.0)
-            t = 1
-        else:
-            msg.content = Label(text=ans)
-            msg.background_color = (1.0, 0.2, 0.2, 1.0)
-            t = 3
-        msg.open()
-        Clock.schedule_once(msg.dismiss, t)
+        # check answer, log it and update the review schedule
+        self.session.tested += 1
+        is_correct = grade_answer(self.testing_word, instance.text, self.shown_at)
+        if is_correct:
+            self.session.correct += 1
+        t = show_answer(instance.text, self.testing_word.answer, is_correct)
 
         # play sound
-        sound = get_sound(ans.replace(' ', '_'))
+        sound = self.testing_word.sound
         if sound:
-            Clock.schedule_once(lambda t: SoundLoader.load(sound).play(), 0)
+            Clock.schedule_once(lambda t: get_audio_manager().play(sound), 0)
         Clock.schedule_once(self.next_word, t)
 
         # update statistic
-        self.lbl_words_tested.text = f"{self.tested} words tested"
-        self.lbl_words_correct.text = f"{self.correct} words correct"
-        self.lbl_percent_correct.text = f"{int(self.correct/self.tested*100)}% correct"
+        self.update_statistic()
+
+    def update_statistic(self) -> None:
+        """Show the number of tested and correct answer of the session."""
+        tested, correct = self.session.tested, self.session.correct
+        self.lbl_words_tested.text = f"{tested} words tested"
+        self.lbl_words_correct.text = f"{correct} words correct"
+        self.lbl_percent_correct.text = f"{int(correct/tested*100) if tested else 0}% correct"
+
+    def show_statistics(self) -> None:
+        """
+        Callback method from Statistics Button. Show the accuracy of the last 7 days and the hardest words from the
+        [`ReviewLog`](/reference/#library.logic.review_log.ReviewLog) in a popup window.
+        """
+        review_log = get_review_log()
+        lines = ["accuracy of the last 7 days"]
+        for date, tested, accuracy in review_log.accuracy_by_day(7):
+            lines.append(f"{date:%a %d %b}    {tested} tested    {int(accuracy)}%" if tested
+                         else f"{date:%a %d %b}    -")
+
+        hardest = review_log.hardest_words(5)
+        if hardest:
+            lines.append("\nhardest words")
+            for word, tested, accuracy, response_time in hardest:
+                lines.append(f"{word.replace('_', ' ')}    {int(accuracy)}% of {tested}    {response_time:.1f}s")
+
+        msg = Popup(title='Statistics', size_hint=(0.8, None), size=(0, 450))
+        msg.content = Label(text="\n".join(lines), halign='center', valign='middle')
+        msg.open()
+
+
+class PopupMultipleChoice(Popup):
+    """A popup window which offers the answer and 3 look-alike vocabulary from the database as the options."""
+
+    def __init__(self, practice_vocab: PracticeVocab, card: Card):
+        super(PopupMultipleChoice, self).__init__(title='Which word is it?', size_hint=(0.8, None), size=(0, 300),
+                                                  auto_dismiss=False)
+        self.practice_vocab = practice_vocab
+        options = get_distractor_index().distractors(card.answer, 3) + [card.answer]
+        random.shuffle(options)
+
+        box = BoxLayout(orientation='vertical', spacing=10)
+        for option in options:
+            button = Button(text=option, background_color=(0.4, 0.9, 0.2, 0.5))
+            button.bind(on_press=self.choose)
+            box.add_widget(button)
+        self.content = box
+
+    def choose(self, instance: Widget) -> None:
+        """
+        Callback method from the option buttons. Check the chosen option by
+        [`check_answer`](/reference/#front_ends.practice_vocab.PracticeVocab.check_answer).
+
+        Args:
+            instance: This is a kivy's widget. This argument will be passed from a caller widget automatically.
+        """
+        self.dismiss()
+        self.practice_vocab.ti_answer.text = instance.text
+        self.practice_vocab.check_answer(instance)
@@ -3,10 +3,10 @@
 \nThis module consists of `Preview` which is a preview page let user preview/ confirm before adding to the database.
 """
 
+from library.logic.audio import get_audio_manager
 from library.logic.database import update_database
 from kivy.app import App
 from kivy.clock import Clock
-from kivy.core.audio import SoundLoader
 from kivy.properties import ObjectProperty
 from kivy.uix.label import Label
 from kivy.uix.popup import Popup
@@ -47,6 +47,10 @@ class Preview(Widget):
         self.set_text_input()
         self.set_sound()
 
+    def next_sense(self, instance: Widget) -> None:
+        """Callback method from More Senses Button, it is shown by the page updating the database only."""
+        pass
+
     def show_photo(self, instance: Widget) -> None:
         """
         Show photo of the word in the user interface.
@@ -77,8 +81,7 @@ class Preview(Widget):
         if slide_add_vocab.sound:
             color = normal_color
             file = os.path.join(App.get_running_app().working_dir, 'library', 'sounds', 'temp.mp3')
-            player = SoundLoader.load(file)
-            player.play()
+            get_audio_manager().play(file)
         else:
             color = dimming_color
 
@@ -114,11 +117,16 @@ class Preview(Widget):
              instance: This is a kivy's widget. This argument will be passed from a caller widget automatically.
         """
         # update database
+        add_vocab = App.get_running_app().__getattribute__('add_vocab')
         result = update_database(self.ti_word.text,
                                  self.ti_definition.text,
                                  self.ti_example.text,
                                  self.photo.source,
-                                 sound=App.get_running_app().__getattribute__('add_vocab').sound)
+                                 sound=add_vocab.sound,
+                                 on_media_done=self.media_done,
+                                 level=add_vocab.current_level(),
+                                 translation=add_vocab.ti_translation.text,
+                                 entry=add_vocab.entry)
 
         # go to slide
         App.get_running_app().main_container.load_slide(
@@ -137,3 +145,21 @@ class Preview(Widget):
 
         msg.open()
         Clock.schedule_once(msg.dismiss, 1)
+
+    def media_done(self, job: dict, result: bool) -> None:
+        """
+        Callback method from the [`MediaQueue`](/reference/#library.logic.media_queue.MediaQueue) once the photo of the
+        word is downloaded. Show a popup message if the download finally fails.
+
+        Args:
+            job: The download job, including the source link and the file path of the photo.
+            result: True if the photo is downloaded.
+        """
+        if result:
+            return
+
+        msg = Popup(title='Message', size_hint=(None, None), size=(250, 100))
+        msg.content = Label(text=f"photo of '{os.path.basename(job['dst'])[:-4]}'\nis not downloaded")
+        msg.background_color = (1.0, 0.4, 0.3, 1.0)
+        msg.open()
+        Clock.schedule_once(msg.dismiss, 2)
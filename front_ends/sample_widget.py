@@ -0,0 +1,84 @@
+"""
+`front_ends/sample_widget.py`\n
+This module consists of the widgets of `sample_widget.kv` which need some logic:
+    - `PhotoButton` which shows a photo from the button background atlas
+    - `ScrollableGrid` which only shows the photos of the buttons near the visible part of the row
+"""
+
+from kivy.clock import Clock
+from kivy.properties import StringProperty
+from kivy.uix.button import Button
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.scrollview import ScrollView
+from library.logic.atlas import atlas_source
+
+
+class PhotoButton(Button):
+    """
+    A button with a photo background. The photo is given by its name, e.g. `photo: 'bbc_news'`, and is loaded from the
+    atlas of `library/images/button_background` when the button is shown.
+    """
+
+    photo = StringProperty('')
+
+    def show_photo(self) -> None:
+        """Set the photo as the background."""
+        if self.photo:
+            self.background_normal = atlas_source('button_background', self.photo)
+
+    def hide_photo(self) -> None:
+        """Remove the background, so the photo is not kept by the button."""
+        self.background_normal = ''
+
+
+class ScrollableGrid(GridLayout):
+    """
+    A row of [`PhotoButton`](/reference/#front_ends.sample_widget.PhotoButton) in a horizontal `ScrollView`. The
+    photos of the buttons more than a screen width away from the visible part are not loaded.
+    """
+
+    def __init__(self, **kwargs):
+        self.scroll_view = None
+        self.trigger_update = Clock.create_trigger(self.update_photos)
+        super(ScrollableGrid, self).__init__(**kwargs)
+        self.bind(parent=self.on_scroll_view)
+
+    def do_layout(self, *largs) -> None:
+        """Update the photos after the buttons are positioned."""
+        super(ScrollableGrid, self).do_layout(*largs)
+        self.trigger_update()
+
+    def on_scroll_view(self, instance, parent) -> None:
+        """Follow the scrolling of the `ScrollView` this grid is put in."""
+        if self.scroll_view is not None:
+            self.scroll_view.unbind(scroll_x=self.trigger_update, width=self.trigger_update)
+        self.scroll_view = parent if isinstance(parent, ScrollView) else None
+        if self.scroll_view is not None:
+            self.scroll_view.bind(scroll_x=self.trigger_update, width=self.trigger_update)
+        self.trigger_update()
+
+    def free_textures(self) -> None:
+        """Hide all the photos when the page is detached."""
+        for child in self.children:
+            if isinstance(child, PhotoButton):
+                child.hide_photo()
+
+    def restore_textures(self) -> None:
+        """Show the photos near the visible part again when the page is attached."""
+        self.trigger_update()
+
+    def update_photos(self, *args) -> None:
+        """Show the photos of the buttons near the visible part of the row, and hide the others."""
+        if self.scroll_view is None:
+            left, right = float('-inf'), float('inf')
+        else:
+            view_width = self.scroll_view.width
+            left = self.scroll_view.scroll_x * max(self.width - view_width, 0) - view_width
+            right = left + view_width * 3
+
+        for child in self.children:
+            if isinstance(child, PhotoButton):
+                if child.right > left and child.x < right:
+                    child.show_photo()
+                else:
+                    child.hide_photo()
@@ -7,7 +7,9 @@ import math
 import os
 import time
 
-from library.logic.search_photos import IStockPhoto
+from library.logic.photo_cache import PhotoPrefetcher, TextureCache
+from library.logic.photo_hash import PhotoDeduplicator
+from library.logic.search_photos import IStockPhoto, PhotoStream
 from kivy.app import App
 from kivy.clock import Clock
 from kivy.uix.label import Label
@@ -28,9 +30,14 @@ class SelectPhoto(Widget):
     def __init__(self):
         super(SelectPhoto, self).__init__()
         self.page_index = 0
-        self.photos = []
         self.photo_to_be_added = ''
+        self.shown_photos = {}
         self.istock_photo = IStockPhoto()
+        self.photos = PhotoStream(self.istock_photo)
+        self.texture_cache = TextureCache()
+        self.deduplicator = PhotoDeduplicator()
+        self.prefetcher = PhotoPrefetcher(self.texture_cache, on_ready=self.on_photo_ready,
+                                          deduplicator=self.deduplicator, on_filled=self.show_photos)
         self.reset_photos()
 
     def go_back(self) -> None:
@@ -45,33 +52,106 @@ class SelectPhoto(Widget):
     def get_photos(self, word: str, definition: str, example: str) -> None:
         """
         Search photos from the [`iStockPhoto`](https://www.istockphoto.com) and show it in the user interface. It
-        searches the word first, then the definition and search the example.
+        searches the word first, then the definition and search the example. The result pages are fetched in the
+        background, 2 pages of photos ahead of the page shown.
 
         Args:
             word: The vocabulary.
             definition: The definition of the vocabulary.
             example: The example of the vocabulary.
         """
-        url = r'https://www.istockphoto.com/search/2/image?phrase='
-        self.photos = []
-        for t in (word, definition, example):
-            self.photos += self.istock_photo.search_photos(url + t)
-
+        self.photos = PhotoStream(self.istock_photo, [word, definition, example])
         self.show_photos()
 
-    def show_photos(self) -> None:
-        """Show the photos in the user interface."""
-        if not self.photos:
-            return
+    def show_photos(self, *args) -> None:
+        """
+        Show the photos in the user interface. It is called again by the
+        [`PhotoPrefetcher`](/reference/#library.logic.photo_cache.PhotoPrefetcher) once further links are fetched.
+        """
+        # drop duplicates which have been hashed in previous searches, fetch the links of the current page and the
+        # next 2 pages in the background
+        for url in self.photos[self.page_index*2:]:
+            if self.deduplicator.is_hashed(url):
+                self.drop_duplicate(url)
+        self.prefetcher.fill(self.photos, (self.page_index + 3) * 2)
+        if self.photos.exhausted:
+            self.page_index = max(min(self.page_index, math.ceil(len(self.photos)/2)-1), 0)
 
         # define photos
         photo1 = self.page_index*2
         photo2 = self.page_index*2 + 1
-        no_image = os.path.join(App.get_running_app().working_dir, 'library', 'images', 'no_image.png')
+        if photo1 >= len(self.photos):  # the links are being fetched
+            if len(self.photos):
+                self.show_loading()
+            return
+        no_image = os.path.join(App.get_running_app().working_dir, 'library', 'images',
+                                'no_image.png' if self.photos.exhausted else 'loading.gif')
 
         # set photo source
-        self.photo_1.source = self.photos[photo1]
-        self.photo_2.source = self.photos[photo2] if photo2 < len(self.photos) else no_image
+        self.set_photo(self.photo_1, self.photos[photo1])
+        self.set_photo(self.photo_2, self.photos[photo2] if photo2 < len(self.photos) else no_image)
+
+        # download and decode the current page and the next 2 pages in the background
+        self.prefetcher.prefetch(self.photos[photo1:photo2 + 5])
+
+    def set_photo(self, photo: Widget, url: str) -> None:
+        """
+        Show the photo from the texture cache if it has been prefetched, otherwise let the image widget load the url.
+
+        Args:
+            photo: The image button to show the photo.
+            url: The source link of the photo.
+        """
+        self.shown_photos[photo] = url
+        texture = self.texture_cache.get(url)
+        if texture:
+            photo.source = ''
+            photo.texture = texture
+        else:
+            photo.source = url
+
+    def photo_source(self, photo: Widget) -> str:
+        """
+        Return the source link of the photo shown in the image button.
+
+        Args:
+            photo: The image button showing the photo.
+        """
+        return self.shown_photos.get(photo, photo.source)
+
+    def on_photo_ready(self, url: str) -> None:
+        """
+        Callback method from the [`PhotoPrefetcher`](/reference/#library.logic.photo_cache.PhotoPrefetcher) once a
+        photo is decoded.
+
+        Args:
+            url: The source link of the photo.
+        """
+        if self.drop_duplicate(url):
+            self.show_photos()
+            return
+
+        for photo, shown in list(self.shown_photos.items()):
+            if shown == url and photo.source == url:
+                self.set_photo(photo, url)
+
+    def drop_duplicate(self, url: str) -> bool:
+        """
+        Compare the hashed photo with the photos of this search, drop the lower resolution variant if it is a
+        near-duplicate.
+
+        Args:
+            url: The source link of the hashed photo.
+
+        Returns:
+            True if a photo being shown is dropped.
+        """
+        dropped = self.deduplicator.add(url)
+        if not dropped:
+            return False
+
+        self.photos.remove(dropped)
+        return dropped in self.shown_photos.values()
 
     def previous_photos(self, instance: Widget) -> None:
         """
@@ -80,7 +160,7 @@ class SelectPhoto(Widget):
         Args:
             instance: This is a kivy's widget. This argument will be passed from a caller widget automatically.
         """
-        self.page_index = max(self.page_index - 1, 0)
+        self.page_index = max(self.page_index - 1, math.ceil(self.photos.start/2))
         self.show_photos()
 
     def next_photos(self, instance: Widget) -> None:
@@ -90,7 +170,8 @@ class SelectPhoto(Widget):
         Args:
             instance: This is a kivy's widget. This argument will be passed from a caller widget automatically.
         """
-        self.page_index = min(math.ceil(len(self.photos)/2)-1, self.page_index + 1)
+        # one page past the links fetched, it is shown once the links are fetched
+        self.page_index = min(math.ceil(len(self.photos)/2), self.page_index + 1)
         self.show_photos()
 
     def add_photo(self, instance: Widget) -> None:
@@ -101,16 +182,35 @@ class SelectPhoto(Widget):
         Args:
              instance: This is a kivy's widget. This argument will be passed from a caller widget automatically.
         """
-        self.photo_to_be_added = instance.source
+        self.photo_to_be_added = self.photo_source(instance)
         App.get_running_app().main_container.load_slide(
             App.get_running_app().__getattribute__('add_vocab')
         )
         self.reset_photos()
 
+    def free_textures(self) -> None:
+        """
+        Release the prefetched photos when the page is detached by
+        [`PageContainer`](/reference/#library.logic.pages.PageContainer).
+        """
+        self.prefetcher.cancel()
+        self.texture_cache.clear()
+
+    def restore_textures(self) -> None:
+        """The photos are prefetched again when the next page of photos is shown."""
+
     def reset_photos(self) -> None:
         """Reset the photos to 'loading' image."""
         self.page_index = 0
-        self.photos = []
+        self.photos = PhotoStream(self.istock_photo)
+        self.shown_photos = {}
+        self.deduplicator.reset()
+        self.prefetcher.cancel()
+        self.show_loading()
+
+    def show_loading(self) -> None:
+        """Show the 'loading' image in both image buttons."""
         loading_image = os.path.join(App.get_running_app().working_dir, 'library', 'images', 'loading.gif')
-        self.photo_1.source = loading_image
-        self.photo_2.source = loading_image
+        for photo in (self.photo_1, self.photo_2):
+            self.shown_photos.pop(photo, None)
+            photo.source = loading_image
@@ -0,0 +1,10 @@
+"""
+`front_ends/tests/conftest.py`
+\nThe tests of the pages, run `python -m pytest front_ends` from the project directory.
+"""
+
+import os
+
+# kivy must not parse the arguments of pytest
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
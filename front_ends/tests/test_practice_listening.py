@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import pytest
+from kivy.clock import Clock
+
+from front_ends import practice_listening, practice_vocab
+from front_ends.practice_listening import PracticeListening
+from library.logic.practice_session import Card, PracticeSession
+
+
+class FakeAudioQueue:
+    def __init__(self):
+        self.files, self.played = [], 0
+
+    def start(self, files):
+        self.files, self.played = files, 0
+
+    def next(self):
+        self.played += 1
+
+    def stop(self):
+        self.files = []
+
+
+class FakeLog:
+    def __init__(self):
+        self.records = []
+
+    def record(self, key, correct, seconds):
+        self.records.append((key, correct))
+
+
+@pytest.fixture
+def logs(monkeypatch):
+    logs, reviews = {}, []
+    monkeypatch.setattr(practice_vocab, 'get_review_log', lambda mode: logs.setdefault(mode, FakeLog()))
+    scheduler = SimpleNamespace(review=lambda key, grade: reviews.append((key, grade)), save=lambda: None)
+    monkeypatch.setattr(practice_vocab, 'get_scheduler', lambda: scheduler)
+    return logs, reviews
+
+
+@pytest.fixture
+def page(monkeypatch, logs):
+    monkeypatch.setattr(practice_listening, 'show_answer', lambda answer, correct_answer, is_correct: 0)
+    page = PracticeListening()
+    page.ti_dictation = SimpleNamespace(text='', disabled=True, focus=False)
+    page.lbl_dictation = SimpleNamespace(text='')
+    page.audio_queue = FakeAudioQueue()
+
+    cards = [Card(word, word, word, '', '', '', sound=f'{word}.mp3') for word in ('run', 'walk')]
+    page.session = PracticeSession(cards)
+    page.audio_queue.start([card.sound for card in cards])
+    page.next_word()
+    return page
+
+
+def answer(page, text):
+    page.ti_dictation.text = text
+    page.check_dictation(page.ti_dictation)
+
+
+def test_dictation_plays_the_next_word_after_the_answer(page):
+    assert page.testing_word.key == 'run' and page.audio_queue.played == 1
+    answer(page, 'Run')
+    assert page.ti_dictation.disabled and page.next_event is not None
+    answer(page, 'again')  # ignored until the next word is shown
+    assert page.session.tested == 1
+
+    Clock.tick()
+    assert page.testing_word.key == 'walk' and page.audio_queue.played == 2 and not page.ti_dictation.disabled
+    answer(page, 'wall')
+    Clock.tick()
+    assert (page.session.tested, page.session.correct) == (2, 1)
+    assert page.lbl_dictation.text.startswith('finished')
+
+
+def test_leaving_cancels_the_next_word(page):
+    answer(page, 'run')
+    page.stop_dictation()
+    Clock.tick()
+
+    assert page.next_event is None and page.session is None and page.testing_word is None
+    assert page.audio_queue.played == 1 and page.audio_queue.files == []
+    assert page.ti_dictation.disabled and page.lbl_dictation.text == ''
+
+
+def test_dictation_does_not_change_the_schedule(page, logs):
+    logs, reviews = logs
+    answer(page, 'run')
+    assert logs['dictation'].records == [('run', True)] and reviews == [] and 'review' not in logs
+
+    card = Card('walk', 'walk', 'walk', '', '', '')
+    assert not practice_vocab.grade_answer(card, 'wall', 0.0)
+    assert logs['review'].records == [('walk', False)] and reviews == [('walk', 1)]
@@ -0,0 +1,86 @@
+"""
+`library/logic/atlas.py`
+\nThis module consists of:
+    - `build_atlas`
+    - `atlas_source`
+
+It packs the background photos of the buttons into kivy atlases at the size they are shown, so a page opens one texture
+instead of decoding every full size photo. Run `python -m library.logic.atlas` to build the atlases after changing the
+photos, the original photos are used if an atlas has not been built.
+"""
+
+import os
+import tempfile
+
+images_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'images')
+images_dir = os.path.normpath(images_dir)
+atlas_dir = os.path.join(images_dir, 'atlas')
+
+# folder of the photos: size of the buttons
+ATLASES = {
+    'button_background': (192, 108),
+    'cover_page_button_background': (410, 150),
+}
+
+
+def build_atlas(name: str, size: tuple, atlas_size: int = 1024) -> str:
+    """
+    Resize the photos of the folder and pack them into atlases, the id of a photo is its file name without extension.
+
+    Args:
+        name: Folder name of the photos in `library/images`, it is also the name of the atlas.
+        size: The size the photos are resized to.
+        atlas_size: Width and height of an atlas image.
+
+    Returns:
+        Path of the atlas file.
+    """
+    from kivy.atlas import Atlas
+    from PIL import Image
+
+    src_dir = os.path.join(images_dir, name)
+    os.makedirs(atlas_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = []
+        for file in sorted(os.listdir(src_dir)):
+            if not file.lower().endswith(('.jpg', '.jpeg', '.png')):
+                continue
+            with Image.open(os.path.join(src_dir, file)) as photo:
+                resized = photo.convert('RGB').resize(size, Image.LANCZOS)
+            files.append(os.path.join(tmp_dir, os.path.splitext(file)[0] + '.png'))
+            resized.save(files[-1])
+
+        for file in os.listdir(atlas_dir):
+            if file.startswith(name + '.') or file.startswith(name + '-'):
+                os.remove(os.path.join(atlas_dir, file))
+
+        atlas_file, _ = Atlas.create(os.path.join(atlas_dir, name), files, atlas_size)
+
+    return atlas_file
+
+
+_built_atlases = {}
+
+
+def atlas_source(name: str, photo: str) -> str:
+    """
+    Return the source of a button background, from the atlas if it has been built.
+
+    Args:
+        name: Folder name of the photos in `library/images`, e.g. 'button_background'.
+        photo: File name of the photo without extension, e.g. 'bbc_news'.
+
+    Returns:
+        An 'atlas://' url, or the path of the jpg photo.
+    """
+    if name not in _built_atlases:
+        _built_atlases[name] = os.path.isfile(os.path.join(atlas_dir, name + '.atlas'))
+
+    if _built_atlases[name]:
+        return f"atlas://{os.path.join(atlas_dir, name)}/{photo}"
+    return os.path.join(images_dir, name, f'{photo}.jpg')
+
+
+if __name__ == '__main__':
+    for atlas_name, photo_size in ATLASES.items():
+        print(f"built {build_atlas(atlas_name, photo_size)}")
@@ -0,0 +1,246 @@
+"""
+`library/logic/audio.py`
+\nThis module consists of:
+    - `AudioManager`
+    - `AudioQueue`
+    - `get_audio_manager`
+
+It keeps the recently played sounds loaded, so playing a sound again does not open and decode the mp3 file again, and
+the number of loaded sounds is bounded. The audio queue plays a sequence of sounds, e.g. a dictation, with the next
+sounds already loaded.
+"""
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.clock import Clock
+from kivy.core.audio import SoundLoader
+from library.logic.metrics import get_metrics
+
+
+class AudioManager:
+    """
+    A least recently used cache of kivy's `Sound`, keyed by the file path and its modified time, so a file written
+    again (e.g. `temp.mp3`) is loaded again, the old sound is stopped and unloaded. An evicted sound is unloaded, a
+    sound which is playing is not evicted.
+    """
+
+    def __init__(self, max_sounds: int = 16):
+        self.max_sounds = max_sounds
+        self._sounds = OrderedDict()  # {file: (mtime, Sound)}
+
+    def __len__(self) -> int:
+        return len(self._sounds)
+
+    def __contains__(self, file: str) -> bool:
+        return file in self._sounds and self._sounds[file][0] == self._mtime(file)
+
+    def load(self, file: str):
+        """
+        Return the loaded sound of the file, load it if it is not in the cache or the file has been changed.
+
+        Args:
+            file: Path of the sound file.
+
+        Returns:
+            The `Sound`, None if the file does not exist or cannot be loaded.
+        """
+        mtime = self._mtime(file)
+        if file in self._sounds:
+            cached_mtime, sound = self._sounds[file]
+            if cached_mtime == mtime:
+                self._sounds.move_to_end(file)
+                get_metrics().count('sound.cache_hit')
+                return sound
+            self.unload(file)
+
+        if mtime is None:
+            return None
+
+        get_metrics().count('sound.cache_miss')
+        with get_metrics().timer('sound.load'):
+            sound = SoundLoader.load(file)
+        if sound is None:
+            return None
+
+        self._sounds[file] = (mtime, sound)
+        self._evict()
+        get_metrics().gauge('sound.loaded', len(self._sounds))
+        return sound
+
+    def play(self, file: str):
+        """
+        Play the sound file from the beginning.
+
+        Args:
+            file: Path of the sound file.
+
+        Returns:
+            The `Sound`, None if it cannot be loaded.
+        """
+        sound = self.load(file)
+        if sound is not None:
+            if sound.state == 'play':
+                sound.stop()
+            sound.play()
+        return sound
+
+    def preload(self, files: list, interval: float = 0.1) -> None:
+        """
+        Load the sound files which are not loaded, one file per `interval` seconds so the frames are not blocked. Sounds
+        are loaded in the main thread because the audio providers are not thread-safe.
+
+        Args:
+            files: Paths of the sound files, the first file is loaded first.
+            interval: Seconds between loading two files.
+        """
+        files = [file for file in dict.fromkeys(files) if file and file not in self]
+        for i, file in enumerate(files[:self.max_sounds]):
+            Clock.schedule_once(lambda t, f=file: self.load(f), interval * i)
+
+    def unload(self, file: str) -> None:
+        """
+        Unload the sound of the file, it is stopped first if it is playing, e.g. the file has been written again while
+        the old sound is played.
+
+        Args:
+            file: Path of the sound file.
+        """
+        if file in self._sounds:
+            sound = self._sounds.pop(file)[1]
+            if sound.state == 'play':
+                sound.stop()
+            sound.unload()
+
+    def clear(self) -> None:
+        """Unload all the sounds."""
+        for file in list(self._sounds):
+            self.unload(file)
+
+    def _evict(self) -> None:
+        """Unload the least recently used sounds over `max_sounds`, the playing sounds are kept."""
+        for file in list(self._sounds):
+            if len(self._sounds) <= self.max_sounds:
+                break
+            if self._sounds[file][1].state != 'play':
+                self.unload(file)
+
+    @staticmethod
+    def _mtime(file: str) -> int | None:
+        """Return the modified time of the file in nanoseconds, None if it does not exist."""
+        try:
+            return os.stat(file).st_mtime_ns
+        except OSError:
+            return None
+
+
+class AudioQueue:
+    """
+    A sequence of sound files played one by one. The next `ahead` files are read in a background thread, so they are in
+    the cache of the operating system, then loaded (decoded) by the
+    [`AudioManager`](/reference/#library.logic.audio.AudioManager) in the main thread one per frame. Only the files
+    around the current one are loaded, however long the sequence is, so moving to the next sound does not wait for the
+    disk or the decoder.
+    """
+
+    def __init__(self, manager: AudioManager, ahead: int = 4):
+        """
+        Args:
+            manager: The audio manager which loads and caches the sounds.
+            ahead: Number of files after the current one to be loaded, less than `manager.max_sounds`.
+        """
+        self.manager = manager
+        self.ahead = min(ahead, manager.max_sounds - 1)
+        self.files = []
+        self.position = -1
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='audio')
+        self._pending = set()  # files being read or waiting to be loaded
+
+    @property
+    def current(self) -> str | None:
+        """The file of the current sound, None before the first or after the last."""
+        return self.files[self.position] if 0 <= self.position < len(self.files) else None
+
+    def start(self, files: list) -> None:
+        """
+        Replace the sequence and load its first files, call `next` to play the first one.
+
+        Args:
+            files: Paths of the sound files.
+        """
+        self.files = list(files)
+        self.position = -1
+        self._fill()
+
+    def next(self):
+        """
+        Move to the next file and play it.
+
+        Returns:
+            The `Sound`, None if the sequence is finished or the file cannot be loaded.
+        """
+        self.position += 1
+        return self.replay()
+
+    def replay(self):
+        """Play the current file again from the beginning, return the `Sound`."""
+        file = self.current
+        if file is None:
+            return None
+
+        get_metrics().count('audio.queue_ready' if file in self.manager else 'audio.queue_stall')
+        sound = self.manager.play(file)
+        self._fill()
+        return sound
+
+    def stop(self) -> None:
+        """Stop the current sound and forget the sequence, the loaded sounds stay in the audio manager."""
+        file = self.current
+        if file and file in self.manager:
+            sound = self.manager.load(file)
+            if sound.state == 'play':
+                sound.stop()
+        self.files = []
+        self.position = -1
+
+    def _fill(self) -> None:
+        """Read and load the next `ahead` files which are not loaded."""
+        for file in self.files[self.position + 1:self.position + 1 + self.ahead]:
+            if file not in self.manager and file not in self._pending:
+                self._pending.add(file)
+                self._executor.submit(self._read, file).add_done_callback(
+                    lambda future, f=file: Clock.schedule_once(lambda t: self._load(f), 0))
+
+    @staticmethod
+    def _read(file: str) -> None:
+        """Read the file in the background thread, so loading it in the main thread does not wait for the disk."""
+        try:
+            with open(file, 'rb') as f:
+                while f.read(1024 * 1024):
+                    pass
+        except OSError:
+            pass
+
+    def _load(self, file: str) -> None:
+        """Load the file in the main thread if it is still in the window of the next files."""
+        self._pending.discard(file)
+        if file in self.files[self.position + 1:self.position + 1 + self.ahead]:
+            self.manager.load(file)
+
+
+_audio_manager = None
+
+
+def get_audio_manager() -> AudioManager:
+    """
+    Return the audio manager shared by the pages.
+
+    Returns:
+        The shared [`AudioManager`](/reference/#library.logic.audio.AudioManager).
+    """
+    global _audio_manager
+    if _audio_manager is None:
+        _audio_manager = AudioManager()
+
+    return _audio_manager
@@ -0,0 +1,302 @@
+"""
+`library/logic/backup.py`
+\nThis module consists of:
+    - `BackupRepository`
+    - `main`
+
+It backs up the database directory incrementally. The files are stored once by the sha256 of their content (a blob),
+and each snapshot is a small manifest of the paths, the hashes, the sizes and the modified times. A file whose size and
+modified time are the same as in the last snapshot is not read again, and a blob already in the repository is not
+copied again, so a backup after the first one costs roughly the size of the changes. Any snapshot can be restored,
+e.g. `vocabulary.csv` alone after a crash while it was written. Run `python -m library.logic.backup --help` from the
+project directory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import time
+
+CHUNK = 1024 * 1024
+EXCLUDE = ('*.tmp', 'metrics.json*')
+
+
+class BackupRepository:
+    """
+    A directory of `objects/<2 hex>/<62 hex>` blobs and `snapshots/<id>.json` manifests. A blob and a manifest are
+    written to a temporary file and renamed, so an interrupted backup leaves no partial file behind.
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: The directory of the repository, it is created if it does not exist.
+        """
+        self.root = os.path.abspath(root)
+        self.objects_dir = os.path.join(self.root, 'objects')
+        self.snapshots_dir = os.path.join(self.root, 'snapshots')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+
+    def blob_path(self, digest: str) -> str:
+        """Return the file of the blob."""
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def snapshots(self) -> list:
+        """Return the ids of the snapshots, the oldest first."""
+        snapshots = [file[:-5] for file in os.listdir(self.snapshots_dir) if file.endswith('.json')]
+        # the snapshots of the same second are numbered, e.g. '20240101T120000-10' is after '20240101T120000-2'
+        return sorted(snapshots, key=lambda snapshot: (snapshot.partition('-')[0],
+                                                       int(snapshot.partition('-')[2] or 0)))
+
+    def manifest(self, snapshot: str) -> dict:
+        """
+        Read the manifest of a snapshot.
+
+        Args:
+            snapshot: The id of the snapshot, or 'latest'.
+
+        Returns:
+            A dictionary of the id, the source directory, the created time and the files
+            `{path: {'hash': ..., 'size': ..., 'mtime_ns': ...}}`.
+        """
+        if snapshot == 'latest':
+            snapshots = self.snapshots()
+            if not snapshots:
+                raise FileNotFoundError(f"no snapshot in {self.root}")
+            snapshot = snapshots[-1]
+
+        with open(os.path.join(self.snapshots_dir, f'{snapshot}.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def backup(self, source: str, exclude: tuple = EXCLUDE) -> dict:
+        """
+        Take a snapshot of the source directory.
+
+        Args:
+            source: The directory to be backed up, e.g. `database`.
+            exclude: The patterns of the file names not to be backed up.
+
+        Returns:
+            The manifest of the snapshot, with the number of the files hashed and the bytes copied in 'stats'.
+        """
+        source = os.path.abspath(source)
+        previous = self.manifest('latest')['files'] if self.snapshots() else {}
+        files = {}
+        stats = {'files': 0, 'hashed': 0, 'copied_bytes': 0}
+
+        for path in self._walk(source, exclude):
+            file = os.path.join(source, path)
+            try:
+                stat = os.stat(file)
+            except OSError:  # removed while walking
+                continue
+
+            stats['files'] += 1
+            old = previous.get(path)
+            if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns \
+                    and os.path.isfile(self.blob_path(old['hash'])):
+                files[path] = old
+                continue
+
+            stats['hashed'] += 1
+            digest, copied = self._store(file)
+            stats['copied_bytes'] += copied
+            # a file changed while it was copied is hashed again by the next backup
+            changed = os.stat(file).st_mtime_ns != stat.st_mtime_ns
+            files[path] = {'hash': digest, 'size': os.path.getsize(self.blob_path(digest)),
+                           'mtime_ns': 0 if changed else stat.st_mtime_ns}
+
+        snapshot_id = base = time.strftime('%Y%m%dT%H%M%S')
+        while os.path.exists(os.path.join(self.snapshots_dir, f'{snapshot_id}.json')):
+            snapshot_id = f'{base}-{int(snapshot_id.partition("-")[2] or 0) + 1}'
+        manifest = {'id': snapshot_id, 'source': source, 'created': time.time(), 'files': files}
+        self._write_json(os.path.join(self.snapshots_dir, f'{snapshot_id}.json'), manifest)
+
+        return dict(manifest, stats=stats)
+
+    def restore(self, snapshot: str, target: str, paths: list | None = None, clean: bool = False) -> list:
+        """
+        Restore the files of a snapshot. A file is written to a temporary file and renamed, and its modified time is
+        set back, so the next backup does not hash it again.
+
+        Args:
+            snapshot: The id of the snapshot, or 'latest'.
+            target: The directory to restore to, e.g. `database`.
+            paths: Only the files matching these patterns, e.g. `['vocabulary.csv']`. All files if None.
+            clean: Remove the files in the target which are not in the snapshot (only if `paths` is None).
+
+        Returns:
+            The paths of the files restored.
+        """
+        manifest = self.manifest(snapshot)
+        target = os.path.abspath(target)
+        restored = []
+        for path, info in manifest['files'].items():
+            if paths and not any(fnmatch.fnmatch(path, pattern) for pattern in paths):
+                continue
+
+            file = os.path.join(target, path)
+            try:
+                stat = os.stat(file)
+                if stat.st_size == info['size'] and (stat.st_mtime_ns == info['mtime_ns']
+                                                     or self._hash(file) == info['hash']):
+                    continue  # unchanged
+            except OSError:
+                pass
+
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            shutil.copyfile(self.blob_path(info['hash']), file + '.tmp')
+            os.replace(file + '.tmp', file)
+            if info['mtime_ns']:
+                os.utime(file, ns=(info['mtime_ns'], info['mtime_ns']))
+            restored.append(path)
+
+        if clean and not paths:
+            for path in self._walk(target, EXCLUDE):
+                if path not in manifest['files']:
+                    os.remove(os.path.join(target, path))
+
+        return restored
+
+    def verify(self, snapshot: str) -> list:
+        """
+        Check the blobs of a snapshot.
+
+        Args:
+            snapshot: The id of the snapshot, or 'latest'.
+
+        Returns:
+            The paths whose blob is missing or damaged.
+        """
+        damaged = []
+        for path, info in self.manifest(snapshot)['files'].items():
+            blob = self.blob_path(info['hash'])
+            if not os.path.isfile(blob) or self._hash(blob) != info['hash']:
+                damaged.append(path)
+        return damaged
+
+    def prune(self, keep: int) -> int:
+        """
+        Remove the snapshots except the latest `keep` ones, and the blobs no snapshot refers to.
+
+        Args:
+            keep: Number of snapshots to keep.
+
+        Returns:
+            Number of blobs removed.
+        """
+        snapshots = self.snapshots()
+        for snapshot in snapshots[:max(0, len(snapshots) - keep)]:
+            os.remove(os.path.join(self.snapshots_dir, f'{snapshot}.json'))
+
+        used = {info['hash'] for snapshot in self.snapshots() for info in self.manifest(snapshot)['files'].values()}
+        removed = 0
+        for folder in os.listdir(self.objects_dir):
+            for name in os.listdir(os.path.join(self.objects_dir, folder)):
+                if folder + name not in used:
+                    os.remove(os.path.join(self.objects_dir, folder, name))
+                    removed += 1
+        return removed
+
+    def _store(self, file: str) -> tuple:
+        """
+        Copy the file to the repository if its content is not there yet.
+
+        Returns:
+            The sha256 of the content and the number of bytes copied.
+        """
+        digest = self._hash(file)
+        blob = self.blob_path(digest)
+        if os.path.isfile(blob):
+            return digest, 0
+
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        shutil.copyfile(file, blob + '.tmp')
+        # the source may be changed while it is copied, the blob is named by the hash of the copy
+        copied = blob + '.tmp'
+        digest = self._hash(copied)
+        blob = self.blob_path(digest)
+        size = os.path.getsize(copied)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        os.replace(copied, blob)
+        return digest, size
+
+    def _walk(self, directory: str, exclude: tuple) -> list:
+        """Return the paths of the files in the directory relative to it, with '/' separators."""
+        paths = []
+        for folder, dirs, files in os.walk(directory):
+            # never back up the repository into itself
+            dirs[:] = [d for d in dirs if os.path.join(folder, d) != self.root]
+            for name in files:
+                if any(fnmatch.fnmatch(name, pattern) for pattern in exclude):
+                    continue
+                paths.append(os.path.relpath(os.path.join(folder, name), directory).replace(os.sep, '/'))
+        return sorted(paths)
+
+    @staticmethod
+    def _hash(file: str) -> str:
+        """Return the sha256 of the file."""
+        sha = hashlib.sha256()
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    @staticmethod
+    def _write_json(file: str, data: dict) -> None:
+        """Write the json file atomically."""
+        with open(file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(file + '.tmp', file)
+
+
+def main() -> None:
+    """Parse the arguments and run the command."""
+    project_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+    parser = argparse.ArgumentParser(description='Back up and restore the vocabulary database incrementally.')
+    parser.add_argument('--repo', default=os.path.join(project_dir, 'backups'), help='the backup repository')
+    parser.add_argument('--data-dir', default=os.path.join(project_dir, 'database'), help='the database directory')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('backup', help='take a snapshot of the database directory')
+    commands.add_parser('list', help='list the snapshots')
+    restore = commands.add_parser('restore', help='restore a snapshot to the database directory')
+    restore.add_argument('snapshot', nargs='?', default='latest', help="the id of the snapshot, default 'latest'")
+    restore.add_argument('--path', action='append', help="restore only these files, e.g. 'vocabulary.csv'")
+    restore.add_argument('--clean', action='store_true', help='remove the files which are not in the snapshot')
+    verify = commands.add_parser('verify', help='check the blobs of a snapshot')
+    verify.add_argument('snapshot', nargs='?', default='latest')
+    prune = commands.add_parser('prune', help='remove old snapshots and unused blobs')
+    prune.add_argument('--keep', type=int, default=10, help='number of snapshots to keep')
+    args = parser.parse_args()
+
+    repo = BackupRepository(args.repo)
+    if getattr(args, 'snapshot', 'latest') != 'latest' and args.snapshot not in repo.snapshots():
+        parser.error(f"no snapshot {args.snapshot} in {repo.root}")
+    if args.command == 'backup':
+        manifest = repo.backup(args.data_dir)
+        stats = manifest['stats']
+        print(f"snapshot {manifest['id']}: {stats['files']} files, {stats['hashed']} hashed, "
+              f"{stats['copied_bytes']} bytes copied")
+    elif args.command == 'list':
+        for snapshot in repo.snapshots():
+            manifest = repo.manifest(snapshot)
+            size = sum(info['size'] for info in manifest['files'].values())
+            print(f"{snapshot}  {len(manifest['files'])} files  {size} bytes")
+    elif args.command == 'restore':
+        restored = repo.restore(args.snapshot, args.data_dir, args.path, args.clean)
+        print(f"{len(restored)} files restored")
+    elif args.command == 'verify':
+        damaged = repo.verify(args.snapshot)
+        print('\n'.join(damaged) if damaged else 'OK')
+    elif args.command == 'prune':
+        print(f"{repo.prune(args.keep)} blobs removed")
+
+
+if __name__ == '__main__':
+    main()
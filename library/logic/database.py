@@ -1,24 +1,54 @@
 """
 `library/logic/database.py`
 \nThis module consists of:
+    - `get_service`
     - `update_database`
     - `get_data`
     - `get_sound`
 
-It reads/ writes data from database.
+It reads/ writes data from database of the running app, through the
+[`VocabularyService`](/reference/#library.logic.service.VocabularyService) of the app's database directory.
 """
-import requests.models
+from __future__ import annotations
+
 from kivy.app import App
-import pandas as pd
+from library.logic.distractors import get_distractor_index
+from library.logic.lazy_import import lazy_import
+from library.logic.media_queue import get_media_queue
+from library.logic.scheduler import get_scheduler
+from library.logic.service import VocabularyService
 import os
-import shutil
-import urllib.request
 
+pd = lazy_import('pandas')
+requests = lazy_import('requests')
+
+_service = None
+
+
+def get_service() -> VocabularyService:
+    """
+    Return the vocabulary service of the running app, it shares the schedule, the distractor index and the media queue
+    with the pages.
 
-def update_database(word: str, definition: str, example: str, photo: str, sound: requests.models.Response | None) -> bool:
+    Returns:
+        The shared [`VocabularyService`](/reference/#library.logic.service.VocabularyService).
+    """
+    global _service
+    if _service is None:
+        _service = VocabularyService(os.path.join(App.get_running_app().working_dir, 'database'),
+                                     scheduler=get_scheduler, distractors=get_distractor_index,
+                                     media_queue=get_media_queue)
+
+    return _service
+
+
+def update_database(word: str, definition: str, example: str, photo: str, sound: requests.models.Response | None,
+                    on_media_done=None, level: str | None = None, translation: str | None = None,
+                    entry: dict | None = None) -> bool:
     """
     Write data to the csv file, add image file and mp3 file to the database. Return True if successful, return False if
-    the word is empty, or no definition/ example/ photo is found return False.
+    the word is empty, or no definition/ example/ photo is found return False. The photo is downloaded in the
+    background by the [`MediaQueue`](/reference/#library.logic.media_queue.MediaQueue) after the row is written.
 
     Args:
         word: The vocabulary.
@@ -26,88 +56,37 @@ def update_database(word: str, definition: str, example: str, photo: str, sound:
         example: The example of the vocabulary.
         photo: The source link of the photo of the vocabulary.
         sound: The requests' response including bytes code of the mp3 file.
-        update_or_add: Use this argument to define
+        on_media_done: A callback called with the job and the result (True/ False) once the photo is downloaded.
+        level: The CEFR level of the vocabulary, e.g. 'B2'. None keeps the level in the database.
+        translation: The translation of the vocabulary. None keeps the translation in the database.
+        entry: The full dictionary entry of the vocabulary, all its senses are kept in the side table.
 
     Return:
         True if update success, False if not success.
     """
-    if not any([word, definition, example, photo]):
-        return False
-
-    # write csv file
-    working_dir = App.get_running_app().working_dir
-    db_dir = os.path.join(working_dir, 'database')
-
-    # check file existence
-    if 'vocabulary.csv' in os.listdir(db_dir):
-        file = os.path.join(db_dir, 'vocabulary.csv')
-        df = pd.read_csv(file, encoding='ISO-8859-1')
-
-        # check if the word exists
-        all_vocabs = df['Vocabulary'].values.tolist()
-        if word.strip() in all_vocabs:
-            """need to ask if overwrite"""
-            df.drop(df[(df['Vocabulary'] == word)].index, axis=0, inplace=True)
-
-        # gather data
-        if '(' in word:
-            word = word[:word.find('(')]
-        data = {'Vocabulary': [word.strip()],
-                'Description': [definition.strip()],
-                'Example': [example.strip()]}
-
-        # write database
-        df_new = pd.concat([df, pd.DataFrame(data)], ignore_index=True, axis=0)
-        try:
-            df_new.to_csv(file, index=False)
-        except Exception as e:
-            print(f"\ndatabase.py->update_database\n{e}")
-            return False
-
-        # add image file
-        word = word.strip().replace(' ', '_').replace('/', '_').lower()
-        if photo.startswith('http'):
-            if os.path.basename(photo) != 'no_image.png':
-                jpeg = os.path.join(working_dir, 'database', 'images', f'{word}.jpg')
-                urllib.request.urlretrieve(photo, jpeg)
-
-        # add sounds file
-        if sound:
-            src_file = os.path.join(working_dir, 'library', 'sounds', 'temp.mp3')
-            dst_file = os.path.join(working_dir, 'database', 'sounds', f"{word}.mp3")
-            shutil.copy(src_file, dst_file)
-
-        return True
-
-
-def get_data(num: int, method: str = 'all') -> pd.DataFrame | None:
+    # the sound of the word looked up is saved to temp.mp3 by the add vocabulary page
+    sound_file = os.path.join(App.get_running_app().working_dir, 'library', 'sounds', 'temp.mp3') if sound else None
+    return get_service().add(word, definition, example, photo, sound_file=sound_file, on_media_done=on_media_done,
+                             level=level, translation=translation, entry=entry)
+
+
+def get_data(num: int, method: str = 'all', **filters) -> pd.DataFrame | None:
     """
-    Get vocabulary to practice, it shuffles the whole data first or get the latest data and then shuffle it, depends on
-    the method given (latest/ all). Return the data.
+    Get vocabulary to practice, it shuffles the whole data first or get the latest data and then shuffle it, or get the
+    vocabulary due for review from the [`SpacedRepetition`](/reference/#library.logic.scheduler.SpacedRepetition)
+    schedule, depends on the method given (latest/ all/ review). Only the vocabulary matching the filters is selected.
+    Return the data.
 
     Args:
         num: Number of vocabulary to be extracted.
-        method: all/ latest defines the data selection method.
+        method: all/ latest/ review defines the data selection method.
+        **filters: level, word_type, since and until, see
+            [`VocabularyService.practice_data`](/reference/#library.logic.service.VocabularyService.practice_data).
 
     Returns:
         Dataframe contains the required data to practice/ None if no .csv file in the database.
     """
-    # request database
-    data = os.path.join(App.get_running_app().working_dir, 'database', 'vocabulary.csv')
-    if not os.path.isfile(data):
-        return None
-
-    data = pd.read_csv(data).fillna('')
-    if method == 'latest':
-        # get data -> shuffle
-        data = data.iloc[-num:]  # get data
-        data = data.sample(frac=1).reset_index(drop=True)  # shuffle
-    else:
-        # shuffle -> get data
-        data = data.sample(frac=1).reset_index(drop=True)  # shuffle
-        data = data.iloc[-num:]  # get data
-
-    return data
+    return get_service().practice_data(num, method, **filters)
 
 
 def get_sound(word: str) -> str | None:
@@ -120,8 +99,4 @@ def get_sound(word: str) -> str | None:
     Returns:
         File path of the mp3 file. Return None if there is no such mp3 file in the database.
     """
-    file = os.path.join(App.get_running_app().working_dir, 'database', 'sounds', f'{word}.mp3')
-    if os.path.isfile(file):
-        return file
-
-    return None
+    return get_service().media_file('sound', word)
@@ -0,0 +1,266 @@
+"""
+`library/logic/distractors.py`
+\nThis module consists of:
+    - `DistractorIndex`
+    - `load_distractor_index`
+    - `get_distractor_index`
+
+It finds look-alike vocabulary from the database as the wrong options of the multiple-choice practice. The vocabulary
+is vectorized by character n-grams (TF-IDF), and a table of the nearest neighbours of each vocabulary is kept, so the
+options are looked up rather than computed when the card is shown.
+"""
+
+import os
+import random
+import zlib
+
+import numpy as np
+from library.logic.keys import split_vocabulary
+
+
+class DistractorIndex:
+    """
+    A nearest neighbour table of the vocabulary by the cosine similarity of their character n-gram TF-IDF vectors. The
+    n-grams are hashed into `dims` buckets. A new vocabulary is compared with the existing ones once when it is added,
+    and it replaces the least similar neighbour of the vocabulary it is closer to.
+    """
+
+    def __init__(self, index_file: str, dims: int = 512, neighbours: int = 8):
+        self.index_file = index_file
+        self.dims = dims
+        self.k = neighbours
+        self.words = []
+        self.word_ids = {}
+        self.counts = np.zeros((0, dims), dtype=np.float32)
+        self.df = np.zeros(dims, dtype=np.float32)
+        self.neighbours = np.zeros((0, neighbours), dtype=np.int32)
+        self.scores = np.zeros((0, neighbours), dtype=np.float32)
+        self.load()
+
+    def load(self) -> None:
+        """Load the table from the index file, the n-gram vectors are computed again from the words."""
+        if not os.path.isfile(self.index_file):
+            return
+
+        try:
+            index = np.load(self.index_file)
+            words = [str(word) for word in index['words']]
+            neighbours, scores = index['neighbours'], index['scores']
+        except Exception as e:
+            print(f"Exception from DistractorIndex.load:\n\t{e}")
+            return
+
+        if neighbours.shape[1] != self.k:
+            return
+        self.words = words
+        self.word_ids = {word: i for i, word in enumerate(words)}
+        self.counts = np.array([self._ngram_counts(word) for word in words], dtype=np.float32).reshape(-1, self.dims)
+        self.df = (self.counts > 0).sum(axis=0).astype(np.float32)
+        self.neighbours, self.scores = neighbours, scores
+
+    def save(self) -> None:
+        """Save the words and the neighbour table."""
+        try:
+            with open(self.index_file + '.tmp', 'wb') as f:
+                np.savez(f, words=np.array(self.words, dtype=str),
+                         neighbours=self.neighbours, scores=self.scores)
+            os.replace(self.index_file + '.tmp', self.index_file)
+        except Exception as e:
+            print(f"Exception from DistractorIndex.save:\n\t{e}")
+
+    def build(self, words: list) -> None:
+        """
+        Build the table of all the vocabulary from scratch.
+
+        Args:
+            words: A list of vocabulary.
+        """
+        self.words = list(dict.fromkeys(word for word in words if word))
+        self.word_ids = {word: i for i, word in enumerate(self.words)}
+        self.counts = np.array([self._ngram_counts(w) for w in self.words], dtype=np.float32).reshape(-1, self.dims)
+        self.df = (self.counts > 0).sum(axis=0).astype(np.float32)
+
+        vectors = self._tfidf(self.counts)
+        size = len(self.words)
+        self.neighbours = np.full((size, self.k), -1, dtype=np.int32)
+        self.scores = np.full((size, self.k), -1.0, dtype=np.float32)
+        for start in range(0, size, 512):
+            sims = vectors[start:start + 512] @ vectors.T
+            rows = np.arange(len(sims))
+            sims[rows, rows + start] = -1.0  # not a neighbour of itself
+            k = min(self.k, size - 1)
+            if k <= 0:
+                continue
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(sims, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            self.neighbours[start:start + 512, :k] = np.take_along_axis(top, order, axis=1)
+            self.scores[start:start + 512, :k] = np.take_along_axis(top_scores, order, axis=1)
+
+        self.save()
+
+    def sync(self, words: list) -> None:
+        """
+        Add the vocabulary not in the table and remove the vocabulary no longer in the database, rebuild the table if
+        most of them are missing.
+
+        Args:
+            words: A list of all the vocabulary.
+        """
+        words = dict.fromkeys(word for word in words if word)
+        missing = [word for word in words if word not in self.word_ids]
+        removed = [word for word in self.words if word not in words]
+        if len(missing) > max(len(self.words), 16):
+            self.build(list(words))
+            return
+
+        for word in removed:
+            self.remove(word, save=False)
+        for word in missing:
+            self.add(word, save=False)
+        if missing or removed:
+            self.save()
+
+    def add(self, word: str, save: bool = True) -> None:
+        """
+        Add a vocabulary to the table, and update the neighbours of the existing vocabulary.
+
+        Args:
+            word: The vocabulary.
+            save: Save the table after adding.
+        """
+        if not word or word in self.word_ids:
+            return
+
+        counts = self._ngram_counts(word)
+        self.df += counts > 0
+        vectors = self._tfidf(self.counts)
+        vector = self._tfidf(counts[np.newaxis, :])[0]
+        sims = vectors @ vector
+
+        # neighbours of the new vocabulary
+        neighbours = np.full(self.k, -1, dtype=np.int32)
+        scores = np.full(self.k, -1.0, dtype=np.float32)
+        top = np.argsort(-sims)[:self.k]
+        neighbours[:len(top)] = top
+        scores[:len(top)] = sims[top]
+
+        # the new vocabulary replaces the least similar neighbour of the vocabulary it is closer to
+        new_id = len(self.words)
+        if len(self.words):
+            weakest = self.scores.argmin(axis=1)
+            rows = np.flatnonzero(sims > self.scores[np.arange(len(self.words)), weakest])
+            self.neighbours[rows, weakest[rows]] = new_id
+            self.scores[rows, weakest[rows]] = sims[rows]
+
+        self.words.append(word)
+        self.word_ids[word] = new_id
+        self.counts = np.vstack([self.counts, counts])
+        self.neighbours = np.vstack([self.neighbours, neighbours])
+        self.scores = np.vstack([self.scores, scores])
+        if save:
+            self.save()
+
+    def remove(self, word: str, save: bool = True) -> None:
+        """
+        Remove a vocabulary from the table, it is no longer a neighbour of the other vocabulary. The empty places are
+        taken by the vocabulary added later.
+
+        Args:
+            word: The vocabulary.
+            save: Save the table after removing.
+        """
+        if word not in self.word_ids:
+            return
+
+        removed = self.word_ids[word]
+        keep = np.arange(len(self.words)) != removed
+        self.df -= self.counts[removed] > 0
+        del self.words[removed]
+        self.word_ids = {word: i for i, word in enumerate(self.words)}
+        self.counts = self.counts[keep]
+        neighbours, self.scores = self.neighbours[keep], self.scores[keep]
+        self.scores[neighbours == removed] = -1.0
+        self.neighbours = np.where(neighbours == removed, -1,
+                                   np.where(neighbours > removed, neighbours - 1, neighbours)).astype(np.int32)
+        if save:
+            self.save()
+
+    def distractors(self, word: str, num: int = 3) -> list:
+        """
+        Get the look-alike vocabulary of the word, random vocabulary are added if there are not enough neighbours.
+
+        Args:
+            word: The vocabulary.
+            num: Number of distractors.
+
+        Returns:
+            A list of vocabulary.
+        """
+        options = []
+        if word in self.word_ids:
+            row = self.neighbours[self.word_ids[word]]
+            order = np.argsort(-self.scores[self.word_ids[word]], kind='stable')
+            options = [self.words[i] for i in row[order] if i >= 0 and self.words[i] != word][:num]
+
+        others = [w for w in random.sample(self.words, min(len(self.words), num * 3)) if w != word]
+        for other in others:
+            if len(options) >= num:
+                break
+            if other not in options:
+                options.append(other)
+
+        return options
+
+    def _ngram_counts(self, word: str) -> np.ndarray:
+        """Count the hashed character 2-grams and 3-grams of the word, with the word boundaries marked."""
+        counts = np.zeros(self.dims, dtype=np.float32)
+        text = f' {word.lower()} '
+        for n in (2, 3):
+            for i in range(len(text) - n + 1):
+                counts[zlib.crc32(text[i:i + n].encode('utf-8')) % self.dims] += 1
+        return counts
+
+    def _tfidf(self, counts: np.ndarray) -> np.ndarray:
+        """Weight the counts by the inverse document frequency and normalize the vectors."""
+        idf = np.log((1 + len(self.words) + 1) / (1 + self.df)) + 1
+        vectors = counts * idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+
+def load_distractor_index(data_dir: str, vocabularies: list) -> DistractorIndex:
+    """
+    Load the distractor index of the database and synchronize it with the vocabulary in the database.
+
+    Args:
+        data_dir: The database directory.
+        vocabularies: The vocabulary in the database, see
+            [`VocabularyService.vocabularies`](/reference/#library.logic.service.VocabularyService.vocabularies).
+
+    Returns:
+        The [`DistractorIndex`](/reference/#library.logic.distractors.DistractorIndex).
+    """
+    index = DistractorIndex(os.path.join(data_dir, 'distractors.npz'))
+    index.sync([split_vocabulary(vocabulary)[0].lower() for vocabulary in vocabularies])
+    return index
+
+
+_distractor_index = None
+
+
+def get_distractor_index() -> DistractorIndex:
+    """
+    Return the distractor index of the running app. It is loaded and synchronized with the vocabulary in the database
+    at the first call.
+
+    Returns:
+        The shared [`DistractorIndex`](/reference/#library.logic.distractors.DistractorIndex).
+    """
+    global _distractor_index
+    if _distractor_index is None:
+        from library.logic.database import get_service
+        service = get_service()
+        _distractor_index = load_distractor_index(service.data_dir, service.vocabularies())
+
+    return _distractor_index
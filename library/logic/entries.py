@@ -0,0 +1,144 @@
+"""
+`library/logic/entries.py`
+\nThis module consists of:
+    - `EntryStore`
+    - `senses`
+
+It keeps the full dictionary entry of each vocabulary, i.e. every region, sense and example found by
+[`CambridgeDictionary`](/reference/#library.logic.online_dictionary.CambridgeDictionary), in a side table next to the
+csv file. The csv file keeps only the definition and the example chosen, so the table and the list views stay small.
+An entry is compact json compressed by zlib, and it is decoded only when a page asks for it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import zlib
+from contextlib import closing
+
+from library.logic.keys import canonical_key
+
+REGIONS = ('uk', 'us', 'business_english')
+
+
+class EntryStore:
+    """
+    A sqlite table `entries (key TEXT PRIMARY KEY, entry BLOB)` of the compressed entries, keyed by the canonical key of
+    the vocabulary. A connection is opened for each operation and each change is a transaction, so the app and the
+    [`server`](/reference/#library.logic.server) may use the same store, and the space of a replaced entry is reused.
+    """
+
+    def __init__(self, file: str):
+        """
+        Args:
+            file: The sqlite file of the store, it is created at the first `put`.
+        """
+        self.file = file
+
+    @staticmethod
+    def encode(entry: dict) -> bytes:
+        """Encode the entry as compact json compressed by zlib."""
+        return zlib.compress(json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 9)
+
+    @staticmethod
+    def decode(data: bytes) -> dict:
+        """Decode the bytes from `encode`."""
+        return json.loads(zlib.decompress(data).decode('utf-8'))
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the store and create the table if it does not exist."""
+        con = sqlite3.connect(self.file, timeout=30)
+        con.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, entry BLOB NOT NULL)')
+        return con
+
+    def put(self, vocabulary: str, entry: dict) -> bool:
+        """
+        Save the entry of the vocabulary, replace the saved one.
+
+        Args:
+            vocabulary: The vocabulary in any form, e.g. 'Run' or 'run (verb)'.
+            entry: A dictionary of the word, the translation and the dictionary result of all regions.
+
+        Returns:
+            True if successful.
+        """
+        try:
+            with closing(self._connect()) as con, con:
+                con.execute('INSERT OR REPLACE INTO entries (key, entry) VALUES (?, ?)',
+                            (canonical_key(vocabulary), self.encode(entry)))
+        except Exception as e:
+            print(f"Exception from EntryStore.put:\n\t{e}")
+            return False
+        return True
+
+    def raw(self, vocabulary: str) -> bytes | None:
+        """Return the compressed entry of the vocabulary without decoding it, None if there is no entry."""
+        if not os.path.isfile(self.file):
+            return None
+        try:
+            with closing(self._connect()) as con:
+                row = con.execute('SELECT entry FROM entries WHERE key = ?', (canonical_key(vocabulary),)).fetchone()
+        except Exception as e:
+            print(f"Exception from EntryStore.raw:\n\t{e}")
+            return None
+        return row[0] if row else None
+
+    def get(self, vocabulary: str) -> dict | None:
+        """
+        Get the entry of the vocabulary.
+
+        Args:
+            vocabulary: The vocabulary in any form, e.g. 'Run' or 'run (verb)'.
+
+        Returns:
+            The entry given to `put`, None if there is no entry.
+        """
+        data = self.raw(vocabulary)
+        return self.decode(data) if data else None
+
+    def delete(self, vocabulary: str) -> None:
+        """Remove the entry of the vocabulary if there is one."""
+        if not os.path.isfile(self.file):
+            return
+        try:
+            with closing(self._connect()) as con, con:
+                con.execute('DELETE FROM entries WHERE key = ?', (canonical_key(vocabulary),))
+        except Exception as e:
+            print(f"Exception from EntryStore.delete:\n\t{e}")
+
+    def __contains__(self, vocabulary: str) -> bool:
+        return self.raw(vocabulary) is not None
+
+
+def senses(entry: dict | None) -> list:
+    """
+    Flatten the dictionary result of an entry to a list of senses, in the order of the regions and the page.
+
+    Args:
+        entry: The entry from [`EntryStore.get`](/reference/#library.logic.entries.EntryStore.get).
+
+    Returns:
+        A list of dictionaries of region, form (the word type), word_function, level, explanation and examples. An
+        empty list if there is no entry.
+    """
+    if not entry:
+        return []
+
+    res = []
+    dictionary = entry.get('dictionary') or {}
+    for region in REGIONS:
+        for block in dictionary.get(region) or []:
+            gen_info = block.get('gen_info') or []
+            form = gen_info[1] if len(gen_info) > 1 else ''
+            for meaning in block.get('meanings') or []:
+                for definition in meaning.get('definitions') or []:
+                    res.append({'region': region,
+                                'form': form,
+                                'word_function': meaning.get('word_function', ''),
+                                'level': definition.get('level', ''),
+                                'explanation': definition.get('explanation', '').strip(),
+                                'examples': [example.strip() for example in definition.get('examples', [])
+                                             if example.strip()]})
+    return res
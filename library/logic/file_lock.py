@@ -0,0 +1,73 @@
+"""
+`library/logic/file_lock.py`
+\nThis module consists of `FileLock` which is an exclusive lock shared by the processes using the database directory,
+e.g. the app and the [`server`](/reference/#library.logic.server).
+"""
+
+from __future__ import annotations
+
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    An exclusive lock of a lock file, held by one process at a time. It is re-entrant in the process, a nested `with`
+    does not lock again. It is not a lock between the threads, use it together with a thread lock. The lock is released
+    by the operating system if the process dies.
+    """
+
+    def __init__(self, file: str):
+        """
+        Args:
+            file: The lock file, it is created if it does not exist and it is never removed.
+        """
+        self.file = file
+        self._fd = None
+        self._depth = 0
+
+    def __enter__(self) -> FileLock:
+        if self._depth == 0:
+            fd = os.open(self.file, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                self._lock(fd)
+            except BaseException:
+                os.close(fd)
+                raise
+            self._fd = fd
+        self._depth += 1
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def _lock(fd: int) -> None:
+        """Wait until the lock of the file is acquired."""
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            return
+
+        while True:
+            try:
+                # LK_LOCK tries for about 10 seconds then raises
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                time.sleep(0.1)
@@ -0,0 +1,83 @@
+"""
+`library/logic/import_check.py`
+\nThis module consists of:
+    - `startup_imports`
+    - `check_imports`
+
+It checks that the heavy libraries are not imported before the first frame of the app. Run
+`python -m library.logic.import_check` from the project directory, it runs `python -X importtime main.py` until the
+first frame is shown and exits with 1 if any of the libraries is on the startup path.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+from library.logic.lazy_import import HEAVY_MODULES
+
+project_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+
+
+def startup_imports(timeout: int = 120) -> list:
+    """
+    Run the app until the first frame is shown, and collect the imports reported by `-X importtime`.
+
+    Args:
+        timeout: Seconds to wait for the app.
+
+    Returns:
+        A list of (module, cumulative microseconds, importing module) in the order they are reported.
+    """
+    env = dict(os.environ, PRACTICE_ENGLISH_STARTUP_CHECK='1', KIVY_NO_ARGS='1')
+    result = subprocess.run([sys.executable, '-X', 'importtime', 'main.py'], cwd=project_dir, env=env,
+                            capture_output=True, text=True, timeout=timeout)
+
+    lines = result.stderr.splitlines()
+    if not any(line.strip().startswith('PracticeEnglish: startup check') for line in lines):
+        raise RuntimeError(f"The app did not show the first frame:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in lines:
+        if line.strip().startswith('PracticeEnglish: startup check'):
+            break
+        match = IMPORT_TIME.match(line)
+        if match:
+            imports.append((match[4], int(match[2]), len(match[3])))
+
+    # a module is reported after the modules it imports, the importer is the next module with less indent. The modules
+    # imported by `importlib.import_module`, e.g. the pages, are not reported, so the importer may be unknown
+    modules = []
+    for i, (name, cumulative, indent) in enumerate(imports):
+        parent = next((n for n, _, d in imports[i + 1:] if d < indent), '')
+        modules.append((name, cumulative, parent))
+
+    return modules
+
+
+def check_imports(modules: list, heavy_modules: tuple = HEAVY_MODULES) -> list:
+    """
+    Find the heavy libraries in the startup imports.
+
+    Args:
+        modules: Result of `startup_imports`.
+        heavy_modules: Names of the libraries which should not be imported at startup.
+
+    Returns:
+        A list of (module, cumulative microseconds, importing module) of the top level imports of the libraries.
+    """
+    return [(name, cumulative, parent) for name, cumulative, parent in modules
+            if name in heavy_modules and parent.split('.')[0] not in heavy_modules]
+
+
+if __name__ == '__main__':
+    found = check_imports(startup_imports())
+    if not found:
+        print(f"OK, none of {', '.join(HEAVY_MODULES)} is imported before the first frame")
+        sys.exit(0)
+
+    for module, us, importer in found:
+        print(f"{module} ({us / 1000:.1f}ms) is imported before the first frame"
+              + (f" by {importer}" if importer else ''))
+    sys.exit(1)
@@ -0,0 +1,317 @@
+"""
+`library/logic/keys.py`
+\nThis module consists of:
+    - `split_vocabulary`
+    - `canonical_key`
+    - `normalize`
+    - `file_stamp`
+    - `KeyIndex`
+
+It gives every vocabulary one canonical key, e.g. 'Run', 'run (verb)' and ' run ' are all 'run', and 'look up' is
+'look_up'. The key is used to find the row of the vocabulary in the database, as the file name of its photo and sound,
+to check the answers and to schedule the reviews. The level and the word type of the rows are indexed as well, to
+select the vocabulary to practice.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import re
+
+from library.logic.lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+
+SEPARATORS = re.compile(r'[\s/\\]+')
+LEVELS = ('A1', 'A2', 'B1', 'B2', 'C1', 'C2')
+INDEXED = ('Level', 'Type')
+
+
+def split_vocabulary(vocabulary: str) -> tuple:
+    """
+    Split the vocabulary into the word and the word type.
+
+    Args:
+        vocabulary: The vocabulary, it may include the word type, e.g. 'run (verb)'.
+
+    Returns:
+        The word, e.g. 'run', and the word type with the brackets, e.g. '(verb)', or an empty string.
+    """
+    vocabulary = str(vocabulary)
+    if '(' not in vocabulary:
+        return vocabulary.strip(), ''
+
+    start = vocabulary.find('(')
+    return vocabulary[:start].strip(), vocabulary[start:vocabulary.find(')', start) + 1]
+
+
+def canonical_key(vocabulary: str) -> str:
+    """
+    Return the canonical key of the vocabulary. The word type is dropped, the word is case folded, and the spaces and
+    slashes are replaced by underscores.
+
+    Args:
+        vocabulary: The vocabulary or an answer, e.g. 'Look Up (phrasal verb)'.
+
+    Returns:
+        The key, e.g. 'look_up'.
+    """
+    word, _ = split_vocabulary(vocabulary)
+    return SEPARATORS.sub('_', word.strip()).casefold()
+
+
+def file_stamp(file: str) -> list | None:
+    """Return the size and the modified time of the file, None if it does not exist."""
+    try:
+        stat = os.stat(file)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _epoch(value) -> float | None:
+    """Convert a datetime, a timestamp or an ISO string to seconds, None if it is empty."""
+    if value is None or value == '' or pd.isna(value):
+        return None
+    return pd.Timestamp(value).timestamp()
+
+
+def normalize(column: str, value) -> str:
+    """
+    Normalize a value of an indexed column, the levels are upper case and the word types are lower case.
+
+    Args:
+        column: 'Level' or 'Type'.
+        value: The value, e.g. 'b2' or ' Verb '.
+    """
+    value = '' if value is None or pd.isna(value) else str(value).strip(' ()')
+    if column == 'Level':
+        value = value.upper()
+        return value if value in LEVELS else ''
+    return ' '.join(value.lower().split())
+
+
+class KeyIndex:
+    """
+    A map of the canonical key to the row number of the vocabulary in the csv file, so checking whether a vocabulary
+    exists is a dictionary lookup. The level and the word type of each row are indexed as sets of rows, and the rows
+    are sorted by the time they are added, so the rows of a filter, e.g. 'B2 verbs added this month', are selected
+    without reading the table.
+
+    The index is saved next to the csv file with the size and the modified time of the csv file it covers, it is rebuilt
+    from the table returned by `loader` if the csv file has been changed by something else. If several rows have the
+    same key, only the last row is indexed and the others are reported, the
+    [`VocabularyService`](/reference/#library.logic.service.VocabularyService) merges such rows before. A row marked
+    'Deleted' is a tombstone kept for the sync, its key is in `deleted` and it is not found or selected.
+    """
+
+    def __init__(self, index_file: str, vocabulary_file: str, loader):
+        """
+        Args:
+            index_file: The file to save the index.
+            vocabulary_file: The csv file.
+            loader: A function returning the DataFrame of the csv file, with the columns in `INDEXED`, 'CreatedAt' and
+                'Deleted'.
+        """
+        self.index_file = index_file
+        self.vocabulary_file = vocabulary_file
+        self.loader = loader
+        self.rows = {}
+        self.deleted = set()  # keys of the tombstones
+        self.size = 0  # number of rows in the csv file
+        self.values = {column: [] for column in INDEXED}  # values of each row
+        self.created = []  # seconds since the epoch of each row, None if unknown
+        self.stamp = None
+        self._postings = {column: {} for column in INDEXED}
+        self._by_created = []
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self.rows) - len(self.deleted)
+
+    def __contains__(self, vocabulary: str) -> bool:
+        return self.get(vocabulary) is not None
+
+    def get(self, vocabulary: str) -> int | None:
+        """
+        Return the row number of the vocabulary, None if it is not in the csv file.
+
+        Args:
+            vocabulary: The vocabulary in any form, e.g. 'Run' or 'run (verb)'.
+        """
+        self.refresh()
+        key = canonical_key(vocabulary)
+        return None if key in self.deleted else self.rows.get(key)
+
+    def slot(self, vocabulary: str) -> int | None:
+        """Return the row number of the vocabulary including a tombstone, None if it has never been in the csv file."""
+        self.refresh()
+        return self.rows.get(canonical_key(vocabulary))
+
+    def select(self, level: str | None = None, word_type: str | None = None, since=None, until=None) -> list:
+        """
+        Select the rows by the level, the word type and the time they are added. A filter which is None is not
+        applied.
+
+        Args:
+            level: The CEFR level, e.g. 'B2'.
+            word_type: The word type, e.g. 'verb'.
+            since: The rows added at or after this datetime.
+            until: The rows added before this datetime.
+
+        Returns:
+            The row numbers in ascending order.
+        """
+        self.refresh()
+        selected = self._live()
+        for column, value in (('Level', level), ('Type', word_type)):
+            if value:
+                selected &= self._postings[column].get(normalize(column, value), set())
+
+        if since is not None or until is not None:
+            low = bisect.bisect_left(self._by_created, (_epoch(since),)) if since is not None else 0
+            high = bisect.bisect_left(self._by_created, (_epoch(until),)) if until is not None else None
+            selected &= {row for _, row in self._by_created[low:high]}
+
+        return sorted(selected)
+
+    def distinct(self, column: str) -> list:
+        """
+        Return the values of an indexed column in the database.
+
+        Args:
+            column: 'Level' or 'Type'.
+        """
+        self.refresh()
+        return sorted(value for value, rows in self._postings[column].items() if value and rows)
+
+    def refresh(self) -> None:
+        """Load the saved index, or build it from the csv file if the csv file has been changed since it was saved."""
+        stamp = file_stamp(self.vocabulary_file)
+        if stamp == self.stamp:
+            return
+
+        if stamp is None:
+            self.rows, self.deleted, self.size, self.stamp = {}, set(), 0, None
+            self.values, self.created = {column: [] for column in INDEXED}, []
+            self._build_lookups()
+            return
+
+        if os.path.isfile(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                if index['stamp'] == stamp:
+                    self.rows, self.size, self.stamp = index['rows'], index['size'], stamp
+                    self.deleted = set(index['deleted'])
+                    self.values, self.created = index['values'], index['created']
+                    self._build_lookups()
+                    return
+            except Exception as e:
+                print(f"Exception from KeyIndex.refresh:\n\t{e}")
+
+        self.build(self.loader())
+
+    def build(self, data: pd.DataFrame) -> None:
+        """
+        Index all the rows of the csv file and save the index.
+
+        Args:
+            data: The table of the csv file.
+        """
+        vocabularies = data['Vocabulary'].astype(str).tolist()
+        deleted = data['Deleted'].tolist() if 'Deleted' in data else [''] * len(vocabularies)
+        self.rows, self.deleted = {}, set()
+        shadowed = []
+        for row, (vocab, dead) in enumerate(zip(vocabularies, deleted)):
+            if not vocab.strip():
+                continue
+            key = canonical_key(vocab)
+            if key in self.rows:
+                shadowed.append(vocabularies[self.rows[key]])
+            self.rows[key] = row
+            if dead:
+                self.deleted.add(key)
+            else:
+                self.deleted.discard(key)
+        self.size = len(vocabularies)
+        self.values = {column: [normalize(column, value) for value in data[column]] for column in INDEXED}
+        # the word type of an old row is in the vocabulary, e.g. 'run (verb)'
+        self.values['Type'] = [value or normalize('Type', split_vocabulary(vocab)[1])
+                               for value, vocab in zip(self.values['Type'], vocabularies)]
+        self.created = [_epoch(value) for value in data['CreatedAt']]
+        self._build_lookups()
+        self.save()
+        if shadowed:
+            print(f"KeyIndex: {len(shadowed)} rows are hidden by a later row of the same vocabulary, "
+                  f"{', '.join(shadowed[:10])}")
+
+    def set(self, row: int, vocabulary: str, level: str, word_type: str, created, deleted: bool = False) -> None:
+        """
+        Index a row written to the csv file, call `save` after the csv file is written.
+
+        Args:
+            row: The row number.
+            vocabulary: The vocabulary.
+            level: The CEFR level.
+            word_type: The word type.
+            created: The time the row is added.
+            deleted: True if the row is a tombstone.
+        """
+        # forget the row replaced, e.g. 'Run' is written to the row of 'run (verb)'
+        if row < self.size:
+            for column in INDEXED:
+                self._postings[column].get(self.values[column][row], set()).discard(row)
+            position = bisect.bisect_left(self._by_created, (self.created[row], row)) \
+                if self.created[row] is not None else len(self._by_created)
+            if position < len(self._by_created) and self._by_created[position] == (self.created[row], row):
+                del self._by_created[position]
+        else:
+            for column in INDEXED:
+                self.values[column] += [''] * (row + 1 - self.size)
+            self.created += [None] * (row + 1 - self.size)
+            self.size = row + 1
+
+        key = canonical_key(vocabulary)
+        self.rows[key] = row
+        if deleted:
+            self.deleted.add(key)
+        else:
+            self.deleted.discard(key)
+        for column, value in (('Level', level), ('Type', word_type)):
+            value = normalize(column, value)
+            self.values[column][row] = value
+            if not deleted:
+                self._postings[column].setdefault(value, set()).add(row)
+        self.created[row] = _epoch(created)
+        if self.created[row] is not None and not deleted:
+            bisect.insort(self._by_created, (self.created[row], row))
+
+    def save(self) -> None:
+        """Save the index with the stamp of the csv file."""
+        self.stamp = file_stamp(self.vocabulary_file)
+        index = {'stamp': self.stamp, 'size': self.size, 'rows': self.rows, 'deleted': sorted(self.deleted),
+                 'values': self.values, 'created': self.created}
+        try:
+            with open(self.index_file + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+            os.replace(self.index_file + '.tmp', self.index_file)
+        except Exception as e:
+            print(f"Exception from KeyIndex.save:\n\t{e}")
+
+    def _build_lookups(self) -> None:
+        """Build the sets of rows of each value and the rows sorted by the time they are added, of the indexed rows."""
+        live = self._live()
+        self._postings = {column: {} for column in INDEXED}
+        for column in INDEXED:
+            for row, value in enumerate(self.values[column]):
+                if row in live:
+                    self._postings[column].setdefault(value, set()).add(row)
+        self._by_created = sorted((created, row) for row, created in enumerate(self.created)
+                                  if created is not None and row in live)
+
+    def _live(self) -> set:
+        """Return the rows indexed which are not tombstones."""
+        return {row for key, row in self.rows.items() if key not in self.deleted}
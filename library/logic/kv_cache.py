@@ -0,0 +1,177 @@
+"""
+`library/logic/kv_cache.py`
+\nThis module consists of:
+    - `KvCache`
+    - `load_kv`
+    - `kv_saved_time`
+
+It keeps the parsed and compiled rules of the kv files in a cache directory, so a kv file is only parsed again when it
+has been changed. Run `python -m library.logic.kv_cache` to build the cache of all the kv files in advance.
+"""
+
+import copyreg
+import hashlib
+import io
+import marshal
+import os
+import pickle
+import sys
+import time
+import types
+from functools import partial
+
+import kivy
+from kivy.factory import Factory
+from kivy.lang import Builder
+from kivy.lang.parser import Parser
+from kivy.logger import Logger
+from library.logic import trace
+
+
+def _reduce_code(code: types.CodeType):
+    """Pickle the compiled kv expressions by marshal."""
+    return marshal.loads, (marshal.dumps(code),)
+
+
+class _RulePickler(pickle.Pickler):
+    dispatch_table = copyreg.dispatch_table.copy()
+    dispatch_table[types.CodeType] = _reduce_code
+
+
+class KvCache:
+    """
+    A directory of pickled [`Parser`](https://kivy.org/doc/stable/api-kivy.lang.parser.html) of kv files. A cache file
+    is named by the hash of the kv file, the kivy version and the python version, so a changed kv file or a different
+    environment misses the cache and the kv file is parsed as usual.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.saved_time = 0.0
+
+    def load_file(self, filename: str, encoding: str = 'utf8') -> None:
+        """
+        Load the rules of a kv file into the `Builder`, from the cache if the kv file is not changed.
+
+        Args:
+            filename: Path of the kv file.
+            encoding: Encoding of the kv file.
+        """
+        with open(filename, 'r', encoding=encoding) as f:
+            content = f.read()
+        cache_file = self.cache_file(filename, content)
+
+        start = time.perf_counter()
+        parse_time, parser = self._read(cache_file)
+        if parser is None:
+            parser = Parser(content=content, filename=filename)
+            parse_time = time.perf_counter() - start
+            self._write(cache_file, parser, parse_time)
+            Logger.debug(f"KvCache: parsed {os.path.basename(filename)} in {parse_time * 1000:.1f}ms")
+        else:
+            parser.execute_directives()
+            load_time = time.perf_counter() - start
+            self.saved_time += max(parse_time - load_time, 0)
+            Logger.debug(f"KvCache: loaded {os.path.basename(filename)} in {load_time * 1000:.1f}ms")
+
+        self._merge(parser, filename)
+
+    def cache_file(self, filename: str, content: str) -> str:
+        """
+        Return the path of the cache file of the kv file.
+
+        Args:
+            filename: Path of the kv file.
+            content: Content of the kv file.
+        """
+        key = hashlib.sha1(f'{filename}\0{kivy.__version__}\0{sys.implementation.cache_tag}\0{content}'
+                           .encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{os.path.basename(filename)}.{key[:16]}.pickle')
+
+    def _read(self, cache_file: str) -> tuple:
+        """Return the seconds it took to parse the kv file and the unpickled parser, None if it cannot be read."""
+        if not os.path.isfile(cache_file):
+            return 0.0, None
+
+        try:
+            with open(cache_file, 'rb') as f:
+                parse_time = float(f.readline())
+                return parse_time, pickle.load(f)
+        except Exception as e:
+            print(f"Exception from KvCache._read:\n\t{e}")
+            return 0.0, None
+
+    def _write(self, cache_file: str, parser: Parser, parse_time: float) -> None:
+        """Pickle the parser, the stale cache files of the same kv file are removed."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            buffer = io.BytesIO()
+            _RulePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(parser)
+
+            prefix = os.path.basename(cache_file).rsplit('.', 2)[0] + '.'
+            for file in os.listdir(self.cache_dir):
+                if file.startswith(prefix) and file.endswith('.pickle'):
+                    os.remove(os.path.join(self.cache_dir, file))
+
+            with open(cache_file + '.tmp', 'wb') as f:
+                f.write(f'{parse_time:.6f}\n'.encode('ascii'))
+                f.write(buffer.getvalue())
+            os.replace(cache_file + '.tmp', cache_file)
+        except Exception as e:
+            print(f"Exception from KvCache._write:\n\t{e}")
+
+    @staticmethod
+    def _merge(parser: Parser, filename: str) -> None:
+        """Add the rules, templates and dynamic classes of the parser to the `Builder` as `Builder.load_string` does."""
+        if filename in Builder.files:
+            Logger.warning(f'Lang: The file {filename} is loaded multiples times, you might have unwanted behaviors.')
+
+        Builder.rules.extend(parser.rules)
+        Builder._clear_matchcache()
+
+        for name, cls, template in parser.templates:
+            Builder.templates[name] = (cls, template, filename)
+            Factory.register(name, cls=partial(Builder.template, name), is_template=True, warn=True)
+
+        for name, baseclasses in parser.dynamic_classes.items():
+            Factory.register(name, baseclasses=baseclasses, filename=filename, warn=True)
+
+        if parser.templates or parser.dynamic_classes or parser.rules:
+            Builder.files.append(filename)
+
+
+_kv_cache = None
+
+
+def load_kv(filename: str) -> None:
+    """
+    Load a kv file through the shared [`KvCache`](/reference/#library.logic.kv_cache.KvCache). Set the environment
+    variable PRACTICE_ENGLISH_NO_KV_CACHE=1 to parse the kv files as usual.
+
+    Args:
+        filename: Path of the kv file.
+    """
+    global _kv_cache
+    with trace.span(f'kv {os.path.basename(filename)}', 'kv'):
+        if os.environ.get('PRACTICE_ENGLISH_NO_KV_CACHE'):
+            Builder.load_file(filename)
+            return
+
+        if _kv_cache is None:
+            _kv_cache = KvCache(os.path.join(os.path.dirname(os.path.abspath(filename)), '__kvcache__'))
+        _kv_cache.load_file(os.path.abspath(filename))
+
+
+def kv_saved_time() -> float:
+    """Return the seconds of kv parsing saved by the cache since the app started."""
+    return _kv_cache.saved_time if _kv_cache is not None else 0.0
+
+
+if __name__ == '__main__':
+    kv_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'front_ends', 'kv_files')
+    kv_dir = os.path.normpath(kv_dir)
+    cache = KvCache(os.path.join(kv_dir, '__kvcache__'))
+    for kv in sorted(os.listdir(kv_dir)):
+        if kv.endswith('.kv'):
+            cache.load_file(os.path.join(kv_dir, kv))
+            print(f"cached {kv}")
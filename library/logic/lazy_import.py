@@ -0,0 +1,62 @@
+"""
+`library/logic/lazy_import.py`
+\nThis module consists of:
+    - `lazy_import`
+    - `preimport`
+
+It keeps the heavy libraries (pandas, numpy, BeautifulSoup and requests) off the startup of the app. A module imported
+by `lazy_import` is only imported when one of its attributes is used, and `preimport` imports them in a background
+thread after the first frame is shown, so they are usually ready before a page needs them.
+"""
+
+import importlib
+import sys
+import threading as th
+import types
+
+HEAVY_MODULES = ('numpy', 'pandas', 'requests', 'bs4')
+
+
+class LazyModule(types.ModuleType):
+    """A placeholder of a module, the module is imported at the first access of its attributes."""
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Return the module if it has been imported, otherwise a placeholder which imports it when it is used.
+
+    Args:
+        name: Name of the module, e.g. 'pandas'.
+
+    Returns:
+        The module or a [`LazyModule`](/reference/#library.logic.lazy_import.LazyModule).
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def preimport(names: tuple = HEAVY_MODULES) -> th.Thread:
+    """
+    Import the modules in a background thread.
+
+    Args:
+        names: Names of the modules.
+
+    Returns:
+        The started thread.
+    """
+    def run():
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"Exception from preimport:\n\t{e}")
+
+    thread = th.Thread(target=run, name='preimport', daemon=True)
+    thread.start()
+    return thread
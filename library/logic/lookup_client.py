@@ -0,0 +1,198 @@
+"""
+`library/logic/lookup_client.py`
+\nThis module consists of:
+    - `socket_path`
+    - `trusted_uids`
+    - `trusted_socket`
+    - `SoundResponse`
+    - `LookupClient`
+    - `get_lookup_client`
+
+It asks the [`lookup daemon`](/reference/#library.logic.lookup_daemon) to look up the dictionary and search the photos,
+so the app instances on one machine share the results. If the daemon is not running, the caller looks up the web by
+itself, so the daemon is optional.
+
+The daemon's answers are saved into the database of every instance, so the socket must not be one any user could have
+created. There is no default socket: the administrator sets PRACTICE_ENGLISH_LOOKUP_SOCKET to a socket in a directory
+the students cannot write to, e.g. `/run/practice-english/lookup.sock`, and the client checks the owners before using
+it (see [`trusted_socket`](/reference/#library.logic.lookup_client.trusted_socket)).
+"""
+
+import base64
+import json
+import os
+import socket
+import stat
+import struct
+import time
+
+
+def socket_path() -> str:
+    """Return the path of the daemon's socket from PRACTICE_ENGLISH_LOOKUP_SOCKET, 'off' if it is not set."""
+    return os.environ.get('PRACTICE_ENGLISH_LOOKUP_SOCKET') or 'off'
+
+
+def trusted_uids(path: str) -> set | None:
+    """
+    Return the users allowed to own the socket: root, the owner of its directory and the current user.
+
+    Args:
+        path: The path of the socket.
+
+    Returns:
+        The user ids, None if the directory is writable by the group or the other users.
+    """
+    directory = os.stat(os.path.dirname(os.path.abspath(path)))
+    if directory.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        return None
+    return {0, directory.st_uid, os.getuid()}
+
+
+def trusted_socket(path: str) -> bool:
+    """
+    Check if the socket was created by a trusted user: its directory is not writable by the group or the other users,
+    and the socket is owned by root, the owner of the directory or the current user. A socket in a shared temporary
+    directory is never trusted.
+
+    Args:
+        path: The path of the socket.
+    """
+    try:
+        uids = trusted_uids(path)
+        return uids is not None and stat.S_ISSOCK(os.stat(path).st_mode) and os.stat(path).st_uid in uids
+    except OSError:
+        return False
+
+
+class SoundResponse:
+    """The pronunciation from the daemon, it has the `url` and `content` of the requests' response it replaces."""
+
+    def __init__(self, url: str, content: bytes):
+        self.url = url
+        self.content = content
+
+    def __bool__(self) -> bool:
+        return bool(self.content)
+
+
+class LookupClient:
+    """
+    A client of the lookup daemon. A request opens a connection, sends a json line and reads the json answer. After the
+    daemon fails to answer, it is not asked again for `retry_after` seconds.
+    """
+
+    def __init__(self, path: str, timeout: float = 20, retry_after: float = 30):
+        self.path = path
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self._warned = False
+
+    @property
+    def available(self) -> bool:
+        """
+        False if the platform has no Unix domain socket, the client is turned off, the daemon is down or the socket is
+        not trusted.
+        """
+        if not hasattr(socket, 'AF_UNIX') or self.path == 'off' or time.monotonic() < self._down_until \
+                or not os.path.exists(self.path):
+            return False
+        if not trusted_socket(self.path):
+            if not self._warned:
+                print(f"LookupClient: {self.path} is not owned by a trusted user or its directory is writable by "
+                      f"other users, the daemon is not used")
+                self._warned = True
+            return False
+        return True
+
+    def request(self, op: str, key: str):
+        """
+        Send a request to the daemon.
+
+        Args:
+            op: 'dictionary', 'photos' or 'stats'.
+            key: The word or the url.
+
+        Returns:
+            The result from the daemon, None if the daemon is not available or fails.
+        """
+        if not self.available:
+            return None
+
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.path)
+                self._check_peer(sock)
+                sock.sendall(json.dumps({'op': op, 'key': key}).encode('utf-8') + b'\n')
+                with sock.makefile('rb') as f:
+                    answer = json.loads(f.readline())
+        except Exception as e:
+            print(f"Exception from LookupClient.request:\n\t{e}")
+            self._down_until = time.monotonic() + self.retry_after
+            return None
+
+        if not answer.get('ok'):
+            print(f"LookupClient: {op} {key} failed, {answer.get('error')}")
+            return None
+
+        return answer['result']
+
+    def _check_peer(self, sock: socket.socket) -> None:
+        """Raise an error if the process listening on the socket is not run by a trusted user (Linux only)."""
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return
+        _, uid, _ = struct.unpack('3i', sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')))
+        if uid not in (trusted_uids(self.path) or set()):
+            raise PermissionError(f"the daemon on {self.path} is run by an untrusted user {uid}")
+
+    def dictionary(self, word: str) -> tuple | None:
+        """
+        Look up the word through the daemon.
+
+        Args:
+            word: The text to be searched.
+
+        Returns:
+            The same as
+                [`CambridgeDictionary.check`](/reference/#library.logic.online_dictionary.CambridgeDictionary.check),
+                the pronunciation is a [`SoundResponse`](/reference/#library.logic.lookup_client.SoundResponse). None
+                if the daemon is not available.
+        """
+        result = self.request('dictionary', word)
+        if result is None:
+            return None
+
+        sound = ''
+        if result['sound']:
+            sound = SoundResponse(result['sound_url'], base64.b64decode(result['sound']))
+        return result['res'], result['translation'], sound
+
+    def photos(self, url: str) -> list | None:
+        """
+        Search the photos through the daemon.
+
+        Args:
+            url: A url of a searched word in iStockPhoto.
+
+        Returns:
+            A list of links of the photos, None if the daemon is not available.
+        """
+        return self.request('photos', url)
+
+
+_lookup_client = None
+
+
+def get_lookup_client() -> LookupClient:
+    """
+    Return the client of the lookup daemon.
+
+    Returns:
+        The shared [`LookupClient`](/reference/#library.logic.lookup_client.LookupClient).
+    """
+    global _lookup_client
+    if _lookup_client is None:
+        _lookup_client = LookupClient(socket_path())
+
+    return _lookup_client
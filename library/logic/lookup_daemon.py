@@ -0,0 +1,215 @@
+"""
+`library/logic/lookup_daemon.py`
+\nThis module consists of:
+    - `LookupCache`
+    - `LookupDaemon`
+    - `main`
+
+It is an optional daemon shared by the app instances on one machine, e.g. one instance per student on a lab machine. It
+looks up the Cambridge Dictionary and searches iStockPhoto for the instances, through a Unix domain socket. Identical
+requests in flight are sent upstream once (single-flight), and the results are kept in one cache, so the same course
+word looked up by N students is fetched once. Run
+`python -m library.logic.lookup_daemon --socket /run/practice-english/lookup.sock` from the project directory, the
+directory of the socket must not be writable by the students, and set PRACTICE_ENGLISH_LOOKUP_SOCKET to the same path
+for the app.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import signal
+import socket
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')  # kivy must not parse the arguments of the daemon
+
+from library.logic.lookup_client import trusted_uids, socket_path  # noqa: E402
+from library.logic.metrics import get_metrics  # noqa: E402
+from library.logic.online_dictionary import CambridgeDictionary  # noqa: E402
+from library.logic.search_photos import IStockPhoto  # noqa: E402
+
+DAY = 24 * 60 * 60
+
+
+class LookupCache:
+    """A least recently used cache of the results, a result expires `ttl` seconds after it is fetched."""
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 7 * DAY):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # {key: (fetched time, result)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple):
+        """Return the result, None if it is not cached or has expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > self.ttl:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: tuple, result) -> None:
+        """Cache the result, drop the least recently used results over `max_entries`."""
+        self._entries[key] = (time.time(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class LookupDaemon:
+    """
+    Answer the lookups of the app instances. The upstream requests run in a pool of `workers` threads, a request for a
+    key being fetched waits for the same fetch instead of starting another one.
+    """
+
+    def __init__(self, path: str, cache: LookupCache, workers: int = 4, mode: int = 0o666):
+        self.path = path
+        self.cache = cache
+        self.mode = mode
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lookup')
+        self.fetchers = {'dictionary': self.fetch_dictionary, 'photos': self.fetch_photos}
+        self._in_flight = {}  # {key: future}
+
+    async def serve(self) -> None:
+        """Listen on the socket until SIGINT or SIGTERM, the socket is removed on exit."""
+        self._remove_stale_socket()
+        server = await asyncio.start_unix_server(self.handle, self.path)
+        os.chmod(self.path, self.mode)  # the app instances may run by other users
+        print(f"Lookup daemon listening on {self.path}")
+
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            self.executor.shutdown(wait=False)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer a json line request with a json line."""
+        try:
+            request = json.loads(await reader.readline())
+            op, key = request['op'], str(request['key'])
+            if op == 'stats':
+                answer = {'ok': True, 'result': dict(get_metrics().snapshot(), cached=len(self.cache))}
+            elif op not in self.fetchers:
+                answer = {'ok': False, 'error': f'unknown op {op}'}
+            else:
+                result = await self.resolve(op, key)
+                answer = {'ok': result is not None, 'result': result, 'error': 'failed to fetch'}
+        except Exception as e:
+            answer = {'ok': False, 'error': str(e)}
+
+        try:
+            writer.write(json.dumps(answer, ensure_ascii=False).encode('utf-8') + b'\n')
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def resolve(self, op: str, key: str):
+        """
+        Get the result from the cache, from the fetch in flight, or fetch it.
+
+        Args:
+            op: 'dictionary' or 'photos'.
+            key: The word or the url.
+
+        Returns:
+            The result, None if the fetch raises an error. An empty result, e.g. the word is not found, is not cached.
+        """
+        key = (op, key.strip().lower() if op == 'dictionary' else key)
+        result = self.cache.get(key)
+        if result is not None:
+            get_metrics().count('lookup.cache_hit')
+            return result
+
+        if key in self._in_flight:
+            get_metrics().count('lookup.coalesced')
+            return await asyncio.shield(self._in_flight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            get_metrics().count('lookup.fetch')
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, self.fetchers[op], key[1])
+        except Exception as e:
+            print(f"Exception from LookupDaemon.resolve:\n\t{op} {key[1]}\n\t{e}")
+            result = None
+        finally:
+            del self._in_flight[key]
+
+        # the result of a word not found has the regions without any entry
+        if result and (op != 'dictionary' or any((result['res'] or {}).values())):
+            self.cache.put(key, result)
+        future.set_result(result)
+        return result
+
+    @staticmethod
+    def fetch_dictionary(word: str) -> dict:
+        """Look up the word from the web."""
+        res, translation, sound = CambridgeDictionary().fetch(word)
+        return {'res': res, 'translation': translation,
+                'sound_url': sound.url if sound else '',
+                'sound': base64.b64encode(sound.content).decode('ascii') if sound else ''}
+
+    @staticmethod
+    def fetch_photos(url: str) -> list:
+        """Search the photos from the web. Only iStockPhoto's search urls are fetched."""
+        if not url.startswith(IStockPhoto.search_url):
+            raise ValueError(f'not a search url of iStockPhoto: {url}')
+
+        return IStockPhoto().fetch_photos(url)
+
+    def _remove_stale_socket(self) -> None:
+        """Remove the socket left by a daemon which is not running, raise an error if the daemon is running."""
+        if not os.path.exists(self.path):
+            return
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(self.path)
+            except OSError:
+                os.remove(self.path)
+                return
+        raise RuntimeError(f"another lookup daemon is listening on {self.path}")
+
+
+def main() -> None:
+    """Parse the arguments and run the daemon."""
+    parser = argparse.ArgumentParser(description='Share the dictionary lookups and photo searches of the app '
+                                                 'instances.')
+    parser.add_argument('--socket', default=socket_path(),
+                        help='path of the Unix domain socket, default PRACTICE_ENGLISH_LOOKUP_SOCKET')
+    parser.add_argument('--workers', type=int, default=4, help='number of upstream requests at the same time')
+    parser.add_argument('--max-entries', type=int, default=4096, help='number of cached results')
+    parser.add_argument('--ttl', type=float, default=7 * DAY, help='seconds a result is cached')
+    parser.add_argument('--mode', type=lambda mode: int(mode, 8), default=0o666, help='permission of the socket')
+    args = parser.parse_args()
+    if args.socket == 'off':
+        parser.error('--socket or PRACTICE_ENGLISH_LOOKUP_SOCKET is required')
+    if not os.path.isdir(os.path.dirname(os.path.abspath(args.socket))):
+        parser.error(f"the directory of {args.socket} does not exist")
+    if trusted_uids(args.socket) is None:
+        parser.error(f"the directory of {args.socket} is writable by other users, who could replace the socket")
+
+    daemon = LookupDaemon(args.socket, LookupCache(args.max_entries, args.ttl), args.workers, args.mode)
+    asyncio.run(daemon.serve())
+
+
+if __name__ == '__main__':
+    main()
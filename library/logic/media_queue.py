@@ -0,0 +1,181 @@
+"""
+`library/logic/media_queue.py`
+\nThis module consists of:
+    - `MediaQueue`
+    - `get_media_queue`
+
+It downloads photo and sound files of the vocabulary in the background. Pending downloads are saved to the database
+directory, so they are resumed after the app restarts.
+"""
+
+import json
+import os
+import queue
+import threading as th
+
+from kivy.app import App
+from kivy.clock import Clock
+from library.logic.lazy_import import lazy_import
+
+requests = lazy_import('requests')
+
+
+class MediaQueue:
+    """
+    A persistent queue of media downloads processed by worker threads. A failed download is retried with a growing
+    delay, the result is reported back to the main thread through the `on_done` callback of the job.
+    """
+
+    def __init__(self, queue_file: str, workers: int = 2, max_retries: int = 3, timeout: int = 10):
+        self.queue_file = queue_file
+        self.workers = workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.header = {'User-Agent': 'Jason'}  # merged with the default headers of requests
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._callbacks = {}
+        self._lock = th.Lock()
+        self._threads = []
+
+    def start(self) -> None:
+        """Start the worker threads and resume the downloads left from the last session."""
+        if self._threads:
+            return
+
+        if os.path.isfile(self.queue_file):
+            try:
+                with open(self.queue_file, 'r', encoding='utf-8') as f:
+                    jobs = json.load(f)
+            except Exception as e:
+                print(f"Exception from MediaQueue.start:\n\t{e}")
+                jobs = []
+
+            for job in jobs:
+                job['attempts'] = 0
+                self._jobs[job['dst']] = job
+                self._queue.put(job)
+
+        for _ in range(self.workers):
+            worker = th.Thread(target=self._work, daemon=True)
+            worker.start()
+            self._threads.append(worker)
+
+    def enqueue(self, url: str, dst: str, kind: str = 'photo', on_done=None) -> None:
+        """
+        Queue a download. A pending download to the same file is replaced.
+
+        Args:
+            url: The source link of the media file.
+            dst: The file path to save the media file.
+            kind: 'photo' or 'sound'.
+            on_done: A callback called in the main thread with the job and the result (True/ False) once the download
+                     succeeds or finally fails.
+        """
+        job = {'url': url, 'dst': dst, 'kind': kind, 'attempts': 0}
+        with self._lock:
+            self._jobs[dst] = job
+            if on_done:
+                self._callbacks[dst] = on_done
+            else:
+                self._callbacks.pop(dst, None)
+            self._save()
+        self._queue.put(job)
+        self.start()
+
+    def pending(self) -> list:
+        """Return a list of the pending jobs."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _work(self) -> None:
+        """Worker thread. Download the queued media files."""
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if self._jobs.get(job['dst']) is not job:  # replaced by a newer job
+                    continue
+
+            if self._download(job):
+                self._finish(job, True)
+                continue
+
+            job['attempts'] += 1
+            if job['attempts'] >= self.max_retries:
+                self._finish(job, False)
+            else:
+                with self._lock:
+                    self._save()
+                retry = th.Timer(2 ** job['attempts'], self._queue.put, (job,))
+                retry.daemon = True
+                retry.start()
+
+    def _download(self, job: dict) -> bool:
+        """
+        Download the media file to a temporary file and move it to the destination.
+
+        Args:
+            job: The download job.
+
+        Returns:
+            True if the download succeeds.
+        """
+        part = job['dst'] + '.part'
+        try:
+            res = requests.get(job['url'], headers=self.header, timeout=self.timeout)
+            res.raise_for_status()
+            with open(part, 'wb') as f:
+                f.write(res.content)
+            os.replace(part, job['dst'])
+        except Exception as e:
+            print(f"Exception from MediaQueue._download:\n\t{job['url']}\n\t{e}")
+            return False
+
+        return True
+
+    def _finish(self, job: dict, result: bool) -> None:
+        """
+        Remove the job from the queue and report the result to the main thread.
+
+        Args:
+            job: The download job.
+            result: True if the download succeeds.
+        """
+        with self._lock:
+            if self._jobs.get(job['dst']) is not job:
+                return
+            del self._jobs[job['dst']]
+            callback = self._callbacks.pop(job['dst'], None)
+            self._save()
+
+        if not result:
+            print(f"MediaQueue: failed to download {job['url']}")
+        if callback:
+            Clock.schedule_once(lambda t: callback(job, result), 0)
+
+    def _save(self) -> None:
+        """Save the pending jobs to the queue file. The caller holds the lock."""
+        try:
+            with open(self.queue_file + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(list(self._jobs.values()), f)
+            os.replace(self.queue_file + '.tmp', self.queue_file)
+        except Exception as e:
+            print(f"Exception from MediaQueue._save:\n\t{e}")
+
+
+_media_queue = None
+
+
+def get_media_queue() -> MediaQueue:
+    """
+    Return the media queue of the running app, it is created at the first call.
+
+    Returns:
+        The shared [`MediaQueue`](/reference/#library.logic.media_queue.MediaQueue).
+    """
+    global _media_queue
+    if _media_queue is None:
+        queue_file = os.path.join(App.get_running_app().working_dir, 'database', 'media_queue.json')
+        _media_queue = MediaQueue(queue_file)
+
+    return _media_queue
@@ -0,0 +1,178 @@
+"""
+`library/logic/metrics.py`
+\nThis module consists of:
+    - `Histogram`
+    - `MetricsRegistry`
+    - `get_metrics`
+
+It collects counters, gauges and latency histograms of the operations that matter to the user, e.g. looking up the
+dictionary or loading the database. The metrics are shown in the debug overlay (press F12) and saved to
+`database/metrics.json` when the app exits.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading as th
+import time
+from collections import deque
+
+
+class Histogram:
+    """
+    Latencies of an operation. The count, total and maximum cover all the observations, the percentiles are computed
+    from the latest `size` observations.
+    """
+
+    def __init__(self, size: int = 1024):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Add an observation.
+
+        Args:
+            value: Seconds taken by the operation.
+        """
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """
+        Return the q-th percentile of the latest observations, 0 if there is no observation.
+
+        Args:
+            q: Percentile between 0 and 100.
+        """
+        if not self.samples:
+            return 0.0
+        samples = sorted(self.samples)
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+    def summary(self) -> dict:
+        """Return the count, mean, p50, p95 and maximum in milliseconds."""
+        return {'count': self.count,
+                'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+                'p50_ms': self.percentile(50) * 1000,
+                'p95_ms': self.percentile(95) * 1000,
+                'max_ms': self.max * 1000}
+
+
+class MetricsRegistry:
+    """A thread-safe registry of counters, gauges and [`Histogram`](/reference/#library.logic.metrics.Histogram)."""
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.started = time.time()
+        self._lock = th.Lock()
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            name: Name of the counter, e.g. 'sound.cache_hit'.
+            value: Amount to increase.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float) -> None:
+        """
+        Set a gauge to the current value.
+
+        Args:
+            name: Name of the gauge, e.g. 'sound.loaded'.
+            value: The current value.
+        """
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Add a latency to a histogram.
+
+        Args:
+            name: Name of the operation, e.g. 'dictionary.fetch'.
+            seconds: Seconds taken by the operation.
+        """
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name: str):
+        """
+        Observe the time of the `with` block, an exception raised in the block is counted as '<name>.error'.
+
+        Args:
+            name: Name of the operation.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.count(f'{name}.error')
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name: str):
+        """
+        Return a decorator which observes the time of each call of the function.
+
+        Args:
+            name: Name of the operation.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> dict:
+        """Return all the metrics as a dictionary, the histograms are summarized."""
+        with self._lock:
+            return {'started': self.started,
+                    'uptime_s': time.time() - self.started,
+                    'counters': dict(self.counters),
+                    'gauges': dict(self.gauges),
+                    'histograms': {name: h.summary() for name, h in sorted(self.histograms.items())}}
+
+    def dump(self, file: str) -> None:
+        """
+        Save the snapshot as a json file.
+
+        Args:
+            file: The file path.
+        """
+        try:
+            with open(file + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(file + '.tmp', file)
+        except Exception as e:
+            print(f"Exception from MetricsRegistry.dump:\n\t{e}")
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Return the metrics registry of the app, it can be used from any thread.
+
+    Returns:
+        The shared [`MetricsRegistry`](/reference/#library.logic.metrics.MetricsRegistry).
+    """
+    return _metrics
@@ -3,11 +3,15 @@
 This module consists of `CambridgeDictionary` which crawl data from [`Cambridge Online Dictionary`](https://dictionary.cambridge.org/)
 """
 
+from __future__ import annotations
+
 import re
-import requests
-import requests.utils
-from bs4 import BeautifulSoup as bs
-from bs4.element import Tag
+from library.logic.lazy_import import lazy_import
+from library.logic.lookup_client import get_lookup_client
+from library.logic.metrics import get_metrics
+
+bs4 = lazy_import('bs4')
+requests = lazy_import('requests')
 
 
 class CambridgeDictionary:
@@ -19,10 +23,12 @@ class CambridgeDictionary:
         self.translation = ''
         self.sound_link_respone = ''
 
+    @get_metrics().timed('dictionary.check')
     def check(self, word: str) -> (dict, str, str | requests.models.Response):
         """
         Callback method from [`check_dictionary`](/reference/#front_ends.add_vocab.AddVocab.check_dictionary).
-        Check dictionary from Cambridge and return cleaned data.
+        Check dictionary from Cambridge and return cleaned data. The result is shared by the
+        [`lookup daemon`](/reference/#library.logic.lookup_daemon) if it is running.
 
         Args:
             word: Text from `ti_search` in [`AddVocab`](/reference/#front_ends.add_vocab.AddVocab).
@@ -31,6 +37,23 @@ class CambridgeDictionary:
             Dictionary contains information of the text; A chinese translation of the text; An empty string or requests'
                 response contains bytes code of .mp3 file.
         """
+        shared = get_lookup_client().dictionary(word)
+        if shared is not None:
+            self.res, self.translation, self.sound_link_respone = shared
+            return shared
+
+        return self.fetch(word)
+
+    def fetch(self, word: str) -> (dict, str, str | requests.models.Response):
+        """
+        Check dictionary from Cambridge without the lookup daemon, the daemon itself looks up the words by this method.
+
+        Args:
+            word: The text to be searched.
+
+        Returns:
+            The same as `self.check`.
+        """
         self._check_dictionary_from_web(word)
 
         return self.res, self.translation, self.sound_link_respone
@@ -48,7 +71,8 @@ class CambridgeDictionary:
         html = self._request_content(word)
         self.sound_link_respone = ''
         if html:
-            soup = bs(html, 'html.parser')
+            with get_metrics().timer('dictionary.parse'):
+                soup = bs4.BeautifulSoup(html, 'html.parser')
             main_page = soup.find('article', {'id': 'page-content'})
             if main_page:
                 page = main_page.find('div', {'class': 'page'})
@@ -64,7 +88,8 @@ class CambridgeDictionary:
                     if speaker:
                         audio = speaker.findChild('source', {'type': 'audio/mpeg'})
                         link = 'https://dictionary.cambridge.org' + audio['src']
-                        self.sound_link_respone = requests.get(link, headers=self.header)
+                        with get_metrics().timer('dictionary.sound_fetch'):
+                            self.sound_link_respone = requests.get(link, headers=self.header)
 
                 # find translation
                 self.translation = ''
@@ -87,6 +112,7 @@ class CambridgeDictionary:
             self.res = {}
             return
 
+    @get_metrics().timed('dictionary.fetch')
     def _request_content(self, words: str) -> bytes | None:
         """Callback method from `self._check_dictionary_from_web`
 
@@ -108,7 +134,7 @@ class CambridgeDictionary:
 
         return res.content
 
-    def _crawling(self, page: Tag) -> dict:
+    def _crawling(self, page: bs4.element.Tag) -> dict:
         """Callback from `self._check_dictionary_from_web`. Data cleaning.
 
         Args:
@@ -149,7 +175,7 @@ class CambridgeDictionary:
             print("dictionary regions not found")
             return dictionary
 
-    def _gather_info(self, region: Tag) -> list:
+    def _gather_info(self, region: bs4.element.Tag) -> list:
         """Callback method from `self._crawling`. To gather information into the following format.\n
         res = [entry_blocks, ...]\n
         entry_blocks = {  # ('div', 'class': '*entry-body__el')
@@ -205,7 +231,7 @@ class CambridgeDictionary:
 
         return res
 
-    def _get_general_info(self, page: Tag) -> list:
+    def _get_general_info(self, page: bs4.element.Tag) -> list:
         """Callback method from `_gather_info`. It gets general information (word form, word level, etc.)
         according to the specific Tag from the page content.
 
@@ -230,7 +256,7 @@ class CambridgeDictionary:
 
         return res
 
-    def _get_word_function(self, page: Tag) -> str:
+    def _get_word_function(self, page: bs4.element.Tag) -> str:
         """Callback method from `_gather_info`. It gets functions of the word(e.g. get: verb (obtain/ reach/ become...).
 
         Args:
@@ -245,7 +271,7 @@ class CambridgeDictionary:
 
         return ''
 
-    def _get_word_levl(self, page: Tag) -> str:
+    def _get_word_levl(self, page: bs4.element.Tag) -> str:
         """Callback method from `self._gather_info`. It gets the level(A1/ A2/ B1...) of the text.
 
         Args:
@@ -260,7 +286,7 @@ class CambridgeDictionary:
             return level.text
         return ''
 
-    def _get_explanation(self, page: Tag) -> str:
+    def _get_explanation(self, page: bs4.element.Tag) -> str:
         """Callback method from `self._gather_info`. It gets the meaning of the text.
 
         Args:
@@ -274,7 +300,7 @@ class CambridgeDictionary:
             return meaning.text
         return ''
 
-    def _get_example(self, page: Tag) -> list:
+    def _get_example(self, page: bs4.element.Tag) -> list:
         """Callback method from `self._gather_info`. It gets examples of the text.
 
         Args:
@@ -0,0 +1,214 @@
+"""
+`library/logic/pages.py`
+\nThis module consists of:
+    - `LazyPage`
+    - `PageContainer`
+
+It navigates the user interface. The carousel holds a lightweight slot for each page, the kv rules and the widget tree
+of a page are built the first time the page is used. Only the current page and the page shown before it are kept in
+their slots, the other pages are detached from the widget tree with their state kept, and added back when they are
+shown again.
+"""
+
+import importlib
+import os
+
+from kivy.app import App
+from kivy.lang import Builder
+from kivy.uix.carousel import Carousel
+from kivy.uix.image import Image
+from kivy.uix.relativelayout import RelativeLayout
+from library.logic import trace
+from library.logic.metrics import get_metrics
+from library.logic.kv_cache import load_kv
+
+
+class LazyPage:
+    """
+    An attribute of the app which builds the page at the first access, e.g. `App.get_running_app().add_vocab`. The kv
+    files of the page are loaded before the page is created.
+    """
+
+    def __init__(self, module: str, cls: str, kv_files: list):
+        self.module = module
+        self.cls = cls
+        self.kv_files = kv_files
+        self.name = ''
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, app, owner=None):
+        if app is None:
+            return self
+        return app.main_container.get_page(self.name)
+
+    def build(self, kv_dir: str):
+        """
+        Load the kv files, import the module and create the page.
+
+        Args:
+            kv_dir: The directory of the kv files.
+
+        Returns:
+            The page widget.
+        """
+        for kv in self.kv_files:
+            file = os.path.join(kv_dir, kv)
+            if file not in Builder.files:
+                load_kv(file)
+
+        with trace.span(f'import {self.module}', 'page'):
+            page_class = getattr(importlib.import_module(self.module), self.cls)
+        with trace.span(f'create {self.name}', 'page'):
+            return page_class()
+
+
+class PageContainer(Carousel):
+    """
+    A carousel of page slots. A page is built into its slot when it is used the first time, `load_slide` accepts
+    either the page or the slot.
+
+    The pages other than the current one and the one shown before are detached from their slots, so they are not
+    drawn and laid out. If `free_textures` is True, the textures of a detached page are also released, they are loaded
+    again when the page is attached.
+    """
+
+    def __init__(self, kv_dir: str, free_textures: bool = False, **kwargs):
+        super(PageContainer, self).__init__(**kwargs)
+        self.kv_dir = kv_dir
+        self.free_textures = free_textures
+        self.lazy_pages = {}
+        self.slots = {}
+        self.slot_names = {}
+        self.pages = {}
+        self.page_slots = {}
+        self.page_names = {}
+        self.attached = []  # names of the attached pages, the current page is the last
+        self.freed = {}  # {name of page: widgets which textures are released}
+        self.bind(index=self.on_page_changed)
+
+    def register_pages(self, app: App) -> None:
+        """
+        Add a slot for each [`LazyPage`](/reference/#library.logic.pages.LazyPage) of the app, in the order they are
+        declared.
+
+        Args:
+            app: The running app.
+        """
+        for cls in reversed(type(app).__mro__):
+            for name, attr in vars(cls).items():
+                if isinstance(attr, LazyPage) and name not in self.slots:
+                    self.lazy_pages[name] = attr
+                    self.slots[name] = RelativeLayout()
+                    self.slot_names[self.slots[name]] = name
+                    self.add_widget(self.slots[name])
+
+    def get_page(self, name: str):
+        """
+        Return the page, build it into its slot if it has not been built.
+
+        Args:
+            name: Name of the page, e.g. 'add_vocab'.
+
+        Returns:
+            The page widget.
+        """
+        if name not in self.pages:
+            with trace.span(f'build {name}', 'page'), get_metrics().timer('page.build'):
+                page = self.lazy_pages[name].build(self.kv_dir)
+                self.pages[name] = page
+                self.page_names[page] = name
+                self.page_slots[page] = self.slots[name]
+                self.attach_page(name)
+
+        return self.pages[name]
+
+    def build_all(self) -> None:
+        """Build all the pages."""
+        for name in self.lazy_pages:
+            self.get_page(name)
+        self.detach_pages()
+
+    def attach_page(self, name: str) -> None:
+        """
+        Put the page back to its slot, and load the textures released when it was detached.
+
+        Args:
+            name: Name of the page.
+        """
+        if name in self.attached:
+            self.attached.remove(name)
+        self.attached.append(name)
+
+        page = self.pages[name]
+        if page.parent is None:
+            self.slots[name].add_widget(page)
+        for widget in self.freed.pop(name, []):
+            if isinstance(widget, Image):
+                widget.reload()
+            else:
+                widget.restore_textures()
+
+    def detach_pages(self, keep: int = 2) -> None:
+        """
+        Detach the pages except the current page and the pages shown before it.
+
+        Args:
+            keep: Number of pages kept in their slots.
+        """
+        current = self.slot_names.get(self.current_slide)
+        if current in self.attached:
+            self.attached.remove(current)
+            self.attached.append(current)
+
+        while len(self.attached) > keep:
+            name = self.attached.pop(0)
+            page = self.pages[name]
+            if page.parent is not None:
+                page.parent.remove_widget(page)
+            if self.free_textures:
+                self.freed[name] = self.release_textures(page)
+
+    @staticmethod
+    def release_textures(page) -> list:
+        """
+        Release the textures of the images loaded from a source, and call `free_textures` of the widgets which have
+        it, e.g. the pages which keep a texture cache.
+
+        Args:
+            page: A detached page.
+
+        Returns:
+            A list of the widgets to be restored when the page is attached.
+        """
+        freed = []
+        for widget in page.walk(restrict=True):
+            if isinstance(widget, Image) and widget.source and widget.texture is not None:
+                widget.texture = None
+                freed.append(widget)
+            elif hasattr(widget, 'free_textures') and hasattr(widget, 'restore_textures'):
+                widget.free_textures()
+                freed.append(widget)
+
+        return freed
+
+    def on_page_changed(self, instance, index) -> None:
+        """Detach the pages not shown after the carousel moved to another page."""
+        self.detach_pages()
+
+    def load_slide(self, slide) -> None:
+        """
+        Move to the slot of the page.
+
+        Args:
+            slide: The page or its slot.
+        """
+        slot = self.page_slots.get(slide, slide)
+        name = self.slot_names.get(slot, '')
+        trace.until_next_frame(f'navigate {name}', 'navigation')
+        with trace.span(f'load_slide {name}', 'navigation'):
+            get_metrics().count(f'page.open.{name}')
+            if name in self.pages:
+                self.attach_page(name)
+            super(PageContainer, self).load_slide(slot)
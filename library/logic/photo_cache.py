@@ -0,0 +1,243 @@
+"""
+`library/logic/photo_cache.py`
+\nThis module consists of:
+    - `TextureCache`
+    - `PhotoPrefetcher`
+
+It downloads (or reads from the database) and decodes photos in the background and keeps the decoded textures in a
+memory bounded cache, so paging through the photos does not download/ decode the same photo again.
+"""
+
+import io
+import queue
+import threading as th
+from collections import OrderedDict
+
+from PIL import Image as PILImage
+from kivy.clock import Clock
+from kivy.graphics.texture import Texture
+from library.logic.lazy_import import lazy_import
+from library.logic.metrics import get_metrics
+
+requests = lazy_import('requests')
+
+
+class TextureCache:
+    """
+    A least-recently-used cache of decoded textures keyed by the photo's link. The size of the cache is tracked in bytes
+    and the least recently used textures are dropped once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._textures = OrderedDict()
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._textures
+
+    def __len__(self) -> int:
+        return len(self._textures)
+
+    def get(self, url: str) -> Texture | None:
+        """
+        Return the texture of the photo and mark it as the most recently used one.
+
+        Args:
+            url: The source link of the photo.
+
+        Returns:
+            The decoded texture, None if the photo is not in the cache.
+        """
+        if url not in self._textures:
+            get_metrics().count('photo.cache_miss')
+            return None
+
+        get_metrics().count('photo.cache_hit')
+        self._textures.move_to_end(url)
+        return self._textures[url][0]
+
+    def put(self, url: str, texture: Texture) -> None:
+        """
+        Add a texture to the cache, drop the least recently used textures if the cache is over its budget.
+
+        Args:
+            url: The source link of the photo.
+            texture: The decoded texture of the photo.
+        """
+        if url in self._textures:
+            self.nbytes -= self._textures.pop(url)[1]
+
+        nbytes = texture.width * texture.height * len(texture.colorfmt)
+        self._textures[url] = (texture, nbytes)
+        self.nbytes += nbytes
+
+        while self.nbytes > self.max_bytes and len(self._textures) > 1:
+            _, (_, dropped) = self._textures.popitem(last=False)
+            self.nbytes -= dropped
+
+    def clear(self) -> None:
+        """Drop all textures."""
+        self._textures.clear()
+        self.nbytes = 0
+
+
+class PhotoPrefetcher:
+    """
+    Download (or read local files) and decode photos with background threads, upload the decoded pixels to a texture in
+    the main thread and put it into a [`TextureCache`](/reference/#library.logic.photo_cache.TextureCache). The
+    perceptual hashes of the photos are computed by the background threads as well if a `deduplicator` is given. The
+    threads also fetch the links of a [`PhotoStream`](/reference/#library.logic.search_photos.PhotoStream), so paging
+    does not wait for the search result pages in the main thread.
+    """
+
+    def __init__(self, cache: TextureCache, workers: int = 2, on_ready=None, deduplicator=None, on_filled=None):
+        self.cache = cache
+        self.deduplicator = deduplicator
+        self.workers = workers
+        self.on_ready = on_ready
+        self.on_filled = on_filled
+        self.header = {'User-Agent': 'Jason'}  # merged with the default headers of requests
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._filling = set()  # the streams being filled
+        self._lock = th.Lock()
+        self._generation = 0
+        self._threads = []
+
+    def prefetch(self, urls: list) -> None:
+        """
+        Queue photos to be downloaded and decoded in the background. Photos in the cache or in the queue are skipped.
+
+        Args:
+            urls: A list of source links or file paths of the photos.
+        """
+        self._start_workers()
+        with self._lock:
+            for url in urls:
+                if not url or url in self.cache or url in self._pending:
+                    continue
+                self._pending.add(url)
+                self._queue.put((self._generation, url))
+
+    def fill(self, stream, num: int) -> None:
+        """
+        Fetch the links of the stream in the background until `num` links are fetched, `on_filled` is called in the
+        main thread afterwards. Nothing is queued if the links are fetched or the stream is being filled.
+
+        Args:
+            stream: The [`PhotoStream`](/reference/#library.logic.search_photos.PhotoStream).
+            num: Number of photos (since the first photo) needed.
+        """
+        if stream.exhausted or len(stream) >= num:
+            return
+
+        self._start_workers()
+        with self._lock:
+            if stream in self._filling:
+                return
+            self._filling.add(stream)
+            self._queue.put((self._generation, (stream, num)))
+
+    def cancel(self) -> None:
+        """Forget the queued photos and links, e.g. a new word is searched."""
+        with self._lock:
+            self._generation += 1
+            self._pending.clear()
+            self._filling.clear()
+
+    def is_pending(self, url: str) -> bool:
+        """Return True if the photo is queued or being downloaded."""
+        return url in self._pending
+
+    def _start_workers(self) -> None:
+        """Start the worker threads at the first prefetch."""
+        if self._threads:
+            return
+
+        for _ in range(self.workers):
+            worker = th.Thread(target=self._work, daemon=True)
+            worker.start()
+            self._threads.append(worker)
+
+    def _work(self) -> None:
+        """Worker thread. Download and decode the queued photos."""
+        while True:
+            generation, url = self._queue.get()
+            if generation != self._generation:
+                continue
+
+            if isinstance(url, tuple):  # the links of a stream
+                stream, num = url
+                try:
+                    stream.fill(num)
+                except Exception as e:
+                    print(f"Exception from PhotoPrefetcher._work:\n\t{e}")
+                Clock.schedule_once(lambda t, g=generation, s=stream: self._filled(g, s), 0)
+                continue
+
+            pixels = self._download(url)
+            if pixels is None:
+                with self._lock:
+                    self._pending.discard(url)
+                continue
+
+            Clock.schedule_once(lambda t, g=generation, u=url, p=pixels: self._upload(g, u, *p), 0)
+
+    @get_metrics().timed('photo.load')
+    def _download(self, url: str) -> tuple | None:
+        """
+        Download the photo, or read it if it is a local file, and decode it to RGBA pixels.
+
+        Args:
+            url: The source link or the file path of the photo.
+
+        Returns:
+            A tuple of the size of the photo and the raw RGBA pixels. None if error occur.
+        """
+        try:
+            if url.startswith('http'):
+                res = requests.get(url, headers=self.header, timeout=10)
+                res.raise_for_status()
+                photo = PILImage.open(io.BytesIO(res.content)).convert('RGBA')
+            else:
+                photo = PILImage.open(url).convert('RGBA')
+        except Exception as e:
+            print(f"Exception from PhotoPrefetcher._download:\n\t{e}")
+            return
+
+        if self.deduplicator:
+            self.deduplicator.hash_photo(url, photo)
+
+        return photo.size, photo.tobytes()
+
+    def _filled(self, generation: int, stream) -> None:
+        """Call `on_filled` once the links of the stream are fetched. Called in the main thread."""
+        with self._lock:
+            self._filling.discard(stream)
+        if generation == self._generation and self.on_filled:
+            self.on_filled()
+
+    @get_metrics().timed('photo.upload')
+    def _upload(self, generation: int, url: str, size: tuple, pixels: bytes) -> None:
+        """
+        Upload the decoded pixels to a texture and cache it. Called in the main thread.
+
+        Args:
+            generation: The generation of the request, stale requests are dropped.
+            url: The source link of the photo.
+            size: The size of the photo.
+            pixels: Raw RGBA pixels of the photo.
+        """
+        with self._lock:
+            self._pending.discard(url)
+        if generation != self._generation:
+            return
+
+        texture = Texture.create(size=size, colorfmt='rgba')
+        texture.blit_buffer(pixels, colorfmt='rgba', bufferfmt='ubyte')
+        texture.flip_vertical()
+        self.cache.put(url, texture)
+
+        if self.on_ready:
+            self.on_ready(url)
@@ -0,0 +1,106 @@
+"""
+`library/logic/photo_hash.py`
+\nThis module consists of:
+    - `dhash`
+    - `PhotoDeduplicator`
+
+It finds near-duplicate photos (the same stock photo in different sizes) by their perceptual hashes.
+"""
+
+import threading as th
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image as PILImage
+
+
+def dhash(photo: PILImage.Image, hash_size: int = 8) -> int:
+    """
+    Compute the difference hash of the photo. The photo is shrunk to a (hash_size + 1) x hash_size grayscale image, and
+    each bit tells whether a pixel is brighter than its right neighbour.
+
+    Args:
+        photo: A decoded photo.
+        hash_size: Width and height of the hash in bits.
+
+    Returns:
+        The hash as an integer of hash_size * hash_size bits.
+    """
+    small = photo.convert('L').resize((hash_size + 1, hash_size), PILImage.LANCZOS)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class PhotoDeduplicator:
+    """
+    Collapse near-duplicate photos of a search, the variant with the highest resolution is kept. Hashes are cached by
+    the photo's link, so repeated searches do not compute them again.
+    """
+
+    def __init__(self, threshold: int = 6, max_hashes: int = 4096):
+        self.threshold = threshold
+        self.max_hashes = max_hashes
+        self._hashes = OrderedDict()
+        self._lock = th.Lock()
+        self._groups = []
+
+    def hash_photo(self, url: str, photo: PILImage.Image) -> None:
+        """
+        Compute and cache the hash and the resolution of the photo. It can be called by background threads.
+
+        Args:
+            url: The source link of the photo.
+            photo: The decoded photo.
+        """
+        with self._lock:
+            if url in self._hashes:
+                self._hashes.move_to_end(url)
+                return
+
+        value = (dhash(photo), photo.width * photo.height)
+        with self._lock:
+            self._hashes[url] = value
+            while len(self._hashes) > self.max_hashes:
+                self._hashes.popitem(last=False)
+
+    def is_hashed(self, url: str) -> bool:
+        """Return True if the hash of the photo is cached."""
+        with self._lock:
+            return url in self._hashes
+
+    def add(self, url: str) -> str | None:
+        """
+        Add a hashed photo to the current search and compare it with the photos added before.
+
+        Args:
+            url: The source link of the photo.
+
+        Returns:
+            The link of the photo to be dropped, i.e. the lower resolution variant if the photo is a near-duplicate of
+            a photo added before. None if the photo is not a duplicate.
+        """
+        with self._lock:
+            if url not in self._hashes:
+                return None
+            value, resolution = self._hashes[url]
+
+        for group in self._groups:
+            if group['url'] == url:
+                return None
+            if bin(value ^ group['hash']).count('1') > self.threshold:
+                continue
+
+            # near-duplicate, keep the higher resolution one
+            if resolution > group['resolution']:
+                dropped = group['url']
+                group.update({'url': url, 'hash': value, 'resolution': resolution})
+                return dropped
+            return url
+
+        self._groups.append({'url': url, 'hash': value, 'resolution': resolution})
+        return None
+
+    def reset(self) -> None:
+        """Start a new search, the cached hashes are kept."""
+        self._groups = []
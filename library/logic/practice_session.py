@@ -0,0 +1,185 @@
+"""
+`library/logic/practice_session.py`
+\nThis module consists of:
+    - `Card`
+    - `PracticeSession`
+
+It keeps the vocabulary to be practiced as a compact sequence of cards and a cursor, so getting the next card does not
+touch the DataFrame, and the session can be saved and resumed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+
+from library.logic.keys import canonical_key, split_vocabulary
+from library.logic.lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+
+
+class Card:
+    """A vocabulary to be practiced, with the paths of its image and sound file."""
+
+    __slots__ = ('vocabulary', 'word', 'key', 'type', 'description', 'example', 'image', 'sound')
+
+    def __init__(self, vocabulary: str, word: str, key: str, type: str, description: str, example: str,
+                 image: str | None = None, sound: str | None = None):
+        self.vocabulary = vocabulary
+        self.word = word
+        self.key = key
+        self.type = type
+        self.description = description
+        self.example = example
+        self.image = image
+        self.sound = sound
+
+    @classmethod
+    def from_vocabulary(cls, vocabulary: str, description: str, example: str, data_dir: str,
+                        word_type: str = '') -> 'Card':
+        """
+        Create a card from a row of the database, find the image and the sound file of the vocabulary.
+
+        Args:
+            vocabulary: The vocabulary, it may include the word type, e.g. 'run (verb)'.
+            description: The description of the vocabulary.
+            example: The example of the vocabulary.
+            data_dir: The database directory.
+            word_type: The word type from the 'Type' column, e.g. 'verb'. The type in the vocabulary is used if it is
+                empty.
+
+        Returns:
+            The card.
+        """
+        vocabulary = str(vocabulary)
+        word, bracket = split_vocabulary(vocabulary)
+        word_type = f'({word_type})' if word_type else bracket
+        key = canonical_key(vocabulary)
+
+        image = None
+        for ext in ('png', 'jpeg', 'jpg'):
+            file = os.path.join(data_dir, 'images', f'{key}.{ext}')
+            if os.path.isfile(file):
+                image = file
+                break
+        sound = os.path.join(data_dir, 'sounds', f'{key}.mp3')
+
+        return cls(vocabulary, word, key, word_type, str(description), str(example),
+                   image, sound if os.path.isfile(sound) else None)
+
+    @property
+    def answer(self) -> str:
+        """The expected answer of the card."""
+        return self.word.lower()
+
+    def is_correct(self, answer: str) -> bool:
+        """
+        Check the answer by the canonical key, so the case, the spaces and the word type do not matter.
+
+        Args:
+            answer: The answer of the user.
+        """
+        return canonical_key(answer) == self.key
+
+    def to_list(self) -> list:
+        """Return the fields of the card as a list, in the order of `__slots__`."""
+        return [getattr(self, slot) for slot in self.__slots__]
+
+
+class PracticeSession:
+    """
+    A sequence of [`Card`](/reference/#library.logic.practice_session.Card) and a cursor pointing to the next card. The
+    number of tested and correct answers are kept with the session.
+    """
+
+    def __init__(self, cards: list, cursor: int = 0, tested: int = 0, correct: int = 0):
+        self.cards = cards
+        self.cursor = cursor
+        self.tested = tested
+        self.correct = correct
+
+    @classmethod
+    def from_dataframe(cls, data: pd.DataFrame, data_dir: str) -> 'PracticeSession':
+        """
+        Create the cards from the data to be practiced, the first row is tested first.
+
+        Args:
+            data: DataFrame from [`get_data`](/reference/#library.logic.database.get_data).
+            data_dir: The database directory.
+
+        Returns:
+            The practice session.
+        """
+        types = data['Type'] if 'Type' in data else [''] * len(data)
+        rows = zip(data['Vocabulary'], data['Description'], data['Example'], types)
+        cards = [Card.from_vocabulary(vocab, desc, exp, data_dir, word_type) for vocab, desc, exp, word_type in rows]
+        return cls(cards)
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    @property
+    def remaining(self) -> int:
+        """Number of cards not tested yet."""
+        return len(self.cards) - self.cursor
+
+    def next_card(self) -> Card | None:
+        """
+        Move the cursor to the next card.
+
+        Returns:
+            The next card, None if the session is finished.
+        """
+        if self.cursor >= len(self.cards):
+            return None
+
+        self.cursor += 1
+        return self.cards[self.cursor - 1]
+
+    def peek(self, num: int = 1) -> list:
+        """
+        Get the cards after the current card without moving the cursor.
+
+        Args:
+            num: Number of cards.
+        """
+        return self.cards[self.cursor:self.cursor + num]
+
+    def save(self, file: str) -> None:
+        """
+        Save the session to a json file.
+
+        Args:
+            file: The file path.
+        """
+        session = {'cursor': self.cursor, 'tested': self.tested, 'correct': self.correct,
+                   'cards': [card.to_list() for card in self.cards]}
+        try:
+            with open(file, 'w', encoding='utf-8') as f:
+                json.dump(session, f, separators=(',', ':'))
+        except Exception as e:
+            print(f"Exception from PracticeSession.save:\n\t{e}")
+
+    @classmethod
+    def load(cls, file: str) -> 'PracticeSession | None':
+        """
+        Load a session saved by `save`.
+
+        Args:
+            file: The file path.
+
+        Returns:
+            The practice session, None if there is no saved session.
+        """
+        if not os.path.isfile(file):
+            return None
+
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                session = json.load(f)
+            cards = [Card(*card) for card in session['cards']]
+            return cls(cards, session['cursor'], session['tested'], session['correct'])
+        except Exception as e:
+            print(f"Exception from PracticeSession.load:\n\t{e}")
+            return None
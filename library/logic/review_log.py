@@ -0,0 +1,239 @@
+"""
+`library/logic/review_log.py`
+\nThis module consists of:
+    - `ReviewLog`
+    - `get_review_log`
+    - `save_review_logs`
+
+It keeps every answer of the practice in an append-only binary log, and maintains the per-word and per-day statistics
+incrementally, so the statistics are not computed by scanning the whole history.
+"""
+
+import datetime
+import os
+import struct
+import time
+
+import numpy as np
+from kivy.app import App
+
+RECORD = struct.Struct('<dIBf')  # timestamp, word id, correct, response time
+RECORD_DTYPE = np.dtype([('timestamp', '<f8'), ('word', '<u4'), ('correct', 'u1'), ('response_time', '<f4')])
+
+
+class ReviewLog:
+    """
+    An append-only log of answers. The words are stored as ids, the id of a word is the line number in the words file.
+    The statistics are saved with the number of bytes of the log they cover, the records written after that are
+    replayed when the statistics are loaded. Therefore the statistics are saved every `save_every` answers and when the
+    app stops, while every answer is appended to the log at once.
+    """
+
+    def __init__(self, log_dir: str, name: str = 'review', save_every: int = 20):
+        """
+        Args:
+            log_dir: The directory of the log files.
+            name: The prefix of the log files, e.g. 'review' for the practice and 'dictation' for the dictation.
+            save_every: Number of answers recorded between two saves of the statistics.
+        """
+        self.save_every = save_every
+        self.unsaved = 0  # answers recorded since the statistics were saved
+        self.log_file = os.path.join(log_dir, f'{name}_log.bin')
+        self.words_file = os.path.join(log_dir, f'{name}_words.txt')
+        self.stats_file = os.path.join(log_dir, f'{name}_stats.npz')
+        self.words = []
+        self.word_ids = {}
+        self.log_size = 0
+
+        # per-word statistics, indexed by word id
+        self.word_tested = np.zeros(0, dtype=np.int64)
+        self.word_correct = np.zeros(0, dtype=np.int64)
+        self.word_time = np.zeros(0, dtype=np.float64)
+
+        # per-day statistics, {date ordinal: [tested, correct]}
+        self.days = {}
+
+        self.load()
+
+    def load(self) -> None:
+        """Load the words and the statistics, replay the records not covered by the statistics."""
+        if os.path.isfile(self.words_file):
+            with open(self.words_file, 'r', encoding='utf-8') as f:
+                self.words = f.read().splitlines()
+        self.word_ids = {word: i for i, word in enumerate(self.words)}
+        self._resize(len(self.words))
+
+        if os.path.isfile(self.stats_file):
+            try:
+                stats = np.load(self.stats_file)
+                self.log_size = int(stats['log_size'])
+                size = min(len(stats['word_tested']), len(self.words))
+                self.word_tested[:size] = stats['word_tested'][:size]
+                self.word_correct[:size] = stats['word_correct'][:size]
+                self.word_time[:size] = stats['word_time'][:size]
+                self.days = {int(d): [int(t), int(c)]
+                             for d, t, c in zip(stats['day'], stats['day_tested'], stats['day_correct'])}
+            except Exception as e:
+                print(f"Exception from ReviewLog.load:\n\t{e}")
+                self.log_size = 0
+
+        log_size = os.path.getsize(self.log_file) if os.path.isfile(self.log_file) else 0
+        if log_size < self.log_size:  # the log has been replaced, rebuild the statistics
+            self.log_size = 0
+            self._resize(len(self.words), reset=True)
+            self.days = {}
+        if log_size > self.log_size:
+            self._replay(self.log_size)
+
+    def record(self, word: str, correct: bool, response_time: float, timestamp: float | None = None) -> None:
+        """
+        Append an answer to the log and update the statistics.
+
+        Args:
+            word: Key of the vocabulary.
+            correct: True if the answer is correct.
+            response_time: Seconds from showing the card to answering.
+            timestamp: Time of the answer in seconds since the epoch.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        word_id = self._word_id(word)
+        with open(self.log_file, 'ab') as f:
+            f.write(RECORD.pack(timestamp, word_id, int(correct), response_time))
+        self.log_size += RECORD.size
+        self._update(np.array([(timestamp, word_id, int(correct), response_time)], dtype=RECORD_DTYPE))
+        self.unsaved += 1
+        if self.unsaved >= self.save_every:
+            self.save()
+
+    def save(self) -> None:
+        """Save the statistics."""
+        days = sorted(self.days)
+        size = len(self.words)
+        try:
+            with open(self.stats_file + '.tmp', 'wb') as f:
+                np.savez(f, log_size=self.log_size,
+                         word_tested=self.word_tested[:size], word_correct=self.word_correct[:size],
+                         word_time=self.word_time[:size],
+                         day=np.array(days, dtype=np.int64),
+                         day_tested=np.array([self.days[d][0] for d in days], dtype=np.int64),
+                         day_correct=np.array([self.days[d][1] for d in days], dtype=np.int64))
+            os.replace(self.stats_file + '.tmp', self.stats_file)
+            self.unsaved = 0
+        except Exception as e:
+            print(f"Exception from ReviewLog.save:\n\t{e}")
+
+    def accuracy_by_day(self, days: int = 7) -> list:
+        """
+        Get the number of answers and the accuracy of the latest days.
+
+        Args:
+            days: Number of days, including today.
+
+        Returns:
+            A list of (date, tested, accuracy in percent) of each day, the earliest day first.
+        """
+        today = datetime.date.today().toordinal()
+        ordinals = np.arange(today - days + 1, today + 1)
+        tested = np.array([self.days.get(int(d), [0, 0])[0] for d in ordinals])
+        correct = np.array([self.days.get(int(d), [0, 0])[1] for d in ordinals])
+        accuracy = np.divide(correct * 100, tested, out=np.zeros(len(ordinals)), where=tested > 0)
+
+        return [(datetime.date.fromordinal(int(d)), int(t), float(a)) for d, t, a in zip(ordinals, tested, accuracy)]
+
+    def hardest_words(self, num: int = 5, min_tested: int = 2) -> list:
+        """
+        Get the words with the lowest accuracy, the slower answers first if the accuracy is the same.
+
+        Args:
+            num: Number of words.
+            min_tested: Words tested less than this are ignored.
+
+        Returns:
+            A list of (word, tested, accuracy in percent, average response time).
+        """
+        ids = np.flatnonzero(self.word_tested >= max(min_tested, 1))
+        if not len(ids):
+            return []
+
+        tested = self.word_tested[ids]
+        accuracy = self.word_correct[ids] * 100 / tested
+        avg_time = self.word_time[ids] / tested
+        order = np.lexsort((-avg_time, accuracy))[:num]
+
+        return [(self.words[ids[i]], int(tested[i]), float(accuracy[i]), float(avg_time[i])) for i in order]
+
+    def _word_id(self, word: str) -> int:
+        """Return the id of the word, a new word is appended to the words file."""
+        if word not in self.word_ids:
+            with open(self.words_file, 'a', encoding='utf-8') as f:
+                f.write(word.replace('\n', ' ') + '\n')
+            self.word_ids[word] = len(self.words)
+            self.words.append(word)
+            self._resize(len(self.words))
+
+        return self.word_ids[word]
+
+    def _resize(self, size: int, reset: bool = False) -> None:
+        """Grow the per-word arrays to the number of words."""
+        for name in ('word_tested', 'word_correct', 'word_time'):
+            array = getattr(self, name)
+            if reset:
+                array = np.zeros(0, dtype=array.dtype)
+            if len(array) < size:
+                array = np.concatenate([array, np.zeros(max(size - len(array), len(array)), dtype=array.dtype)])
+            setattr(self, name, array)
+
+    def _replay(self, offset: int) -> None:
+        """
+        Update the statistics with the records from the offset of the log.
+
+        Args:
+            offset: Number of bytes of the log covered by the statistics.
+        """
+        with open(self.log_file, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        records = np.frombuffer(data[:len(data) - len(data) % RECORD.size], dtype=RECORD_DTYPE)
+        self.log_size = offset + records.nbytes
+        self._update(records)
+        self.save()
+
+    def _update(self, records: np.ndarray) -> None:
+        """Add the records to the per-word and per-day statistics."""
+        records = records[records['word'] < len(self.words)]
+        np.add.at(self.word_tested, records['word'], 1)
+        np.add.at(self.word_correct, records['word'], records['correct'])
+        np.add.at(self.word_time, records['word'], records['response_time'])
+
+        days = np.array([datetime.date.fromtimestamp(t).toordinal() for t in records['timestamp']], dtype=np.int64)
+        for day in np.unique(days):
+            mask = days == day
+            stats = self.days.setdefault(int(day), [0, 0])
+            stats[0] += int(mask.sum())
+            stats[1] += int(records['correct'][mask].sum())
+
+
+_review_logs = {}
+
+
+def get_review_log(name: str = 'review') -> ReviewLog:
+    """
+    Return a review log of the running app, it is loaded at the first call.
+
+    Args:
+        name: 'review' for the answers of the practice, 'dictation' for the spelling of the dictation.
+
+    Returns:
+        The shared [`ReviewLog`](/reference/#library.logic.review_log.ReviewLog) of the name.
+    """
+    if name not in _review_logs:
+        _review_logs[name] = ReviewLog(os.path.join(App.get_running_app().working_dir, 'database'), name)
+
+    return _review_logs[name]
+
+
+def save_review_logs() -> None:
+    """Save the statistics of the review logs loaded which have unsaved answers, e.g. when the app stops."""
+    for review_log in _review_logs.values():
+        if review_log.unsaved:
+            review_log.save()
@@ -0,0 +1,159 @@
+"""
+`library/logic/scheduler.py`
+\nThis module consists of:
+    - `SpacedRepetition`
+    - `get_scheduler`
+
+It schedules the vocabulary to be reviewed with the SM-2 spaced repetition algorithm.
+"""
+
+import heapq
+import json
+import os
+import time
+
+from kivy.app import App
+
+DAY = 24 * 60 * 60
+RELEARN_DELAY = 10 * 60
+
+
+class SpacedRepetition:
+    """
+    Keep the ease, interval and due time of each vocabulary, and a heap of the vocabulary ordered by the due time. The
+    heap may contain outdated entries, they are skipped when popped. The vocabulary are identified by their canonical
+    keys (see [`canonical_key`](/reference/#library.logic.keys.canonical_key)).
+    """
+
+    def __init__(self, schedule_file: str):
+        self.schedule_file = schedule_file
+        self.cards = {}
+        self._heap = []
+        self.load()
+
+    def load(self) -> None:
+        """Load the schedule from the schedule file."""
+        self.cards = {}
+        if os.path.isfile(self.schedule_file):
+            try:
+                with open(self.schedule_file, 'r', encoding='utf-8') as f:
+                    self.cards = json.load(f)
+            except Exception as e:
+                print(f"Exception from SpacedRepetition.load:\n\t{e}")
+
+        self._heap = [(card['due'], word) for word, card in self.cards.items()]
+        heapq.heapify(self._heap)
+
+    def save(self) -> None:
+        """Save the schedule to the schedule file."""
+        try:
+            with open(self.schedule_file + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self.cards, f)
+            os.replace(self.schedule_file + '.tmp', self.schedule_file)
+        except Exception as e:
+            print(f"Exception from SpacedRepetition.save:\n\t{e}")
+
+    def add(self, word: str, now: float | None = None) -> None:
+        """
+        Add a new vocabulary which is due immediately. Vocabulary in the schedule is ignored.
+
+        Args:
+            word: The canonical key of the vocabulary.
+            now: Current time in seconds since the epoch.
+        """
+        if word in self.cards:
+            return
+
+        now = time.time() if now is None else now
+        self.cards[word] = {'ease': 2.5, 'interval': 0.0, 'repetitions': 0, 'due': now}
+        heapq.heappush(self._heap, (now, word))
+
+    def due(self, num: int, now: float | None = None, among=None) -> list:
+        """
+        Get the vocabulary due for review, the most overdue first.
+
+        Args:
+            num: Maximum number of vocabulary.
+            now: Current time in seconds since the epoch.
+            among: Only the vocabulary in this collection of canonical keys, e.g. the vocabulary of a level.
+
+        Returns:
+            A list of the canonical keys.
+        """
+        now = time.time() if now is None else now
+        if among is not None:
+            # the due cards of the collection only, without walking the whole heap
+            due = ((self.cards[word]['due'], word) for word in among
+                   if word in self.cards and self.cards[word]['due'] <= now)
+            return [word for _, word in heapq.nsmallest(num, due)]
+
+        words = []
+        popped = set()
+        while self._heap and len(words) < num:
+            due, word = heapq.heappop(self._heap)
+            card = self.cards.get(word)
+            if not card or card['due'] != due or (due, word) in popped:  # outdated entry
+                continue
+            popped.add((due, word))
+            if due > now:
+                break
+            words.append(word)
+
+        # the cards stay in the heap until they are reviewed
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+
+        return words
+
+    def review(self, word: str, grade: int, now: float | None = None) -> None:
+        """
+        Update the schedule of the vocabulary with the grade of the answer (SM-2).
+
+        Args:
+            word: The canonical key of the vocabulary.
+            grade: Quality of the answer, from 0 (forgotten) to 5 (perfect).
+            now: Current time in seconds since the epoch.
+        """
+        now = time.time() if now is None else now
+        self.add(word, now)
+        card = self.cards[word]
+
+        if grade < 3:
+            card['repetitions'] = 0
+            card['interval'] = 0.0
+            card['due'] = now + RELEARN_DELAY
+        else:
+            card['repetitions'] += 1
+            if card['repetitions'] == 1:
+                card['interval'] = 1.0
+            elif card['repetitions'] == 2:
+                card['interval'] = 6.0
+            else:
+                card['interval'] = round(card['interval'] * card['ease'], 1)
+            card['due'] = now + card['interval'] * DAY
+
+        card['ease'] = max(1.3, card['ease'] + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+        heapq.heappush(self._heap, (card['due'], word))
+
+        # drop the outdated entries once they outnumber the cards
+        if len(self._heap) > 2 * len(self.cards) + 64:
+            self._heap = [(card['due'], word) for word, card in self.cards.items()]
+            heapq.heapify(self._heap)
+
+
+_scheduler = None
+
+
+def get_scheduler() -> SpacedRepetition:
+    """
+    Return the spaced repetition schedule of the running app, it is loaded at the first call.
+
+    Returns:
+        The shared [`SpacedRepetition`](/reference/#library.logic.scheduler.SpacedRepetition).
+    """
+    global _scheduler
+    if _scheduler is None:
+        schedule_file = os.path.join(App.get_running_app().working_dir, 'database', 'schedule.json')
+        _scheduler = SpacedRepetition(schedule_file)
+
+    return _scheduler
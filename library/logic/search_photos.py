@@ -1,11 +1,19 @@
 """
 `search_photos.py`\n
-This module consists of IStockPhoto which crawl photos from [`iStockPhoto`](https://www.istockphoto.com/).
+This module consists of IStockPhoto which crawl photos from [`iStockPhoto`](https://www.istockphoto.com/), and
+PhotoStream which pages through the search results lazily.
 """
 
-from bs4 import BeautifulSoup as bs
-import requests
-import requests.utils
+import threading as th
+from collections import deque
+from urllib.parse import quote
+
+from library.logic.lazy_import import lazy_import
+from library.logic.lookup_client import get_lookup_client
+from library.logic.metrics import get_metrics
+
+bs4 = lazy_import('bs4')
+requests = lazy_import('requests')
 
 
 class IStockPhoto:
@@ -13,14 +21,35 @@ class IStockPhoto:
     This class search the photos according to the given words from [`iStockPhoto`](https://www.istockphoto.com/) and
     return a list of the photos' link.
     """
+    search_url = r'https://www.istockphoto.com/search/2/image?phrase='
+    photo_host = 'https://media.istockphoto.com/'
+
     def __init__(self):
-        self.header = requests.utils.default_headers()
-        self.header.update({'User-Agent': 'Jason'})
+        self.header = {'User-Agent': 'Jason'}  # merged with the default headers of requests
         self.photo_src = []
 
+    @get_metrics().timed('photos.search')
     def search_photos(self, url: str = '') -> list:
         """
-        Search photo according to the given url. Return a list of links of the photos.
+        Search photo according to the given url. Return a list of links of the photos. The result is shared by the
+        [`lookup daemon`](/reference/#library.logic.lookup_daemon) if it is running.
+
+        Args:
+            url: A url of a searched word in iStockPhoto.
+
+        Returns:
+            A list of links of the photos from search result.
+        """
+        shared = get_lookup_client().photos(url)
+        if shared is not None:
+            self.photo_src = shared
+            return self.photo_src
+
+        return self.fetch_photos(url)
+
+    def fetch_photos(self, url: str) -> list:
+        """
+        Search photo without the lookup daemon, the daemon itself searches the photos by this method.
 
         Args:
             url: A url of a searched word in iStockPhoto.
@@ -31,15 +60,53 @@ class IStockPhoto:
         html = self._request_content(url)
         self.photo_src = []
         if html:
-            soup = bs(html, 'html.parser')
+            soup = bs4.BeautifulSoup(html, 'html.parser')
             photos = soup.find_all('img')
             for i in photos:
-                source_link = i['src']
-                if source_link.startswith('https://'):
+                source_link = i.get('src', '')
+                if self._is_photo(source_link) and source_link not in self.photo_src:
                     self.photo_src.append(source_link)
 
         return self.photo_src
 
+    def iter_photos(self, phrase: str, max_pages: int = 10):
+        """
+        A generator yields the links of the photos of the phrase. The next result page is requested only when the
+        photos of the previous page have been consumed.
+
+        Args:
+            phrase: The text to be searched in iStockPhoto.
+            max_pages: Maximum number of result pages to be requested.
+
+        Yields:
+            Links of the photos from search result.
+        """
+        if not phrase.strip():
+            return
+
+        for page in range(1, max_pages + 1):
+            photos = self.search_photos(f'{self.search_url}{quote(phrase.strip())}&page={page}')
+            if not photos:
+                return
+            yield from photos
+
+    def _is_photo(self, source_link: str) -> bool:
+        """
+        Check if the image is a photo of the search result rather than a logo, an icon or a sprite.
+
+        Args:
+            source_link: The source link of the image.
+
+        Returns:
+            True if the image is a photo.
+        """
+        if not source_link.startswith(self.photo_host):
+            return False
+
+        path = source_link.split('?')[0].lower()
+        return not path.endswith(('.svg', '.gif', '.png'))
+
+    @get_metrics().timed('photos.fetch')
     def _request_content(self, url):
         try:
             res = requests.get(url, headers=self.header)
@@ -47,3 +114,81 @@ class IStockPhoto:
         except Exception as e:
             print(f"Exception from iStockPhoto._request_content:\n\t{e}")
             return
+
+
+class PhotoStream:
+    """
+    A lazily fetched list of photos' links for several phrases, e.g. the word, the definition and the example. The
+    results of the phrases are chained, and further result pages are requested only when they are needed. A link
+    returned by an earlier page or phrase is skipped. At most `max_buffered` links are kept, the earliest links are
+    dropped once the limit is exceeded. `fill` may run in a background thread while the links are read in the main
+    thread.
+    """
+
+    def __init__(self, istock_photo: IStockPhoto, phrases: list = (), max_buffered: int = 60):
+        self.max_buffered = max_buffered
+        self.start = 0
+        self.exhausted = False
+        self._buffer = deque()
+        self._seen = set()
+        self._lock = th.Lock()  # the buffer
+        self._fill_lock = th.Lock()  # the generator of the links
+        self._photos = (photo for phrase in phrases for photo in istock_photo.iter_photos(phrase))
+
+    def __len__(self) -> int:
+        """Number of photos fetched so far, including the dropped ones."""
+        with self._lock:
+            return self.start + len(self._buffer)
+
+    def __getitem__(self, index: int | slice) -> str | list:
+        """
+        Get the link(s) of the photo(s) by the index since the first photo, dropped photos are not available.
+
+        Args:
+            index: Index or slice of the photo(s).
+        """
+        with self._lock:
+            size = self.start + len(self._buffer)
+            if isinstance(index, slice):
+                return [self._buffer[i - self.start] for i in range(*index.indices(size)) if i >= self.start]
+
+            if index < 0:
+                index += size
+            if not self.start <= index < size:
+                raise IndexError('photo index out of range')
+            return self._buffer[index - self.start]
+
+    def remove(self, url: str) -> None:
+        """
+        Drop the photo from the buffer, e.g. it is a duplicate of another photo.
+
+        Args:
+            url: The link of the photo.
+        """
+        with self._lock:
+            if url in self._buffer:
+                self._buffer.remove(url)
+
+    def fill(self, num: int) -> None:
+        """
+        Fetch further photos until `num` photos are fetched or there is no more result.
+
+        Args:
+            num: Number of photos (since the first photo) needed.
+        """
+        with self._fill_lock:
+            while len(self) < num and not self.exhausted:
+                try:
+                    photo = next(self._photos)
+                except StopIteration:
+                    self.exhausted = True
+                    break
+
+                if photo in self._seen:
+                    continue
+                self._seen.add(photo)
+                with self._lock:
+                    self._buffer.append(photo)
+                    if len(self._buffer) > self.max_buffered:
+                        self._buffer.popleft()
+                        self.start += 1
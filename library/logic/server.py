@@ -0,0 +1,391 @@
+"""
+`library/logic/server.py`
+\nThis module consists of:
+    - `ApiServer`
+    - `main`
+
+It serves the [`VocabularyService`](/reference/#library.logic.service.VocabularyService) as a local JSON API over
+HTTP/1.1, without the user interface. Run `python -m library.logic.server --data-dir database` from the project
+directory. The endpoints are:
+
+    GET  /lookup?word=<word>                        look up the Cambridge Dictionary
+    GET  /vocabulary?q=<text>&limit=<n>             search the vocabulary
+    GET  /vocabulary/<word>                         get a vocabulary
+    GET  /vocabulary/<word>/senses                  get all the senses saved from the dictionary
+    POST /vocabulary                                add a vocabulary, the body is a json object of word, definition,
+                                                    example, photo, sound_url, level, translation and dictionary (the
+                                                    result of /lookup, saved as the full entry)
+    PUT  /vocabulary/<word>                         update a vocabulary, the body is the same as POST
+    GET  /practice?num=<n>&method=<all|latest|review> get the cards to practice, filtered by the optional level=<A1-C2>,
+                                                    type=<word type>, since=<date> and until=<date>
+    DELETE /vocabulary/<word>                       delete a vocabulary
+    GET  /media/<image|sound>/<word>                get the photo or the sound file
+    GET  /metrics                                   get the metrics of the server
+
+and the endpoints of the [`sync`](/reference/#library.logic.sync) between the devices:
+
+    GET  /sync/changes?since=<n>&device=<id>        get the rows changed after the change number n
+    POST /sync/changes                              send the rows changed by a device, the body is a json object of
+                                                    device and changes, it is answered with the keys accepted and the
+                                                    media missing
+    GET  /sync/media/<image|sound>/<key>            get a media file
+    PUT  /sync/media/<image|sound>/<key>?hash=<sha256>&ext=<ext>&device=<id>  send a media file
+
+The requests are handled by a bounded pool of worker threads, a request is answered with 503 if all the workers are
+busy and the backlog is full.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import threading as th
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')  # kivy must not parse the arguments of the server
+
+from library.logic.metrics import get_metrics  # noqa: E402
+from library.logic.service import VocabularyService  # noqa: E402
+from library.logic.sync import SyncLog  # noqa: E402
+
+MAX_BODY = 16 * 1024 * 1024
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+CONTENT_TYPES = {'.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.mp3': 'audio/mpeg'}
+
+
+class HttpError(Exception):
+    """An error answered to the client with the status code."""
+
+    def __init__(self, status: int, message: str):
+        super(HttpError, self).__init__(message)
+        self.status = status
+
+
+class ApiServer:
+    """
+    An asyncio HTTP server of the vocabulary service. The connections are kept alive, the blocking calls of the service
+    run in a pool of `workers` threads and at most `backlog` requests wait for a worker.
+    """
+
+    def __init__(self, service: VocabularyService, workers: int = 4, backlog: int = 64):
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+        self.slots = asyncio.Semaphore(workers + backlog)
+        self.routes = {
+            ('GET', 'lookup'): self.lookup,
+            ('GET', 'vocabulary'): self.vocabulary,
+            ('POST', 'vocabulary'): self.add,
+            ('PUT', 'vocabulary'): self.add,
+            ('DELETE', 'vocabulary'): self.delete,
+            ('GET', 'practice'): self.practice,
+            ('GET', 'media'): self.media,
+            ('GET', 'metrics'): self.metrics,
+            ('GET', 'sync'): self.sync_get,
+            ('POST', 'sync'): self.sync_post,
+            ('PUT', 'sync'): self.sync_put,
+        }
+        self.sync_log = SyncLog(os.path.join(service.data_dir, 'sync_log.json'))
+        self.sync_lock = th.Lock()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765) -> None:
+        """
+        Serve until the task is cancelled.
+
+        Args:
+            host: The address to listen on.
+            port: The port to listen on.
+        """
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving {self.service.data_dir} on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=False)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of a connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    writer.write(self._response(e.status, {'error': str(e)}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+
+                method, path, query, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                status, payload = await self.dispatch(method, path, query, body)
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method: str, path: str, query: dict, body: bytes) -> tuple:
+        """
+        Route the request to its handler, which runs in the worker pool.
+
+        Args:
+            method: The HTTP method.
+            path: The path of the request.
+            query: The query parameters, the last value of each parameter.
+            body: The body of the request.
+
+        Returns:
+            The status code and the payload, a json serializable object or a tuple of the content of a file and its
+            content type.
+        """
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        handler = self.routes.get((method, parts[0]))
+        if handler is None:
+            allowed = any(route == parts[0] for _, route in self.routes)
+            return (405, {'error': 'method not allowed'}) if allowed else (404, {'error': 'not found'})
+
+        if self.slots.locked():
+            get_metrics().count('api.rejected')
+            return 503, {'error': 'server is busy'}
+
+        async with self.slots:
+            loop = asyncio.get_running_loop()
+            try:
+                with get_metrics().timer(f'api.{parts[0]}'):
+                    return await loop.run_in_executor(self.executor, handler, parts[1:], query, body)
+            except HttpError as e:
+                return e.status, {'error': str(e)}
+            except Exception as e:
+                print(f"Exception from ApiServer.dispatch:\n\t{method} {path}\n\t{e}")
+                return 500, {'error': 'internal error'}
+
+    def lookup(self, args: list, query: dict, body: bytes) -> tuple:
+        word = query.get('word', '').strip()
+        if not word:
+            raise HttpError(400, 'word is required')
+        return 200, self.service.lookup(word)
+
+    def vocabulary(self, args: list, query: dict, body: bytes) -> tuple:
+        if args:
+            entry = self.service.entry(args[0])
+            if entry is None:
+                raise HttpError(404, f'{args[0]} is not in the database')
+            if args[1:] == ['senses']:
+                return 200, self.service.senses(args[0])
+            if args[1:]:
+                raise HttpError(404, 'not found')
+            return 200, entry
+
+        limit = self._int(query, 'limit', 100)
+        return 200, self.service.search(query.get('q', ''), limit)
+
+    def add(self, args: list, query: dict, body: bytes) -> tuple:
+        try:
+            fields = json.loads(body or b'{}')
+        except ValueError:
+            raise HttpError(400, 'the body is not json')
+        if not isinstance(fields, dict):
+            raise HttpError(400, 'the body is not a json object')
+
+        word = args[0] if args else str(fields.get('word', ''))
+        optional = {name: str(fields[name]) for name in ('level', 'translation') if fields.get(name) is not None}
+        if isinstance(fields.get('dictionary'), dict):
+            optional['entry'] = {'word': word, 'translation': str(fields.get('translation') or ''),
+                                 'dictionary': fields['dictionary']}
+        result = self.service.add(word, str(fields.get('definition', '')), str(fields.get('example', '')),
+                                  str(fields.get('photo', '')), sound_url=str(fields.get('sound_url', '')), **optional)
+        if not result:
+            raise HttpError(400, 'word and one of definition, example or photo are required')
+        return (200 if args else 201), self.service.entry(word)
+
+    def delete(self, args: list, query: dict, body: bytes) -> tuple:
+        if not args:
+            raise HttpError(405, 'method not allowed')
+        if not self.service.delete(args[0]):
+            raise HttpError(404, f'{args[0]} is not in the database')
+        return 200, {'deleted': args[0]}
+
+    def practice(self, args: list, query: dict, body: bytes) -> tuple:
+        cards = self.service.practice_batch(self._int(query, 'num', 10), query.get('method', 'all'),
+                                            level=query.get('level'), word_type=query.get('type'),
+                                            since=self._date(query, 'since'), until=self._date(query, 'until'))
+        # the files are fetched from the media endpoint
+        for card in cards:
+            card['image'] = f"/media/image/{card['key']}" if card['image'] else None
+            card['sound'] = f"/media/sound/{card['key']}" if card['sound'] else None
+        return 200, cards
+
+    def media(self, args: list, query: dict, body: bytes) -> tuple:
+        if len(args) != 2:
+            raise HttpError(404, 'not found')
+        file = self.service.media_file(args[0], args[1])
+        if file is None:
+            raise HttpError(404, f'no {args[0]} of {args[1]}')
+        with open(file, 'rb') as f:
+            content = f.read()
+        return 200, (content, CONTENT_TYPES.get(os.path.splitext(file)[1].lower(), 'application/octet-stream'))
+
+    def metrics(self, args: list, query: dict, body: bytes) -> tuple:
+        return 200, get_metrics().snapshot()
+
+    def sync_get(self, args: list, query: dict, body: bytes) -> tuple:
+        if args == ['changes']:
+            since = int(query.get('since', 0)) if query.get('since', '0').isdigit() else 0
+            with self.sync_lock:
+                self.sync_log.observe(self.service.records())
+                keys = self.sync_log.since(since, query.get('device', ''))
+                return 200, {'cursor': self.sync_log.seq, 'changes': self.service.records(keys=keys)}
+
+        if len(args) == 3 and args[0] == 'media':
+            return self.media(args[1:], query, body)
+        raise HttpError(404, 'not found')
+
+    def sync_post(self, args: list, query: dict, body: bytes) -> tuple:
+        if args != ['changes']:
+            raise HttpError(404, 'not found')
+        try:
+            fields = json.loads(body or b'{}')
+            device, changes = str(fields['device']), list(fields['changes'])
+        except (ValueError, KeyError, TypeError):
+            raise HttpError(400, 'the body is not a json object of device and changes')
+
+        with self.sync_lock:
+            # the changes made on the server are numbered before they may be replaced
+            self.sync_log.observe(self.service.records())
+            accepted = self.service.apply(changes)
+            self.sync_log.touch(self.service.records(keys=accepted), device)
+
+            # the media of the rows which are the same as the device's are asked for
+            missing = []
+            for record in changes:
+                local = self.service.record(str(record.get('vocabulary', '')))
+                if local is None or local['deleted'] or SyncLog.version(local) != SyncLog.version(record):
+                    continue
+                for kind, media in record.get('media', {}).items():
+                    if local['media'].get(kind, {}).get('hash') != media['hash']:
+                        missing.append([kind, local['key'], media['hash']])
+        return 200, {'accepted': accepted, 'missing': missing}
+
+    def sync_put(self, args: list, query: dict, body: bytes) -> tuple:
+        if len(args) != 3 or args[0] != 'media':
+            raise HttpError(404, 'not found')
+        kind, key = args[1], args[2]
+        if hashlib.sha256(body).hexdigest() != query.get('hash'):
+            raise HttpError(400, 'the hash does not match the content')
+
+        with self.sync_lock:
+            record = self.service.record(key)
+            if record is None or record['deleted']:
+                raise HttpError(404, f'{key} is not in the database')
+            if not self.service.write_media(kind, key, query.get('ext', ''), body):
+                raise HttpError(400, f"{kind} .{query.get('ext', '')} is not supported")
+            self.sync_log.touch([record], query.get('device', ''))
+        return 200, {'stored': query['hash']}
+
+    @staticmethod
+    def _int(query: dict, name: str, default: int) -> int:
+        """Return a positive integer query parameter."""
+        try:
+            value = int(query.get(name, default))
+        except ValueError:
+            raise HttpError(400, f'{name} is not an integer')
+        if value <= 0:
+            raise HttpError(400, f'{name} must be positive')
+        return value
+
+    @staticmethod
+    def _date(query: dict, name: str) -> datetime | None:
+        """Return an ISO date or datetime query parameter, None if it is not given."""
+        if not query.get(name):
+            return None
+        try:
+            return datetime.fromisoformat(query[name])
+        except ValueError:
+            raise HttpError(400, f'{name} is not an ISO date')
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> tuple | None:
+        """
+        Read a request from the connection.
+
+        Returns:
+            The method, the path, the query parameters, the headers (lower case) and the body. None if the client
+            closed the connection.
+        """
+        try:
+            line = await reader.readline()
+        except ValueError:  # the line is over the limit of the stream
+            raise HttpError(400, 'request line too long')
+        if not line.strip():
+            return None
+
+        try:
+            method, target, _ = line.decode('latin-1').split()
+        except ValueError:
+            raise HttpError(400, 'bad request line')
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+            if len(headers) > 100:
+                raise HttpError(400, 'too many headers')
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, 'bad content-length')
+        if length > MAX_BODY:
+            raise HttpError(413, 'body too large')
+        body = await reader.readexactly(length) if length else b''
+
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        return method.upper(), url.path, query, headers, body
+
+    @staticmethod
+    def _response(status: int, payload, keep_alive: bool) -> bytes:
+        """Encode the payload, the content of a file is answered as it is."""
+        if isinstance(payload, tuple):
+            body, content_type = payload
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode('latin-1') + body
+
+
+def main() -> None:
+    """Parse the arguments and run the server."""
+    project_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+    parser = argparse.ArgumentParser(description='Serve the vocabulary database as a local JSON API.')
+    parser.add_argument('--data-dir', default=os.path.join(project_dir, 'database'), help='the database directory')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=4, help='number of worker threads')
+    parser.add_argument('--backlog', type=int, default=64, help='number of requests waiting for a worker')
+    args = parser.parse_args()
+
+    server = ApiServer(VocabularyService(args.data_dir), args.workers, args.backlog)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
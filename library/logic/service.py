@@ -0,0 +1,698 @@
+"""
+`library/logic/service.py`
+\nThis module consists of:
+    - `VocabularyService`
+
+It is the vocabulary database without the user interface: looking up the dictionary, adding and updating vocabulary,
+searching, getting the vocabulary to practice and finding the media files. The database directory is given explicitly,
+so it is used by the app (see [`get_service`](/reference/#library.logic.database.get_service)) as well as by the
+[`server`](/reference/#library.logic.server) and scripts.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import shutil
+import threading as th
+
+from library.logic.distractors import DistractorIndex, load_distractor_index
+from library.logic.entries import EntryStore, senses
+from library.logic.file_lock import FileLock
+from library.logic.keys import KeyIndex, canonical_key, file_stamp, normalize, split_vocabulary
+from library.logic.lazy_import import lazy_import
+from library.logic.media_queue import MediaQueue
+from library.logic.metrics import get_metrics
+from library.logic.online_dictionary import CambridgeDictionary
+from library.logic.practice_session import PracticeSession
+from library.logic.scheduler import SpacedRepetition
+from library.logic.sync import MediaHashes, SyncState, newer, now_ms
+
+pd = lazy_import('pandas')
+
+COLUMNS = ['Vocabulary', 'Type', 'Level', 'Translation', 'Description', 'Example', 'CreatedAt', 'UpdatedAt',
+           'UpdatedBy', 'Deleted']
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+NEW_ROW = {column: '' for column in COLUMNS}
+MEDIA = {'image': ('images', ('png', 'jpeg', 'jpg')), 'sound': ('sounds', ('mp3',))}
+
+
+class VocabularyService:
+    """
+    The operations on the vocabulary database in `data_dir`. The schedule, the distractor index and the media queue are
+    created at the first use, the app passes the functions returning its shared ones instead. Changes to the database
+    are serialized by a lock, so the service can be used by several threads, and by a
+    [`FileLock`](/reference/#library.logic.file_lock.FileLock) of the csv file, so the app and the
+    [`server`](/reference/#library.logic.server) can change the same database directory at the same time. The rows are
+    found by the canonical key of the vocabulary, and selected by the level, the word type and the time they are added,
+    through the [`KeyIndex`](/reference/#library.logic.keys.KeyIndex). The table is read once and kept until the csv
+    file changes. Every change of a row gives it a new version for the [`sync`](/reference/#library.logic.sync), and a
+    deleted row is kept as a tombstone.
+    """
+
+    def __init__(self, data_dir: str, scheduler=None, distractors=None, media_queue=None):
+        """
+        Args:
+            data_dir: The database directory, which contains `vocabulary.csv`, `images` and `sounds`.
+            scheduler: A function returning the
+                [`SpacedRepetition`](/reference/#library.logic.scheduler.SpacedRepetition).
+            distractors: A function returning the
+                [`DistractorIndex`](/reference/#library.logic.distractors.DistractorIndex).
+            media_queue: A function returning the [`MediaQueue`](/reference/#library.logic.media_queue.MediaQueue).
+        """
+        self.data_dir = os.path.abspath(data_dir)
+        self.vocabulary_file = os.path.join(self.data_dir, 'vocabulary.csv')
+        for folder, _ in MEDIA.values():
+            os.makedirs(os.path.join(self.data_dir, folder), exist_ok=True)
+
+        self._providers = {
+            'scheduler': scheduler or (lambda: SpacedRepetition(os.path.join(self.data_dir, 'schedule.json'))),
+            'distractors': distractors or (lambda: load_distractor_index(self.data_dir, self.vocabularies())),
+            'media_queue': media_queue or (lambda: MediaQueue(os.path.join(self.data_dir, 'media_queue.json'))),
+            'sync_state': lambda: SyncState(os.path.join(self.data_dir, 'sync_state.json')),
+            'media_hashes': lambda: MediaHashes(os.path.join(self.data_dir, 'media_hashes.json')),
+        }
+        self._shared = {}
+        self._lock = th.RLock()
+        # the csv file is read, changed and replaced as a whole, the other processes must wait
+        self._file_lock = FileLock(self.vocabulary_file + '.lock')
+        self._table = None
+        self._table_stamp = None
+        self.index = KeyIndex(os.path.join(self.data_dir, 'vocabulary_keys.json'), self.vocabulary_file, self.table)
+        self.entries = EntryStore(os.path.join(self.data_dir, 'entries.sqlite3'))
+
+    def _get(self, name: str):
+        """Return the shared object, create it at the first call."""
+        with self._lock:
+            if name not in self._shared:
+                self._shared[name] = self._providers[name]()
+            return self._shared[name]
+
+    @property
+    def scheduler(self) -> SpacedRepetition:
+        return self._get('scheduler')
+
+    @property
+    def distractors(self) -> DistractorIndex:
+        return self._get('distractors')
+
+    @property
+    def media_queue(self) -> MediaQueue:
+        return self._get('media_queue')
+
+    @property
+    def sync_state(self) -> SyncState:
+        return self._get('sync_state')
+
+    @property
+    def media_hashes(self) -> MediaHashes:
+        return self._get('media_hashes')
+
+    def lookup(self, word: str) -> dict:
+        """
+        Look up the word from the Cambridge Dictionary.
+
+        Args:
+            word: The text to be searched.
+
+        Returns:
+            A dictionary of the word, the entries from
+            [`CambridgeDictionary`](/reference/#library.logic.online_dictionary.CambridgeDictionary), the chinese
+            translation and the link of the pronunciation.
+        """
+        # a new instance per lookup, `CambridgeDictionary` keeps the result of the lookup in its attributes
+        res, translation, sound = CambridgeDictionary().check(word)
+        return {'word': word.strip(), 'dictionary': res, 'translation': translation,
+                'sound_url': getattr(sound, 'url', '') if sound else ''}
+
+    def table(self) -> pd.DataFrame:
+        """
+        Return the table of the csv file, it is read again only if the file has been changed. The columns missing in an
+        old csv file are added, 'CreatedAt' is a datetime column and the others are strings. The table is shared, do not
+        modify it.
+
+        Returns:
+            The DataFrame with the columns in `COLUMNS`, empty if there is no csv file.
+        """
+        with self._lock:
+            stamp = file_stamp(self.vocabulary_file)
+            if self._table is None or stamp != self._table_stamp:
+                self._table = self._read() if stamp else pd.DataFrame({column: [] for column in COLUMNS}, dtype=str)
+                self._table['CreatedAt'] = pd.to_datetime(self._table['CreatedAt'], errors='coerce')
+                self._table_stamp = stamp
+                keys = self._table['Vocabulary'].map(canonical_key)
+                if stamp and keys[keys != ''].duplicated().any():
+                    with self._file_lock:
+                        if file_stamp(self.vocabulary_file) == stamp:  # not changed by another process meanwhile
+                            self._merge_duplicates()
+            return self._table
+
+    def _merge_duplicates(self) -> None:
+        """
+        Merge the rows of the same canonical key in an old csv file, e.g. 'run (verb)' and then 'Run', into the last of
+        them, otherwise only the last row would be found. The different definitions, examples and translations are
+        joined by '; ', the earliest 'CreatedAt' is kept, and the merged row gets a new version for the sync. The csv
+        file before the merge is kept as `vocabulary-before-merge-<time>.csv`.
+        """
+        df = self._table.copy()
+        keys = df['Vocabulary'].map(canonical_key)
+        keep, merged = [], []
+        for key, rows in df.groupby(keys, sort=False).groups.items():
+            rows = list(rows)
+            live = [row for row in rows if not df.at[row, 'Deleted']] or rows[-1:]
+            if not key or len(rows) == 1:
+                keep += rows
+                continue
+
+            last = live[-1]
+            types = [df.at[row, 'Type'] or normalize('Type', split_vocabulary(df.at[row, 'Vocabulary'])[1])
+                     for row in live]
+            values = {'Type': next((value for value in reversed(types) if value), '')}
+            for column in ('Translation', 'Description', 'Example'):
+                texts = [df.at[row, column].strip() for row in live if df.at[row, column].strip()]
+                values[column] = '; '.join(dict.fromkeys(texts))
+            values['Level'] = next((df.at[row, 'Level'] for row in reversed(live) if df.at[row, 'Level']), '')
+            values['CreatedAt'] = df.loc[live, 'CreatedAt'].min()
+            if len(live) > 1:
+                values.update(self._new_version(df.loc[live, 'UpdatedAt'].map(self._updated_at).max()))
+            df = self._set_row(df, df.index.get_loc(last), values)
+            keep.append(last)
+            merged.append(f"{key} ({len(rows)} rows)")
+
+        backup = os.path.join(self.data_dir, f"vocabulary-before-merge-{pd.Timestamp.now():%Y%m%dT%H%M%S}.csv")
+        shutil.copyfile(self.vocabulary_file, backup)
+        if self._write(df.loc[sorted(keep)].reset_index(drop=True)):
+            print(f"VocabularyService: the rows of the same vocabulary are merged, {', '.join(merged)}. The csv file "
+                  f"before the merge is {backup}")
+
+    def _read(self) -> pd.DataFrame:
+        """Read the csv file, an old file written in ISO-8859-1 is still readable."""
+        try:
+            data = pd.read_csv(self.vocabulary_file, dtype=str, keep_default_na=False, encoding='utf-8')
+        except UnicodeDecodeError:
+            data = pd.read_csv(self.vocabulary_file, dtype=str, keep_default_na=False, encoding='ISO-8859-1')
+
+        data = data.drop(columns=[column for column in data.columns if column.startswith('Unnamed:')])
+        for column in COLUMNS:
+            if column not in data.columns:
+                data[column] = ''
+        return data[COLUMNS + [column for column in data.columns if column not in COLUMNS]]
+
+    @get_metrics().timed('database.update')
+    def add(self, word: str, definition: str, example: str, photo: str = '', sound_file: str | None = None,
+            sound_url: str = '', on_media_done=None, level: str | None = None, translation: str | None = None,
+            entry: dict | None = None) -> bool:
+        """
+        Add the vocabulary to the database, the existing row of the vocabulary (of the same canonical key, e.g. 'Run'
+        and 'run (verb)') is updated in place. The photo and the sound link are downloaded in the background by the
+        media queue.
+
+        Args:
+            word: The vocabulary, it may include the word type, e.g. 'run (verb)'.
+            definition: The definition of the vocabulary.
+            example: The example of the vocabulary.
+            photo: The source link of the photo of the vocabulary.
+            sound_file: An mp3 file to be copied to the database.
+            sound_url: The link of the mp3 file to be downloaded.
+            on_media_done: A callback called with the job and the result (True/ False) once the photo is downloaded.
+            level: The CEFR level, e.g. 'B2'. None keeps the level of the existing row.
+            translation: The translation of the vocabulary. None keeps the translation of the existing row.
+            entry: The full dictionary entry, saved to the [`EntryStore`](/reference/#library.logic.entries.EntryStore).
+                None keeps the saved entry.
+
+        Returns:
+            True if successful, False if the word is empty, or no definition/ example/ photo is given, or the database
+            cannot be written.
+        """
+        if not word.strip() or not any([definition, example, photo]):
+            return False
+
+        with self._lock, self._file_lock:
+            df = self.table().copy()
+            word, word_type = split_vocabulary(word)
+            row = self.index.slot(word)
+            if row is None or row >= len(df):
+                row, old = len(df), dict(NEW_ROW, CreatedAt=pd.Timestamp.now())
+            elif df['Deleted'].iat[row]:  # a deleted vocabulary is added again
+                old = dict(NEW_ROW, CreatedAt=pd.Timestamp.now(), UpdatedAt=df['UpdatedAt'].iat[row])
+            else:
+                old = df.iloc[row]
+
+            # the word type, the level and the translation are kept if they are not given
+            values = {'Vocabulary': word,
+                      'Type': (normalize('Type', word_type) or old['Type']
+                               or normalize('Type', split_vocabulary(old['Vocabulary'])[1])),
+                      'Level': normalize('Level', level) if level is not None else old['Level'],
+                      'Translation': translation.strip() if translation is not None else old['Translation'],
+                      'Description': definition.strip(),
+                      'Example': example.strip(),
+                      'CreatedAt': old['CreatedAt'] if not pd.isna(old['CreatedAt']) else pd.Timestamp.now()}
+            values['CreatedAt'] = pd.Timestamp(values['CreatedAt']).floor('s')
+            values.update(self._new_version(old['UpdatedAt']))
+            df = self._set_row(df, row, values)
+            if not self._write(df):
+                return False
+            self.index.set(row, word, values['Level'], values['Type'], values['CreatedAt'])
+            self.index.save()
+            if entry:
+                self.entries.put(word, entry)
+
+            # add the word to the look-alike table of the multiple-choice practice
+            self.distractors.add(word.lower())
+
+        # add image file
+        key = canonical_key(word)
+        if photo.startswith('http') and os.path.basename(photo) != 'no_image.png':
+            jpeg = os.path.join(self.data_dir, 'images', f'{key}.jpg')
+            self.media_queue.enqueue(photo, jpeg, kind='photo', on_done=on_media_done)
+
+        # add sound file
+        mp3 = os.path.join(self.data_dir, 'sounds', f'{key}.mp3')
+        if sound_file:
+            shutil.copy(sound_file, mp3)
+        elif sound_url.startswith('http'):
+            self.media_queue.enqueue(sound_url, mp3, kind='sound')
+
+        return True
+
+    def delete(self, word: str) -> bool:
+        """
+        Delete the vocabulary, its row is kept as a tombstone so the deletion is synced to the other devices. The photo,
+        the sound and the dictionary entry are removed.
+
+        Args:
+            word: The vocabulary in any form, e.g. 'Run' or 'run (verb)'.
+
+        Returns:
+            True if successful, False if the vocabulary is not in the database or the database cannot be written.
+        """
+        with self._lock, self._file_lock:
+            row = self.index.get(word)
+            df = self.table()
+            if row is None or row >= len(df):
+                return False
+
+            values = dict(NEW_ROW, Vocabulary=df['Vocabulary'].iat[row], CreatedAt=df['CreatedAt'].iat[row])
+            values.update(self._new_version(df['UpdatedAt'].iat[row]), Deleted='1')
+            df = self._set_row(df.copy(), row, values)
+            if not self._write(df):
+                return False
+            self.index.set(row, values['Vocabulary'], '', '', values['CreatedAt'], deleted=True)
+            self.index.save()
+            self._remove_media(values['Vocabulary'])
+            self.distractors.remove(split_vocabulary(values['Vocabulary'])[0].lower())
+        return True
+
+    def record(self, word: str) -> dict | None:
+        """
+        Get the sync record of the vocabulary, including a tombstone.
+
+        Args:
+            word: The vocabulary in any form, e.g. 'Run' or 'run (verb)'.
+
+        Returns:
+            A dictionary of the row, its version and the hashes of its media, see `records`. None if the vocabulary has
+            never been in the database.
+        """
+        with self._lock:
+            row = self.index.slot(word)
+            data = self.table()
+            if row is None or row >= len(data):
+                return None
+            return self._record(data.iloc[row])
+
+    def records(self, since: int | None = None, device: str | None = None, keys=None) -> list:
+        """
+        Get the sync records of the rows, the tombstones included.
+
+        Args:
+            since: Only the rows changed after this time (milliseconds since the epoch) by `device`. All rows if None.
+            device: The device id, used with `since`.
+            keys: Only the rows of these canonical keys.
+
+        Returns:
+            A list of dictionaries of key, vocabulary, type, level, translation, description, example, created_at,
+            updated_at, device, deleted and media `{kind: {'hash': sha256, 'ext': extension}}`.
+        """
+        with self._lock:
+            data = self.table()
+            rows = self.index.rows if keys is None else {key: self.index.rows[key] for key in keys
+                                                            if key in self.index.rows}
+            res = []
+            for key, row in rows.items():
+                if row >= len(data):
+                    continue
+                if since is not None and not (self._updated_at(data['UpdatedAt'].iat[row]) > since
+                                              and data['UpdatedBy'].iat[row] == device):
+                    continue
+                res.append(self._record(data.iloc[row]))
+            self.media_hashes.save()
+            return res
+
+    def apply(self, records: list) -> list:
+        """
+        Apply the records from another device, a record replaces the local row if it is newer by the last-write-wins
+        rule (see [`newer`](/reference/#library.logic.sync.newer)). The media are not changed except the media of a
+        vocabulary deleted.
+
+        Args:
+            records: The records from `records` of another device.
+
+        Returns:
+            The canonical keys of the records applied.
+        """
+        applied = []
+        with self._lock, self._file_lock:
+            df = self.table().copy()
+            rows = {}  # {key: (row, values)}
+            for record in records:
+                try:
+                    key = canonical_key(record['vocabulary'])
+                    row = rows[key][0] if key in rows else self.index.slot(key)
+                    local = self._record(df.iloc[row], media=False) if row is not None and row < len(df) else None
+                    if not key or not newer(record, local):
+                        continue
+                    values = {'Vocabulary': str(record['vocabulary']).strip(),
+                              'Type': normalize('Type', record['type']),
+                              'Level': normalize('Level', record['level']),
+                              'Translation': str(record['translation']),
+                              'Description': str(record['description']),
+                              'Example': str(record['example']),
+                              'CreatedAt': pd.to_datetime(record['created_at'] or None, errors='coerce'),
+                              'UpdatedAt': str(int(record['updated_at'])),
+                              'UpdatedBy': str(record['device']),
+                              'Deleted': '1' if record['deleted'] else ''}
+                except (KeyError, TypeError, ValueError) as e:
+                    print(f"Exception from VocabularyService.apply:\n\t{e}")
+                    continue
+
+                row = len(df) if row is None or row >= len(df) else row
+                df = self._set_row(df, row, values)
+                rows[key] = (row, values)
+
+            if not rows or not self._write(df):
+                return []
+            applied = list(rows)
+            for row, values in rows.values():
+                self.index.set(row, values['Vocabulary'], values['Level'], values['Type'], values['CreatedAt'],
+                               deleted=bool(values['Deleted']))
+                word = split_vocabulary(values['Vocabulary'])[0].lower()
+                if values['Deleted']:
+                    self._remove_media(values['Vocabulary'])
+                    self.distractors.remove(word)
+                else:
+                    self.distractors.add(word)
+            self.index.save()
+
+        return applied
+
+    def media_hash(self, kind: str, word: str) -> dict | None:
+        """
+        Get the hash of the photo or the sound file of the vocabulary.
+
+        Args:
+            kind: 'image' or 'sound'.
+            word: The vocabulary in any form or its key.
+
+        Returns:
+            A dictionary of the sha256 and the extension of the file, None if there is no such file.
+        """
+        file = self.media_file(kind, word)
+        if file is None:
+            return None
+        with self._lock:
+            digest = self.media_hashes.get(file)
+        return {'hash': digest, 'ext': os.path.splitext(file)[1][1:].lower()} if digest else None
+
+    def write_media(self, kind: str, word: str, ext: str, content: bytes) -> bool:
+        """
+        Save the photo or the sound file of the vocabulary, it replaces the file of any other extension.
+
+        Args:
+            kind: 'image' or 'sound'.
+            word: The vocabulary in any form or its key.
+            ext: The extension of the file, e.g. 'jpg'.
+            content: The content of the file.
+
+        Returns:
+            True if successful, False if the kind or the extension is not supported.
+        """
+        key = canonical_key(word)
+        if kind not in MEDIA or ext.lower() not in MEDIA[kind][1] or not key or key.startswith('.'):
+            return False
+
+        folder, extensions = MEDIA[kind]
+        file = os.path.join(self.data_dir, folder, f'{key}.{ext.lower()}')
+        with open(file + '.tmp', 'wb') as f:
+            f.write(content)
+        os.replace(file + '.tmp', file)
+        for other in extensions:
+            if other != ext.lower() and os.path.isfile(os.path.join(self.data_dir, folder, f'{key}.{other}')):
+                os.remove(os.path.join(self.data_dir, folder, f'{key}.{other}'))
+        return True
+
+    def exists(self, word: str) -> bool:
+        """
+        Check if the vocabulary is in the database.
+
+        Args:
+            word: The vocabulary in any form, e.g. 'Run' or 'run (verb)'.
+        """
+        with self._lock:
+            return word in self.index
+
+    def entry(self, word: str) -> dict | None:
+        """
+        Get the row of the vocabulary.
+
+        Args:
+            word: The vocabulary in any form, e.g. 'Run' or 'run (verb)'.
+
+        Returns:
+            A dictionary of the row, None if it is not in the database.
+        """
+        with self._lock:
+            row = self.index.get(word)
+            data = self.table()
+        if row is None or row >= len(data):
+            return None
+
+        return self._row(data.iloc[row])
+
+    def has_senses(self, word: str) -> bool:
+        """Check if the full dictionary entry of the vocabulary was saved, without decoding it."""
+        with self._lock:
+            return word in self.entries
+
+    @get_metrics().timed('database.senses')
+    def senses(self, word: str) -> list:
+        """
+        Get all the senses of the vocabulary saved when it was added, the entry is decoded here only.
+
+        Args:
+            word: The vocabulary in any form, e.g. 'Run' or 'run (verb)'.
+
+        Returns:
+            A list of dictionaries of the senses, see [`senses`](/reference/#library.logic.entries.senses). An empty
+            list if no entry was saved.
+        """
+        with self._lock:
+            return senses(self.entries.get(word))
+
+    def vocabularies(self) -> list:
+        """Return the vocabulary in the database, the rows replaced by a later row of the same key are skipped."""
+        with self._lock:
+            rows = self.index.select()
+            data = self.table()
+        return data['Vocabulary'].iloc[rows].tolist()
+
+    @get_metrics().timed('database.search')
+    def search(self, text: str, limit: int = 100) -> list:
+        """
+        Find the vocabulary containing the text, case-insensitively.
+
+        Args:
+            text: The text to be searched, all vocabulary are returned if it is empty.
+            limit: Maximum number of rows.
+
+        Returns:
+            A list of dictionaries of the rows, sorted by the vocabulary.
+        """
+        with self._lock:
+            rows = self.index.select()
+            data = self.table()
+        data = data.iloc[rows]
+        data = data[data['Vocabulary'].str.lower().str.contains(text.strip().lower(), regex=False)]
+        data = data.sort_values('Vocabulary').head(limit)
+        return [self._row(row) for _, row in data.iterrows()]
+
+    @get_metrics().timed('database.get_data')
+    def practice_data(self, num: int, method: str = 'all', level: str | None = None, word_type: str | None = None,
+                      since=None, until=None) -> pd.DataFrame | None:
+        """
+        Get vocabulary to practice. The rows are selected by the index with the filters first, then a random sample of
+        them, or the latest of them in random order, or the most overdue of them for review (the vocabulary never
+        reviewed if none is due), depends on the method given (all/ latest/ review).
+
+        Args:
+            num: Number of vocabulary to be extracted.
+            method: all/ latest/ review defines the data selection method.
+            level: Only the vocabulary of the CEFR level, e.g. 'B2'.
+            word_type: Only the vocabulary of the word type, e.g. 'verb'.
+            since: Only the vocabulary added at or after this datetime.
+            until: Only the vocabulary added before this datetime.
+
+        Returns:
+            Dataframe contains the required data to practice/ None if no .csv file in the database.
+        """
+        if not os.path.isfile(self.vocabulary_file):
+            return None
+
+        with self._lock:
+            data = self.table()
+            rows = self.index.select(level, word_type, since, until)
+            if method == 'latest':
+                rows = rows[-num:]
+                random.shuffle(rows)
+            elif method == 'review':
+                # the most overdue first, the schedule is keyed by the canonical keys
+                scheduler = self.scheduler
+                if level or word_type or since is not None or until is not None:
+                    keys = {canonical_key(data['Vocabulary'].iat[row]): row for row in rows}
+                    due = [keys[key] for key in scheduler.due(num, among=keys)]
+                else:  # the heap of the whole schedule, the vocabulary deleted is skipped
+                    due = [row for row in map(self.index.get, scheduler.due(num)) if row is not None]
+                if not due:  # nothing to review, practice the vocabulary never reviewed
+                    new = [row for row in rows if canonical_key(data['Vocabulary'].iat[row]) not in scheduler.cards]
+                    due = random.sample(new, min(num, len(new)))
+                rows = due
+            else:
+                rows = random.sample(rows, min(num, len(rows)))
+
+        return data.iloc[rows].reset_index(drop=True)
+
+    def distinct(self, column: str) -> list:
+        """
+        Return the levels or the word types in the database, e.g. to choose the filter of the practice.
+
+        Args:
+            column: 'Level' or 'Type'.
+        """
+        with self._lock:
+            return self.index.distinct(column)
+
+    def practice_batch(self, num: int, method: str = 'all', options: int = 3, **filters) -> list:
+        """
+        Get the cards to practice with the options of the multiple-choice question.
+
+        Args:
+            num: Number of cards.
+            method: all/ latest/ review, see `practice_data`.
+            options: Number of wrong options of each card.
+            **filters: level, word_type, since and until, see `practice_data`.
+
+        Returns:
+            A list of dictionaries of the [`Card`](/reference/#library.logic.practice_session.Card) and its shuffled
+            options.
+        """
+        data = self.practice_data(num, method, **filters)
+        if data is None:
+            return []
+
+        cards = []
+        for card in PracticeSession.from_dataframe(data, self.data_dir).cards:
+            with self._lock:
+                choices = self.distractors.distractors(card.answer, options) + [card.answer]
+            random.shuffle(choices)
+            cards.append(dict(zip(card.__slots__, card.to_list()), answer=card.answer, options=choices))
+
+        return cards
+
+    def media_file(self, kind: str, word: str) -> str | None:
+        """
+        Find the photo or the sound file of the vocabulary.
+
+        Args:
+            kind: 'image' or 'sound'.
+            word: The vocabulary in any form or its key.
+
+        Returns:
+            The file path, None if there is no such file.
+        """
+        if kind not in MEDIA:
+            return None
+
+        folder, extensions = MEDIA[kind]
+        key = canonical_key(word)
+        if not key or key.startswith('.'):
+            return None
+
+        for ext in extensions:
+            file = os.path.join(self.data_dir, folder, f'{key}.{ext}')
+            if os.path.isfile(file):
+                return file
+
+        return None
+
+    def _write(self, df: pd.DataFrame) -> bool:
+        """Write the table to the csv file and keep it as the table, a crash while writing leaves the old file."""
+        try:
+            df.to_csv(self.vocabulary_file + '.tmp', index=False, date_format=TIME_FORMAT)
+            os.replace(self.vocabulary_file + '.tmp', self.vocabulary_file)
+        except Exception as e:
+            print(f"Exception from VocabularyService._write:\n\t{e}")
+            return False
+        self._table, self._table_stamp = df, file_stamp(self.vocabulary_file)
+        return True
+
+    @staticmethod
+    def _set_row(df: pd.DataFrame, row: int, values: dict) -> pd.DataFrame:
+        """Set the values of the row, or append the row if it is the row after the last."""
+        if row == len(df):
+            df = pd.concat([df, pd.DataFrame([values])], ignore_index=True, axis=0)
+            df['CreatedAt'] = pd.to_datetime(df['CreatedAt'], errors='coerce')
+        else:
+            for column, value in values.items():
+                df.at[df.index[row], column] = value
+        return df
+
+    def _new_version(self, updated_at) -> dict:
+        """Return the version of a change of the row, it is always greater than the version it replaces."""
+        return {'UpdatedAt': str(max(now_ms(), self._updated_at(updated_at) + 1)),
+                'UpdatedBy': self.sync_state.device_id, 'Deleted': ''}
+
+    @staticmethod
+    def _updated_at(value) -> int:
+        """Convert the 'UpdatedAt' of a row to an integer, 0 for the rows written before the sync."""
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return 0
+
+    def _record(self, row, media: bool = True) -> dict:
+        """Convert a row of the table to a sync record."""
+        record = dict(self._row(row), key=canonical_key(row['Vocabulary']),
+                      updated_at=self._updated_at(row['UpdatedAt']), device=row['UpdatedBy'],
+                      deleted=bool(row['Deleted']), media={})
+        if media and not record['deleted']:
+            for kind in MEDIA:
+                media_hash = self.media_hash(kind, record['key'])
+                if media_hash:
+                    record['media'][kind] = media_hash
+        return record
+
+    def _remove_media(self, word: str) -> None:
+        """Remove the photo, the sound file and the dictionary entry of the vocabulary."""
+        for kind in MEDIA:
+            file = self.media_file(kind, word)
+            if file:
+                os.remove(file)
+        self.entries.delete(word)
+
+    @staticmethod
+    def _row(row) -> dict:
+        """Convert a row of the table to a dictionary."""
+        created = row['CreatedAt']
+        return {'vocabulary': row['Vocabulary'], 'type': row['Type'], 'level': row['Level'],
+                'translation': row['Translation'], 'description': row['Description'], 'example': row['Example'],
+                'created_at': '' if pd.isna(created) else created.strftime(TIME_FORMAT)}
@@ -0,0 +1,355 @@
+"""
+`library/logic/sync.py`
+\nThis module consists of:
+    - `newer`
+    - `host_id`
+    - `SyncState`
+    - `SyncLog`
+    - `MediaHashes`
+    - `SyncClient`
+    - `main`
+
+It synchronizes the vocabulary database of several devices, e.g. a lab PC and a laptop, through the
+[`server`](/reference/#library.logic.server) running on one of them. Only the rows changed since the last sync and the
+media files the other side does not have are sent.
+
+Every row has a version: 'UpdatedAt' (milliseconds since the epoch) and 'UpdatedBy' (the device id). A deleted row is
+kept as a tombstone ('Deleted' is '1'), so the deletion is synced as well. When two devices have changed the same
+vocabulary, the row with the greater (UpdatedAt, UpdatedBy) wins on every device (last write wins, the device id breaks
+the ties). The photo and the sound follow the row they belong to, and they are sent by their sha256.
+
+The server numbers the changes it accepts, so a device asks for the changes after the last number it has seen, whatever
+the clocks of the devices are. Run `python -m library.logic.sync --url http://<server>:8765` from the project
+directory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import time
+import uuid
+
+from library.logic.lazy_import import lazy_import
+
+requests = lazy_import('requests')
+
+
+def now_ms() -> int:
+    """Return the current time in milliseconds since the epoch."""
+    return int(time.time() * 1000)
+
+
+def newer(record: dict, local: dict | None) -> bool:
+    """
+    Check if a record wins over the local row by the last-write-wins rule.
+
+    Args:
+        record: A record from
+            [`VocabularyService.records`](/reference/#library.logic.service.VocabularyService.records).
+        local: The record of the local row, None if there is no local row.
+
+    Returns:
+        True if the record is newer, i.e. its (updated_at, device) is greater.
+    """
+    if local is None:
+        return True
+    return (record['updated_at'], record['device']) > (local['updated_at'], local['device'])
+
+
+def host_id() -> str:
+    """Return an id of this machine: the machine-id of the system if there is one, the hostname and the MAC address."""
+    machine = ''
+    for file in ('/etc/machine-id', '/var/lib/dbus/machine-id'):
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                machine = f.read().strip()
+            break
+        except OSError:
+            continue
+    return hashlib.sha256(f'{machine}|{socket.gethostname()}|{uuid.getnode()}'.encode('utf-8')).hexdigest()[:16]
+
+
+class SyncState:
+    """
+    The sync state of a device, saved in the database directory: the device id, the last change number pulled from the
+    server (`cursor`), the time of the last push (`pushed_at`) and the hashes of the media pushed.
+
+    The state is bound to the machine which created it. A database directory copied to another machine, the usual way
+    to set up a second device, would otherwise have the same device id, and the server would not send either machine
+    the changes of the other one. If the state was created on another machine, a new device id is created and the
+    cursor is reset, so the next sync pushes and pulls every row once.
+    """
+
+    def __init__(self, file: str):
+        self.file = file
+        self.host = host_id()
+        self.device_id = ''
+        self.cursor = 0
+        self.pushed_at = None
+        self.media = {}  # {key: {kind: hash}}
+        self.load()
+
+    def load(self) -> None:
+        """Load the state, a new device id is created at the first use."""
+        if os.path.isfile(self.file):
+            try:
+                with open(self.file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get('host') == self.host:
+                    self.device_id = state['device_id']
+                    self.cursor = state.get('cursor', 0)
+                    self.pushed_at = state.get('pushed_at')
+                    self.media = state.get('media', {})
+                else:
+                    print(f"SyncState: {self.file} was created on another machine, a new device id is created")
+            except Exception as e:
+                print(f"Exception from SyncState.load:\n\t{e}")
+
+        if not self.device_id:
+            self.device_id = uuid.uuid4().hex[:12]
+            self.save()
+
+    def save(self) -> None:
+        """Save the state."""
+        state = {'device_id': self.device_id, 'host': self.host, 'cursor': self.cursor, 'pushed_at': self.pushed_at,
+                 'media': self.media}
+        try:
+            with open(self.file + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(self.file + '.tmp', self.file)
+        except Exception as e:
+            print(f"Exception from SyncState.save:\n\t{e}")
+
+
+class SyncLog:
+    """
+    The change numbers of the server. Each vocabulary key has the number of its last change, the device which made it,
+    so a device is not sent back its own changes, and the version of the row, so the changes made on the server itself
+    (e.g. by the app using the same database directory) are numbered when they are seen.
+    """
+
+    def __init__(self, file: str):
+        self.file = file
+        self.seq = 0
+        self.keys = {}  # {key: [seq, device, version]}
+        if os.path.isfile(file):
+            try:
+                with open(file, 'r', encoding='utf-8') as f:
+                    log = json.load(f)
+                self.seq, self.keys = log['seq'], log['keys']
+            except Exception as e:
+                print(f"Exception from SyncLog:\n\t{e}")
+
+    @staticmethod
+    def version(record: dict) -> str:
+        """Return the version of a record as a string."""
+        return f"{record['updated_at']}:{record['device']}"
+
+    def touch(self, records: list, device: str = '') -> None:
+        """
+        Give the rows changed a new change number and save the log.
+
+        Args:
+            records: The records of the rows changed.
+            device: The device which made the change, '' for the server itself.
+        """
+        for record in records:
+            self.seq += 1
+            self.keys[record['key']] = [self.seq, device, self.version(record)]
+        self.save()
+
+    def observe(self, records: list) -> None:
+        """Number the rows whose version is not the one in the log, i.e. changed on the server after the last sync."""
+        changed = [record for record in records
+                   if record['key'] not in self.keys or self.keys[record['key']][2] != self.version(record)]
+        if changed:
+            self.touch(changed)
+
+    def since(self, cursor: int, device: str = '') -> list:
+        """Return the keys changed after the change number, except the ones last changed by the device."""
+        return [key for key, (seq, by, _) in self.keys.items() if seq > cursor and (not device or by != device)]
+
+    def save(self) -> None:
+        try:
+            with open(self.file + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'seq': self.seq, 'keys': self.keys}, f)
+            os.replace(self.file + '.tmp', self.file)
+        except Exception as e:
+            print(f"Exception from SyncLog.save:\n\t{e}")
+
+
+class MediaHashes:
+    """The sha256 of the media files, kept with their size and modified time so a file is hashed once."""
+
+    def __init__(self, file: str):
+        self.file = file
+        self.hashes = {}  # {path: [size, mtime_ns, hash]}
+        self.changed = False
+        if os.path.isfile(file):
+            try:
+                with open(file, 'r', encoding='utf-8') as f:
+                    self.hashes = json.load(f)
+            except Exception as e:
+                print(f"Exception from MediaHashes:\n\t{e}")
+
+    def get(self, path: str) -> str | None:
+        """Return the sha256 of the file, None if it does not exist."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        cached = self.hashes.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self.hashes[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        self.changed = True
+        return digest
+
+    def save(self) -> None:
+        """Save the hashes if any has been computed."""
+        if not self.changed:
+            return
+        try:
+            with open(self.file + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self.hashes, f)
+            os.replace(self.file + '.tmp', self.file)
+            self.changed = False
+        except Exception as e:
+            print(f"Exception from MediaHashes.save:\n\t{e}")
+
+
+class SyncClient:
+    """
+    Synchronize the database of a [`VocabularyService`](/reference/#library.logic.service.VocabularyService) with the
+    sync server. A sync pushes the local changes first, then pulls the changes of the other devices.
+    """
+
+    def __init__(self, service, url: str, timeout: float = 30):
+        """
+        Args:
+            service: The vocabulary service of this device.
+            url: The address of the server, e.g. 'http://192.168.1.2:8765'.
+            timeout: Seconds to wait for a response.
+        """
+        self.service = service
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.stats = {}
+
+    def sync(self) -> dict:
+        """
+        Push the local changes and pull the changes of the other devices.
+
+        Returns:
+            The numbers of the rows and the media files sent and received, and the bytes transferred.
+        """
+        self.stats = {'pushed': 0, 'accepted': 0, 'media_sent': 0, 'pulled': 0, 'applied': 0, 'media_received': 0,
+                      'bytes': 0}
+        state = self.service.sync_state
+        self.push(state)
+        self.pull(state)
+        state.save()
+        self.service.media_hashes.save()
+        return self.stats
+
+    def push(self, state: SyncState) -> None:
+        """Send the rows changed by this device since the last push, and the media files the server asks for."""
+        started = now_ms()
+        records = self.service.records(since=state.pushed_at, device=state.device_id)
+
+        # the media downloaded after its row was pushed, e.g. by the media queue
+        keys = {record['key'] for record in records}
+        for record in self.service.records():
+            if record['key'] not in keys and not record['deleted'] \
+                    and self._hashes(record) != state.media.get(record['key'], {}):
+                records.append(record)
+
+        if records:
+            answer = self._request('POST', '/sync/changes', json={'device': state.device_id, 'changes': records})
+            self.stats['pushed'] += len(records)
+            self.stats['accepted'] += len(answer['accepted'])
+            for kind, key, digest in answer['missing']:
+                file = self.service.media_file(kind, key)
+                if file is None or self.service.media_hash(kind, key)['hash'] != digest:
+                    continue
+                with open(file, 'rb') as f:
+                    params = {'hash': digest, 'ext': os.path.splitext(file)[1][1:], 'device': state.device_id}
+                    self._request('PUT', f'/sync/media/{kind}/{key}', params=params, data=f.read())
+                self.stats['media_sent'] += 1
+
+        for record in records:
+            state.media[record['key']] = self._hashes(record)
+        state.pushed_at = started
+
+    def pull(self, state: SyncState) -> None:
+        """Get the changes of the other devices after the cursor, apply the newer rows and fetch their media."""
+        answer = self._request('GET', '/sync/changes', params={'since': state.cursor, 'device': state.device_id})
+        records = answer['changes']
+        self.stats['pulled'] += len(records)
+        self.stats['applied'] += len(self.service.apply(records))
+
+        for record in records:
+            local = self.service.record(record['key'])
+            if record['deleted'] or local is None or (local['updated_at'], local['device']) != \
+                    (record['updated_at'], record['device']):
+                continue  # the local row is newer
+            for kind, media in record['media'].items():
+                current = self.service.media_hash(kind, record['key'])
+                if current and current['hash'] == media['hash']:
+                    continue
+                content = self._request('GET', f"/sync/media/{kind}/{record['key']}", raw=True)
+                if content is None or hashlib.sha256(content).hexdigest() != media['hash']:
+                    print(f"SyncClient: {kind} of {record['key']} is not on the server, it is fetched next time")
+                    continue
+                self.service.write_media(kind, record['key'], media['ext'], content)
+                self.stats['media_received'] += 1
+            state.media[record['key']] = self._hashes(self.service.record(record['key']))
+
+        state.cursor = answer['cursor']
+
+    @staticmethod
+    def _hashes(record: dict) -> dict:
+        """Return the hashes of the media of a record, {kind: hash}."""
+        return {kind: media['hash'] for kind, media in record['media'].items()}
+
+    def _request(self, method: str, path: str, raw: bool = False, **kwargs):
+        """
+        Send a request to the server.
+
+        Returns:
+            The json of the response, or the content if `raw` is True (None if the file is not found).
+        """
+        res = self.session.request(method, self.url + path, timeout=self.timeout, **kwargs)
+        self.stats['bytes'] += len(res.content) + len(res.request.body or b'')
+        if raw and res.status_code == 404:
+            return None
+        res.raise_for_status()
+        return res.content if raw else res.json()
+
+
+def main() -> None:
+    """Parse the arguments and sync the database."""
+    os.environ.setdefault('KIVY_NO_ARGS', '1')  # kivy must not parse the arguments of the command
+    from library.logic.service import VocabularyService
+
+    project_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+    parser = argparse.ArgumentParser(description='Synchronize the vocabulary database with the sync server.')
+    parser.add_argument('--url', required=True, help="the address of the server, e.g. 'http://192.168.1.2:8765'")
+    parser.add_argument('--data-dir', default=os.path.join(project_dir, 'database'), help='the database directory')
+    args = parser.parse_args()
+
+    stats = SyncClient(VocabularyService(args.data_dir), args.url).sync()
+    print(', '.join(f'{name} {value}' for name, value in stats.items()))
+
+
+if __name__ == '__main__':
+    main()
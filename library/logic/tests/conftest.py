@@ -0,0 +1,10 @@
+"""
+`library/logic/tests/conftest.py`
+\nThe tests of the logic modules, run `python -m pytest library` from the project directory.
+"""
+
+import os
+
+# kivy must not parse the arguments of pytest
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+
+from library.logic import audio
+from library.logic.audio import AudioManager, AudioQueue
+
+
+class FakeSound:
+    def __init__(self, file):
+        self.file = file
+        self.state = 'stop'
+        self.events = []
+
+    def play(self):
+        self.state = 'play'
+        self.events.append('play')
+
+    def stop(self):
+        self.state = 'stop'
+        self.events.append('stop')
+
+    def unload(self):
+        self.events.append('unload')
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """The files loaded by the sound loader, in order."""
+    loaded = []
+    monkeypatch.setattr(audio.SoundLoader, 'load',
+                        lambda file: loaded.append(os.path.basename(file)) or FakeSound(file))
+    monkeypatch.setattr(audio.Clock, 'schedule_once', lambda callback, timeout: callback(0))
+    return loaded
+
+
+def sounds(tmp_path, num):
+    files = []
+    for i in range(num):
+        (tmp_path / f'{i}.mp3').write_bytes(b'mp3')
+        files.append(str(tmp_path / f'{i}.mp3'))
+    return files
+
+
+def test_manager_keeps_the_recent_and_playing_sounds(tmp_path, loaded):
+    files = sounds(tmp_path, 4)
+    manager = AudioManager(max_sounds=2)
+    playing = manager.play(files[0])
+    manager.load(files[1])
+    manager.load(files[2])
+    assert [file in manager for file in files] == [True, False, True, False]  # the playing sound is not evicted
+
+    playing.stop()
+    assert manager.load(files[2]) is manager.load(files[2])
+    manager.load(files[3])
+    assert [file in manager for file in files] == [False, False, True, True]
+    assert playing.events == ['play', 'stop', 'unload'] and loaded == ['0.mp3', '1.mp3', '2.mp3', '3.mp3']
+
+
+def test_manager_loads_a_changed_file_again(tmp_path, loaded):
+    file = sounds(tmp_path, 1)[0]
+    manager = AudioManager()
+    old = manager.play(file)
+    os.utime(file, ns=(0, 0))
+
+    new = manager.play(file)
+    assert new is not old and old.events == ['play', 'stop', 'unload'] and new.state == 'play'
+    assert manager.load(str(tmp_path / 'missing.mp3')) is None and len(manager) == 1
+
+
+def wait(done):
+    deadline = time.monotonic() + 5
+    while not done() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert done()
+
+
+def test_queue_plays_in_order_with_the_next_files_loaded(tmp_path, loaded):
+    files = sounds(tmp_path, 6)
+    queue = AudioQueue(AudioManager(max_sounds=8), ahead=2)
+    queue.start(files)
+    wait(lambda: len(loaded) == 2)
+    assert loaded == ['0.mp3', '1.mp3']  # only the files ahead are loaded
+
+    played = []
+    for i in range(6):
+        played.append(os.path.basename(queue.next().file))
+        wait(lambda: len(loaded) == min(i + 3, 6))
+    assert played == [f'{i}.mp3' for i in range(6)] and loaded == played
+    assert queue.next() is None and queue.current is None
+
+
+def test_queue_stop_forgets_the_files_being_loaded(tmp_path, loaded):
+    files = sounds(tmp_path, 4)
+    queue = AudioQueue(AudioManager(), ahead=3)
+    queue._executor.submit(time.sleep, 0.2)  # the files are read after this
+    queue.start(files)
+    sound = queue.next()  # not loaded yet, it is loaded when it is played
+    assert loaded == ['0.mp3'] and sound.state == 'play'
+
+    queue.stop()
+    time.sleep(0.4)
+    assert sound.events == ['play', 'stop'] and loaded == ['0.mp3'] and queue.current is None
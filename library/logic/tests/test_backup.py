@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from library.logic import backup
+from library.logic.backup import BackupRepository
+
+
+@pytest.fixture
+def source(tmp_path):
+    source = tmp_path / 'database'
+    (source / 'sounds').mkdir(parents=True)
+    (source / 'vocabulary.csv').write_text('Vocabulary\nrun\n')
+    (source / 'sounds' / 'run.mp3').write_bytes(b'mp3' * 1000)
+    (source / 'vocabulary.csv.tmp').write_text('partial')
+    return source
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return BackupRepository(str(tmp_path / 'backups'))
+
+
+def test_backup_is_incremental(source, repo):
+    first = repo.backup(str(source))
+    assert sorted(first['files']) == ['sounds/run.mp3', 'vocabulary.csv']
+    assert first['stats']['hashed'] == 2
+
+    (source / 'vocabulary.csv').write_text('Vocabulary\nrun\nwalk\n')
+    second = repo.backup(str(source))
+    assert second['id'] != first['id']
+    assert second['stats']['hashed'] == 1
+    assert second['stats']['copied_bytes'] == len('Vocabulary\nrun\nwalk\n')
+    assert second['files']['sounds/run.mp3'] == first['files']['sounds/run.mp3']
+    assert repo.snapshots() == [first['id'], second['id']]
+
+
+def test_restore(source, repo, tmp_path):
+    first = repo.backup(str(source))
+    (source / 'vocabulary.csv').write_text('broken')
+    (source / 'extra.txt').write_text('not in the snapshot')
+
+    assert repo.restore(first['id'], str(source), paths=['vocabulary.csv']) == ['vocabulary.csv']
+    assert (source / 'vocabulary.csv').read_text() == 'Vocabulary\nrun\n'
+    assert (source / 'extra.txt').exists()
+
+    assert repo.restore('latest', str(source), clean=True) == []
+    assert not (source / 'extra.txt').exists()
+
+    target = tmp_path / 'restored'
+    assert sorted(repo.restore('latest', str(target))) == ['sounds/run.mp3', 'vocabulary.csv']
+    assert (target / 'sounds' / 'run.mp3').read_bytes() == b'mp3' * 1000
+
+
+def test_verify_and_prune(source, repo):
+    first = repo.backup(str(source))
+    (source / 'vocabulary.csv').write_text('changed')
+    second = repo.backup(str(source))
+    assert repo.verify('latest') == []
+
+    assert repo.prune(keep=1) == 1  # the first vocabulary.csv
+    assert repo.snapshots() == [second['id']]
+    assert first['files']['sounds/run.mp3'] == second['files']['sounds/run.mp3']
+    assert repo.verify(second['id']) == []
+
+    with open(repo.blob_path(second['files']['vocabulary.csv']['hash']), 'wb') as f:
+        f.write(b'damaged')
+    assert repo.verify('latest') == ['vocabulary.csv']
+
+
+def test_backup_skips_the_repository_inside_the_source(source):
+    repo = BackupRepository(os.path.join(str(source), 'backups'))
+    assert sorted(repo.backup(str(source))['files']) == ['sounds/run.mp3', 'vocabulary.csv']
+    assert sorted(repo.backup(str(source))['files']) == ['sounds/run.mp3', 'vocabulary.csv']
+
+
+def test_snapshots_of_the_same_second_are_in_order(source, repo, monkeypatch):
+    monkeypatch.setattr(backup.time, 'strftime', lambda fmt: '20240101T120000')
+    ids = []
+    for i in range(12):
+        (source / 'vocabulary.csv').write_text(f'Vocabulary\nrun{i}\n')
+        ids.append(repo.backup(str(source))['id'])
+
+    assert ids[:3] == ['20240101T120000', '20240101T120000-1', '20240101T120000-2'] and ids[-1] == '20240101T120000-11'
+    assert repo.snapshots() == ids
+    assert repo.manifest('latest')['id'] == ids[-1]
+
+    repo.prune(keep=3)
+    assert repo.snapshots() == ids[-3:]
+    (source / 'vocabulary.csv').write_text('broken')
+    assert repo.restore('latest', str(source)) == ['vocabulary.csv']
+    assert (source / 'vocabulary.csv').read_text() == 'Vocabulary\nrun11\n'
@@ -0,0 +1,76 @@
+import numpy as np
+
+from library.logic.distractors import DistractorIndex, load_distractor_index
+from library.logic.service import VocabularyService
+
+WORDS = ['station', 'nation', 'relation', 'ration', 'banana', 'bandana', 'cabana', 'apple', 'apply', 'ample']
+
+
+def index(tmp_path, words=WORDS, neighbours=3):
+    index = DistractorIndex(str(tmp_path / 'distractors.npz'), neighbours=neighbours)
+    index.build(words)
+    return index
+
+
+def neighbours(index, word):
+    return {index.words[i] for i in index.neighbours[index.word_ids[word]] if i >= 0}
+
+
+def test_build_keeps_the_most_similar_words(tmp_path):
+    table = index(tmp_path)
+    assert neighbours(table, 'nation') == {'station', 'relation', 'ration'}
+    assert table.distractors('banana', 2) == ['bandana', 'cabana']
+    assert table.distractors('apple', 2) == ['apply', 'ample']
+    assert 'nation' not in neighbours(table, 'nation')
+    assert all(np.all(np.diff(scores) <= 0) for scores in table.scores)
+
+
+def test_add_finds_the_same_look_alikes_as_build(tmp_path):
+    built = index(tmp_path)
+    added = DistractorIndex(str(tmp_path / 'added.npz'), neighbours=3)
+    for word in WORDS:
+        added.add(word, save=False)
+
+    for word in WORDS:
+        assert set(added.distractors(word, 2)) == set(built.distractors(word, 2))
+
+
+def test_remove(tmp_path):
+    table = index(tmp_path)
+    table.remove('station')
+
+    assert 'station' not in table.word_ids and len(table.words) == len(WORDS) - 1
+    assert table.counts.shape[0] == table.neighbours.shape[0] == table.scores.shape[0] == len(table.words)
+    assert 'station' not in table.distractors('nation', 9)
+    assert neighbours(table, 'nation') == {'relation', 'ration'}
+    assert neighbours(table, 'apple') == {'apply', 'ample'}
+
+    table.add('stationery')
+    assert 'stationery' in neighbours(table, 'nation')
+
+
+def test_sync_and_load(tmp_path):
+    table = index(tmp_path)
+    table.sync(WORDS[1:] + ['banner'])
+    assert table.words == WORDS[1:] + ['banner']
+
+    loaded = DistractorIndex(table.index_file, neighbours=3)
+    assert loaded.words == table.words
+    assert np.array_equal(loaded.neighbours, table.neighbours) and np.array_equal(loaded.scores, table.scores)
+    assert loaded.distractors('bandana', 3) == table.distractors('bandana', 3)
+
+    # a table of another size is built again
+    assert DistractorIndex(table.index_file, neighbours=4).words == []
+
+
+def test_service_keeps_the_index_of_the_vocabulary(tmp_path):
+    service = VocabularyService(str(tmp_path))
+    for word in ['café', 'cafe', 'zebra', 'zebras']:
+        assert service.add(word, 'definition', 'example')
+    assert service.delete('zebra')
+    assert set(service.distractors.words) == {'café', 'cafe', 'zebras'}
+
+    # the tombstone is not read back, and the utf-8 vocabulary is not garbled
+    reloaded = load_distractor_index(service.data_dir, VocabularyService(str(tmp_path)).vocabularies())
+    assert set(reloaded.words) == {'café', 'cafe', 'zebras'}
+    assert reloaded.distractors('cafe', 1) == ['café']
@@ -0,0 +1,46 @@
+import threading as th
+
+from library.logic.entries import EntryStore, senses
+
+ENTRY = {'word': 'run', 'translation': '跑',
+         'dictionary': {'uk': [{'gen_info': ['run', 'verb'],
+                                'meanings': [{'word_function': 'MOVE FAST',
+                                              'definitions': [{'level': 'A1', 'explanation': ' to move fast ',
+                                                               'examples': ['I run. ', ' ']}]}]}],
+                        'us': None, 'business_english': []}}
+
+
+def test_round_trip(tmp_path):
+    store = EntryStore(str(tmp_path / 'entries.sqlite3'))
+    assert store.get('run') is None and 'run' not in store
+
+    assert store.put('Run (verb)', ENTRY)
+    assert store.get('run') == ENTRY
+    assert EntryStore.decode(store.raw(' RUN ')) == ENTRY
+    assert 'run' in store
+
+    store.put('run', {'word': 'run'})
+    assert store.get('run') == {'word': 'run'}
+    store.delete('Run')
+    assert 'run' not in store
+
+
+def test_concurrent_puts(tmp_path):
+    store = EntryStore(str(tmp_path / 'entries.sqlite3'))
+
+    def put(thread):
+        for i in range(30):
+            assert store.put(f'w{thread}_{i}', {'word': f'w{thread}_{i}'})
+
+    threads = [th.Thread(target=put, args=(thread,)) for thread in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(f'w{thread}_{i}' in store for thread in range(4) for i in range(30))
+
+
+def test_senses():
+    assert senses(None) == []
+    assert senses(ENTRY) == [{'region': 'uk', 'form': 'verb', 'word_function': 'MOVE FAST', 'level': 'A1',
+                              'explanation': 'to move fast', 'examples': ['I run.']}]
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from library.logic.keys import KeyIndex, canonical_key, normalize, split_vocabulary
+from library.logic.service import VocabularyService
+
+
+def table(*rows):
+    return pd.DataFrame([dict(zip(('Vocabulary', 'Level', 'Type', 'CreatedAt', 'Deleted'), row)) for row in rows])
+
+
+@pytest.fixture
+def csv(tmp_path):
+    file = tmp_path / 'vocabulary.csv'
+    file.write_text('x')  # only the stamp of the file is used by the index
+    return file
+
+
+def test_canonical_key():
+    assert canonical_key('Look Up (phrasal verb)') == 'look_up'
+    assert canonical_key(' run ') == canonical_key('RUN (verb)') == 'run'
+    assert split_vocabulary('run (verb)') == ('run', '(verb)')
+    assert normalize('Level', 'b2') == 'B2' and normalize('Level', 'X9') == ''
+    assert normalize('Type', ' (Phrasal  Verb) ') == 'phrasal verb'
+
+
+def test_build_and_select(tmp_path, csv):
+    data = table(('run (verb)', 'A1', '', '2024-01-01', ''),
+                 ('apple', 'A1', 'noun', '2024-02-01', ''),
+                 ('gone', 'B2', 'adjective', '2024-03-01', '1'),
+                 ('walk', 'B2', 'verb', None, ''))
+    index = KeyIndex(str(tmp_path / 'keys.json'), str(csv), lambda: data)
+
+    assert index.get('Run') == 0 and 'apple' in index and 'gone' not in index
+    assert index.slot('gone') == 2
+    assert len(index) == 3
+    assert index.select() == [0, 1, 3]
+    assert index.select(level='a1') == [0, 1]
+    assert index.select(word_type='verb') == [0, 3]  # the type of an old row is in the vocabulary
+    assert index.select(since='2024-01-15') == [1]
+    assert index.select(until='2024-01-15') == [0]
+    assert index.distinct('Level') == ['A1', 'B2']
+
+    # the saved index is loaded without the loader while the csv file is not changed
+    loaded = KeyIndex(str(tmp_path / 'keys.json'), str(csv), lambda: pytest.fail('the index is rebuilt'))
+    assert loaded.rows == index.rows and loaded.select(level='B2') == [3]
+
+
+def test_set_replaces_and_appends_rows(tmp_path, csv):
+    index = KeyIndex(str(tmp_path / 'keys.json'), str(csv), lambda: table(('run', 'A1', 'verb', '2024-01-01', '')))
+
+    index.set(0, 'Run', 'C1', 'noun', '2024-05-01')
+    assert index.select(level='A1') == [] and index.select(level='C1', word_type='noun') == [0]
+    assert index.select(since='2024-04-01') == [0]
+
+    index.set(1, 'apple', 'A2', 'noun', '2024-06-01')
+    assert index.size == 2 and index.get('Apple') == 1
+    assert index.select(word_type='noun') == [0, 1]
+
+    index.set(1, 'apple', '', '', '2024-06-01', deleted=True)
+    assert 'apple' not in index and index.select(word_type='noun') == [0]
+
+
+def test_build_reports_hidden_rows(tmp_path, csv, capsys):
+    data = table(('run (verb)', '', '', None, ''), ('Run', '', '', None, ''))
+    index = KeyIndex(str(tmp_path / 'keys.json'), str(csv), lambda: data)
+    assert index.get('run') == 1
+    assert 'run (verb)' in capsys.readouterr().out
+
+
+def test_service_merges_the_rows_of_the_same_key(tmp_path):
+    data_dir = tmp_path / 'database'
+    data_dir.mkdir()
+    (data_dir / 'vocabulary.csv').write_text('Vocabulary,Description,Example\n'
+                                             'run (verb),to move fast,I run.\n'
+                                             'walk,to go,I walk.\n'
+                                             'Run,a period of running,A morning run.\n')
+    service = VocabularyService(str(data_dir))
+
+    assert service.vocabularies() == ['walk', 'Run']
+    run = service.entry('run')
+    assert run['description'] == 'to move fast; a period of running'
+    assert run['example'] == 'I run.; A morning run.'
+    assert run['type'] == 'verb'
+    assert list(data_dir.glob('vocabulary-before-merge-*.csv'))
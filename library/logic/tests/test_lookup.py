@@ -0,0 +1,115 @@
+import asyncio
+import os
+import socket
+import threading as th
+
+import pytest
+
+from library.logic import online_dictionary
+from library.logic.lookup_client import LookupClient, trusted_socket
+from library.logic.lookup_daemon import LookupCache, LookupDaemon
+
+RESULT = {'res': {'uk': [{'gen_info': ['run', 'verb']}], 'us': None}, 'translation': '跑', 'sound_url': '',
+          'sound': ''}
+NOT_FOUND = {'res': {'uk': [], 'us': None}, 'translation': '', 'sound_url': '', 'sound': ''}
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = LookupDaemon(str(tmp_path / 'lookup.sock'), LookupCache())
+    yield daemon
+    daemon.executor.shutdown()
+
+
+def fetcher(results):
+    """A slow fetch of the dictionary, it returns the next result and records the words fetched."""
+    fetched = []
+    release = th.Event()
+
+    def fetch(word):
+        fetched.append(word)
+        release.wait(5)
+        return results.pop(0)
+
+    return fetch, fetched, release
+
+
+def test_single_flight(daemon):
+    fetch, fetched, release = fetcher([RESULT])
+    daemon.fetchers['dictionary'] = fetch
+
+    async def lookups():
+        tasks = [asyncio.create_task(daemon.resolve('dictionary', word)) for word in ['run', ' Run', 'RUN '] * 4]
+        await asyncio.sleep(0.1)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(lookups()) == [RESULT] * 12
+    assert fetched == ['run']
+    assert asyncio.run(daemon.resolve('dictionary', 'run')) == RESULT  # from the cache
+    assert fetched == ['run'] and not daemon._in_flight
+
+
+def test_not_found_and_failures_are_not_cached(daemon):
+    fetch, fetched, release = fetcher([NOT_FOUND, RuntimeError])
+    release.set()
+
+    def fail_once(word):
+        result = fetch(word)
+        if result is RuntimeError:
+            raise RuntimeError('timeout')
+        return result
+
+    daemon.fetchers['dictionary'] = fail_once
+    assert asyncio.run(daemon.resolve('dictionary', 'zzz')) == NOT_FOUND
+    assert asyncio.run(daemon.resolve('dictionary', 'zzz')) is None
+    assert fetched == ['zzz', 'zzz'] and len(daemon.cache) == 0
+
+
+def test_client_through_the_socket(daemon):
+    fetch, fetched, release = fetcher([RESULT])
+    release.set()
+    daemon.fetchers['dictionary'] = fetch
+
+    async def serve():
+        server = await asyncio.start_unix_server(daemon.handle, daemon.path)
+        async with server:
+            client = LookupClient(daemon.path)
+            return await asyncio.get_running_loop().run_in_executor(None, client.dictionary, 'run')
+
+    assert asyncio.run(serve()) == (RESULT['res'], '跑', '')
+    assert fetched == ['run']
+
+
+def test_trusted_socket(tmp_path):
+    path = str(tmp_path / 'lookup.sock')
+    assert not trusted_socket(path)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+        os.chmod(tmp_path, 0o755)
+        assert trusted_socket(path)
+
+        # anyone could have replaced the socket
+        os.chmod(tmp_path, 0o1777)
+        assert not trusted_socket(path)
+        assert not LookupClient(path).available
+        os.chmod(tmp_path, 0o700)
+
+    (tmp_path / 'file').write_text('')
+    assert not trusted_socket(str(tmp_path / 'file'))
+
+
+def test_fallback_when_the_daemon_is_down(tmp_path, monkeypatch):
+    path = str(tmp_path / 'lookup.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)  # a socket left by a daemon which is not running
+    client = LookupClient(path, retry_after=30)
+    assert client.available
+    assert client.dictionary('run') is None
+    assert not client.available  # not asked again for a while
+    assert LookupClient('off').request('stats', '') is None
+
+    monkeypatch.setattr(online_dictionary, 'get_lookup_client', lambda: client)
+    monkeypatch.setattr(online_dictionary.CambridgeDictionary, 'fetch', lambda self, word: ('web', word, ''))
+    assert online_dictionary.CambridgeDictionary().check('run') == ('web', 'run', '')
@@ -0,0 +1,91 @@
+import json
+import threading as th
+import time
+
+import pytest
+
+from library.logic import media_queue
+from library.logic.media_queue import MediaQueue
+
+
+class ImmediateTimer:
+    """A retry timer without the delay."""
+
+    def __init__(self, delay, function, args):
+        self.delays.append(delay)
+        self.function, self.args = function, args
+        self.daemon = False
+
+    def start(self):
+        self.function(*self.args)
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_queue.Clock, 'schedule_once', lambda callback, timeout: callback(0))
+    monkeypatch.setattr(ImmediateTimer, 'delays', [], raising=False)
+    monkeypatch.setattr(th, 'Timer', ImmediateTimer)
+    return MediaQueue(str(tmp_path / 'media_queue.json'), workers=1)
+
+
+def wait(done):
+    deadline = time.monotonic() + 5
+    while not done() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert done()
+
+
+def test_order_and_replaced_jobs(queue, tmp_path):
+    started, release = th.Event(), th.Event()
+    downloads, results = [], []
+
+    def download(job):
+        started.set()
+        release.wait(5)
+        downloads.append(job['url'])
+        return True
+
+    queue._download = download
+    on_done = lambda job, result: results.append((job['url'], result))  # noqa: E731
+    queue.enqueue('http://a', str(tmp_path / 'a.jpg'), on_done=on_done)
+    started.wait(5)
+    queue.enqueue('http://b', str(tmp_path / 'b.jpg'), on_done=on_done)
+    queue.enqueue('http://c', str(tmp_path / 'c.mp3'), kind='sound', on_done=on_done)
+    queue.enqueue('http://b2', str(tmp_path / 'b.jpg'), on_done=on_done)  # replaces the pending download of b
+    assert [job['url'] for job in queue.pending()] == ['http://a', 'http://b2', 'http://c']
+    with open(queue.queue_file, 'r', encoding='utf-8') as f:
+        assert [job['url'] for job in json.load(f)] == ['http://a', 'http://b2', 'http://c']
+
+    release.set()
+    wait(lambda: len(results) == 3)
+    assert downloads == ['http://a', 'http://c', 'http://b2']
+    assert results == [('http://a', True), ('http://c', True), ('http://b2', True)]
+    with open(queue.queue_file, 'r', encoding='utf-8') as f:
+        assert json.load(f) == []
+
+
+def test_retry_then_fail(queue, tmp_path):
+    attempts, results = [], []
+    queue._download = lambda job: attempts.append(job['attempts']) or len(attempts) == 2
+    queue.enqueue('http://a', str(tmp_path / 'a.jpg'), on_done=lambda job, result: results.append(result))
+    wait(lambda: len(results) == 1)
+    assert attempts == [0, 1] and results == [True]
+
+    attempts.clear()
+    queue._download = lambda job: attempts.append(job['attempts']) and False
+    queue.enqueue('http://b', str(tmp_path / 'b.jpg'), on_done=lambda job, result: results.append(result))
+    wait(lambda: len(results) == 2)
+    assert attempts == [0, 1, 2] and results == [True, False]
+    assert ImmediateTimer.delays == [2, 2, 4]  # a growing delay
+
+
+def test_resume_the_saved_jobs(queue, tmp_path):
+    jobs = [{'url': 'http://a', 'dst': str(tmp_path / 'a.jpg'), 'kind': 'photo', 'attempts': 2}]
+    with open(queue.queue_file, 'w', encoding='utf-8') as f:
+        json.dump(jobs, f)
+
+    downloads = []
+    queue._download = lambda job: downloads.append((job['url'], job['attempts'])) or True
+    queue.start()
+    wait(lambda: not queue.pending())
+    assert downloads == [('http://a', 0)]
@@ -0,0 +1,99 @@
+import threading as th
+import time
+
+import pytest
+
+from library.logic import photo_cache
+from library.logic.photo_cache import PhotoPrefetcher, TextureCache
+from library.logic.search_photos import PhotoStream
+from library.logic.tests.test_search_photos import PAGES, FakeIStockPhoto
+
+
+class FakeTexture:
+    def __init__(self, size):
+        self.width, self.height = size
+        self.colorfmt = 'rgba'
+
+    @classmethod
+    def create(cls, size, colorfmt):
+        return cls(size)
+
+    def blit_buffer(self, *args, **kwargs):
+        pass
+
+    def flip_vertical(self):
+        pass
+
+
+def test_texture_cache_drops_the_least_recently_used():
+    cache = TextureCache(max_bytes=3 * 400)
+    for url in 'abc':
+        cache.put(url, FakeTexture((10, 10)))
+    assert cache.get('a') is not None  # 'b' is the least recently used now
+    cache.put('d', FakeTexture((10, 10)))
+    assert 'b' not in cache and [url in cache for url in 'acd'] == [True] * 3
+    assert cache.nbytes == 3 * 400
+
+    cache.put('e', FakeTexture((20, 20)))  # a texture over the budget is kept alone
+    assert len(cache) == 1 and cache.get('e') is not None and cache.get('a') is None
+
+
+@pytest.fixture
+def main_thread(monkeypatch):
+    """The calls scheduled on the main thread, `run` calls them until `done` returns True."""
+    calls = []
+    monkeypatch.setattr(photo_cache.Clock, 'schedule_once', lambda callback, timeout: calls.append(callback))
+    monkeypatch.setattr(photo_cache, 'Texture', FakeTexture)
+
+    def run(done):
+        deadline = time.monotonic() + 5
+        while True:
+            while calls:
+                calls.pop(0)(0)
+            if done() or time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+        assert done()
+
+    return run
+
+
+def test_prefetcher_fills_the_stream_in_the_background(main_thread):
+    filled = []
+    istock = FakeIStockPhoto(PAGES)
+    prefetcher = PhotoPrefetcher(TextureCache(), on_filled=lambda: filled.append(1))
+    stream = PhotoStream(istock, ['run'])
+
+    release = th.Event()
+    search = istock.search_photos
+    istock.search_photos = lambda url: release.wait(5) and search(url)
+    prefetcher.fill(stream, 2)
+    prefetcher.fill(stream, 3)  # the stream is being filled, it is filled again after `on_filled`
+    release.set()
+    main_thread(lambda: filled)
+    assert stream[:] == ['r1', 'r2'] and filled == [1]
+
+    prefetcher.fill(stream, 2)  # the links are fetched already
+    prefetcher.fill(stream, 4)
+    main_thread(lambda: len(filled) == 2)
+    assert stream[:] == ['r1', 'r2', 'r3', 'r4'] and istock.requested == [('run', 1), ('run', 2)]
+
+
+def test_prefetcher_cancel_drops_the_stale_results(main_thread, monkeypatch):
+    ready, filled = [], []
+    cache = TextureCache()
+    prefetcher = PhotoPrefetcher(cache, on_ready=ready.append, on_filled=lambda: filled.append(1))
+    release = th.Event()
+    monkeypatch.setattr(prefetcher, '_download', lambda url: release.wait(5) and ((2, 2), b'\0' * 16))
+
+    prefetcher.prefetch(['http://a', 'http://b', 'http://a'])
+    assert prefetcher.is_pending('http://a') and prefetcher.is_pending('http://b')
+    prefetcher.fill(PhotoStream(FakeIStockPhoto(PAGES), ['run']), 2)
+    prefetcher.cancel()
+    prefetcher.prefetch(['http://c'])
+    release.set()
+    main_thread(lambda: ready)
+    time.sleep(0.1)
+    main_thread(lambda: True)
+    assert ready == ['http://c'] and 'http://c' in cache and 'http://a' not in cache and filled == []
+    assert not prefetcher.is_pending('http://c')
@@ -0,0 +1,51 @@
+import io
+
+import numpy as np
+from PIL import Image as PILImage
+from PIL import ImageFilter
+
+from library.logic.photo_hash import PhotoDeduplicator, dhash
+
+
+def photo(seed, size=(640, 480)):
+    """A random photo with smooth shapes, like a downscaled stock photo."""
+    noise = np.random.default_rng(seed).integers(0, 256, (12, 16, 3), dtype=np.uint8)
+    return PILImage.fromarray(noise).resize(size, PILImage.BICUBIC).filter(ImageFilter.GaussianBlur(4))
+
+
+def copy(original, size, quality=60):
+    """A resized and re-encoded copy of the photo."""
+    data = io.BytesIO()
+    original.resize(size, PILImage.LANCZOS).save(data, 'JPEG', quality=quality)
+    return PILImage.open(io.BytesIO(data.getvalue()))
+
+
+def distance(a, b):
+    return bin(dhash(a) ^ dhash(b)).count('1')
+
+
+def test_dhash_of_a_copy_is_close():
+    original = photo(1)
+    assert dhash(original) == dhash(original.copy())
+    assert distance(original, copy(original, (320, 240))) <= 6
+    assert distance(original, copy(original, (200, 150), quality=30)) <= 6
+    assert distance(original, photo(2)) > 6
+
+
+def test_near_duplicates_are_dropped():
+    original = photo(1)
+    dedup = PhotoDeduplicator(threshold=6)
+    photos = {'small': copy(original, (320, 240)), 'large': original, 'other': photo(2),
+              'tiny': copy(original, (160, 120))}
+    for url, image in photos.items():
+        dedup.hash_photo(url, image)
+
+    assert dedup.add('small') is None
+    assert dedup.add('large') == 'small'  # the higher resolution variant is kept
+    assert dedup.add('other') is None
+    assert dedup.add('tiny') == 'tiny'
+    assert dedup.add('large') is None
+    assert dedup.add('unknown') is None
+
+    dedup.reset()
+    assert dedup.is_hashed('tiny') and dedup.add('tiny') is None
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from library.logic.practice_session import PracticeSession
+
+
+def session(tmp_path):
+    (tmp_path / 'sounds').mkdir()
+    (tmp_path / 'sounds' / 'look_up.mp3').write_bytes(b'mp3')
+    data = pd.DataFrame({'Vocabulary': ['Look Up (phrasal verb)', 'run'], 'Type': ['', 'verb'],
+                         'Description': ['to search', 'to move fast'], 'Example': ['Look it up.', 'I run.']})
+    return PracticeSession.from_dataframe(data, str(tmp_path))
+
+
+def test_cards_from_dataframe(tmp_path):
+    cards = session(tmp_path).cards
+    assert [card.key for card in cards] == ['look_up', 'run']
+    assert [card.type for card in cards] == ['(phrasal verb)', '(verb)']
+    assert cards[0].sound == str(tmp_path / 'sounds' / 'look_up.mp3') and cards[1].sound is None
+    assert cards[0].answer == 'look up'
+    assert cards[0].is_correct(' LOOK  up ') and not cards[0].is_correct('look')
+
+
+def test_cursor(tmp_path):
+    practice = session(tmp_path)
+    assert practice.peek(5) == practice.cards
+    assert practice.next_card().key == 'look_up'
+    assert practice.remaining == 1 and [card.key for card in practice.peek()] == ['run']
+    assert practice.next_card().key == 'run'
+    assert practice.next_card() is None and practice.remaining == 0
+
+
+def test_save_and_load(tmp_path):
+    practice = session(tmp_path)
+    practice.next_card()
+    practice.tested, practice.correct = 1, 1
+    practice.save(str(tmp_path / 'session.json'))
+
+    loaded = PracticeSession.load(str(tmp_path / 'session.json'))
+    assert (loaded.cursor, loaded.tested, loaded.correct) == (1, 1, 1)
+    assert [card.to_list() for card in loaded.cards] == [card.to_list() for card in practice.cards]
+    assert loaded.next_card().key == 'run'
+
+
+def test_load_missing_or_broken_session(tmp_path):
+    assert PracticeSession.load(str(tmp_path / 'none.json')) is None
+
+    (tmp_path / 'broken.json').write_text('{"cursor": 1, "tested"')
+    assert PracticeSession.load(str(tmp_path / 'broken.json')) is None
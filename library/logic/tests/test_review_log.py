@@ -0,0 +1,34 @@
+import datetime
+
+from library.logic.review_log import ReviewLog
+
+NOW = datetime.datetime(2024, 5, 1, 12).timestamp()
+
+
+def test_statistics_are_saved_every_few_answers(tmp_path):
+    log = ReviewLog(str(tmp_path), save_every=3)
+    for i in range(5):
+        log.record('run' if i % 2 else 'walk', i < 3, 2.0, timestamp=NOW)
+    assert log.unsaved == 2
+    assert (tmp_path / 'review_log.bin').stat().st_size == 5 * 17
+
+    # the answers after the last save are replayed from the log
+    loaded = ReviewLog(str(tmp_path))
+    assert loaded.words == ['walk', 'run']
+    assert loaded.word_tested[:2].tolist() == [3, 2]
+    assert loaded.word_correct[:2].tolist() == [2, 1]
+    assert loaded.days == {datetime.date(2024, 5, 1).toordinal(): [5, 3]}
+
+
+def test_hardest_words(tmp_path):
+    log = ReviewLog(str(tmp_path))
+    for word, correct, seconds in [('run', True, 1), ('run', True, 1), ('walk', False, 5), ('walk', True, 3),
+                                   ('sit', False, 1)]:
+        log.record(word, correct, seconds, timestamp=NOW)
+    assert [(word, tested) for word, tested, _, _ in log.hardest_words(5)] == [('walk', 2), ('run', 2)]
+
+
+def test_logs_are_separated_by_name(tmp_path):
+    ReviewLog(str(tmp_path), 'dictation').record('run', False, 1.0)
+    assert ReviewLog(str(tmp_path)).words == []
+    assert ReviewLog(str(tmp_path), 'dictation').words == ['run']
@@ -0,0 +1,100 @@
+import heapq
+import time
+
+import pytest
+
+from library.logic.scheduler import DAY, RELEARN_DELAY, SpacedRepetition
+from library.logic.service import VocabularyService
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    return SpacedRepetition(str(tmp_path / 'schedule.json'))
+
+
+def test_review_follows_sm2(scheduler):
+    scheduler.review('run', 5, now=NOW)
+    assert scheduler.cards['run']['due'] == NOW + DAY
+    scheduler.review('run', 5, now=NOW)
+    assert scheduler.cards['run']['due'] == NOW + 6 * DAY
+    scheduler.review('run', 1, now=NOW)
+    assert scheduler.cards['run']['repetitions'] == 0
+    assert scheduler.cards['run']['due'] == NOW + RELEARN_DELAY
+
+
+def test_due_most_overdue_first(scheduler):
+    for i, word in enumerate(['a', 'b', 'c', 'd']):
+        scheduler.add(word, now=NOW - 100 + i)
+    scheduler.review('c', 5, now=NOW)  # due tomorrow
+
+    assert scheduler.due(10, now=NOW) == ['a', 'b', 'd']
+    assert scheduler.due(2, now=NOW) == ['a', 'b']
+    # the cards stay in the schedule until they are reviewed
+    assert scheduler.due(10, now=NOW) == ['a', 'b', 'd']
+
+
+def test_due_among(scheduler):
+    for i in range(2000):
+        scheduler.add(f'w{i}', now=NOW - 2000 + i)
+
+    among = {'w1500', 'w10', 'w999', 'unknown'}
+    assert scheduler.due(10, now=NOW, among=among) == ['w10', 'w999', 'w1500']
+    assert scheduler.due(1, now=NOW, among=among) == ['w10']
+    assert scheduler.due(10, now=NOW - 1500, among=among) == ['w10']
+
+
+def test_due_among_does_not_walk_the_heap(scheduler, monkeypatch):
+    for i in range(2000):
+        scheduler.add(f'w{i}', now=NOW - i)
+    pops = []
+    heappop = heapq.heappop
+    monkeypatch.setattr(heapq, 'heappop', lambda heap: pops.append(1) or heappop(heap))
+
+    assert len(scheduler.due(20, now=NOW, among={f'w{i}' for i in range(0, 40, 2)})) == 20
+    assert pops == []
+    assert scheduler.due(3, now=NOW) == ['w1999', 'w1998', 'w1997']
+    assert len(pops) == 3
+
+
+def test_save_and_load(scheduler):
+    scheduler.add('new', now=NOW)
+    scheduler.review('run', 5, now=NOW)
+    scheduler.save()
+
+    loaded = SpacedRepetition(scheduler.schedule_file)
+    assert loaded.cards == scheduler.cards
+    assert loaded.due(10, now=NOW + DAY) == ['new', 'run']
+
+
+def test_review_practice_does_not_schedule_new_words(tmp_path):
+    service = VocabularyService(str(tmp_path / 'database'))
+    for word in 'abcdef':
+        assert service.add(word, 'definition', 'example')
+
+    # nothing is due, the vocabulary never reviewed is practiced
+    assert len(service.practice_data(3, 'review')) == 3
+    assert service.scheduler.cards == {}
+
+    service.scheduler.review('a', 1, now=time.time() - DAY)
+    service.scheduler.review('b', 5)
+    service.scheduler.review('c', 1, now=time.time() - DAY)
+    assert service.delete('c')
+    assert service.practice_data(10, 'review')['Vocabulary'].tolist() == ['a']
+
+
+def test_review_practice_uses_the_heap_without_a_filter(tmp_path, monkeypatch):
+    service = VocabularyService(str(tmp_path / 'database'))
+    for word, level in zip('abcd', ['B1', 'B2', 'B1', 'B2']):
+        assert service.add(word, 'definition', 'example', level=level)
+        service.scheduler.review(word, 1, now=time.time() - DAY)
+
+    calls = []
+    due = service.scheduler.due
+    monkeypatch.setattr(service.scheduler, 'due', lambda num, among=None: calls.append(among) or due(num, among=among))
+
+    assert service.practice_data(10, 'review')['Vocabulary'].tolist() == ['a', 'b', 'c', 'd']
+    assert calls == [None]
+    assert service.practice_data(10, 'review', level='B2')['Vocabulary'].tolist() == ['b', 'd']
+    assert calls[1] == {'b': 1, 'd': 3}
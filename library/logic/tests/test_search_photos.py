@@ -0,0 +1,49 @@
+import pytest
+
+from library.logic.search_photos import IStockPhoto, PhotoStream
+
+
+class FakeIStockPhoto(IStockPhoto):
+    """The result pages of each phrase are lists of links, the pages requested are recorded."""
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+        self.requested = []
+
+    def search_photos(self, url=''):
+        phrase, page = url[len(self.search_url):].split('&page=')
+        self.requested.append((phrase, int(page)))
+        pages = self.pages.get(phrase, [])
+        return pages[int(page) - 1] if int(page) <= len(pages) else []
+
+
+PAGES = {'run': [['r1', 'r2', 'r3'], ['r3', 'r4']], 'to%20move': [['m1', 'r1', 'm2']]}
+
+
+def test_stream_requests_the_pages_lazily():
+    istock = FakeIStockPhoto(PAGES)
+    stream = PhotoStream(istock, ['run', 'to move'])
+    stream.fill(2)
+    assert stream[0:2] == ['r1', 'r2'] and istock.requested == [('run', 1)]
+
+    stream.fill(4)
+    assert stream[:] == ['r1', 'r2', 'r3', 'r4'] and istock.requested == [('run', 1), ('run', 2)]
+
+    # the links of the earlier pages and phrases are skipped
+    stream.fill(10)
+    assert stream[:] == ['r1', 'r2', 'r3', 'r4', 'm1', 'm2'] and stream.exhausted
+    assert istock.requested[-2:] == [('to%20move', 1), ('to%20move', 2)]
+    assert stream[-1] == 'm2' and len(stream) == 6
+
+
+def test_stream_keeps_the_latest_links():
+    stream = PhotoStream(FakeIStockPhoto({'run': [[f'p{i}' for i in range(10)]]}), ['run'], max_buffered=4)
+    stream.fill(10)
+    assert len(stream) == 10 and stream.start == 6
+    assert stream[0:10] == ['p6', 'p7', 'p8', 'p9']
+    with pytest.raises(IndexError):
+        stream[5]
+
+    stream.remove('p7')
+    assert stream[6:10] == ['p6', 'p8', 'p9']
@@ -0,0 +1,40 @@
+import multiprocessing as mp
+
+from library.logic.service import VocabularyService
+
+
+class NoDistractors:
+    def add(self, word):
+        pass
+
+
+def add_words(data_dir, prefix, num):
+    service = VocabularyService(data_dir, distractors=NoDistractors)
+    for i in range(num):
+        assert service.add(f'{prefix}{i}', 'definition', 'example')
+
+
+def test_add_update_and_search(tmp_path):
+    service = VocabularyService(str(tmp_path))
+    assert service.add('run (verb)', 'to move fast', 'I run.', level='a1', translation='跑')
+    assert service.add('Run', 'to move quickly', 'I run.')
+    assert not service.add('walk', '', '')
+
+    assert service.vocabularies() == ['Run']
+    assert service.entry('RUN') | {'created_at': ''} == {
+        'vocabulary': 'Run', 'type': 'verb', 'level': 'A1', 'translation': '跑', 'description': 'to move quickly',
+        'example': 'I run.', 'created_at': ''}
+    assert [row['vocabulary'] for row in service.search('ru')] == ['Run']
+    assert service.distinct('Level') == ['A1']
+
+
+def test_processes_do_not_lose_rows(tmp_path):
+    context = mp.get_context('spawn')
+    workers = [context.Process(target=add_words, args=(str(tmp_path), prefix, 25)) for prefix in 'ab']
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0, 0]
+
+    assert len(VocabularyService(str(tmp_path)).vocabularies()) == 50
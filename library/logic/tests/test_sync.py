@@ -0,0 +1,87 @@
+import json
+import shutil
+
+import pytest
+
+from library.logic.service import VocabularyService
+from library.logic.sync import SyncState, newer
+
+
+def record(updated_at, device, **values):
+    return dict({'vocabulary': 'run', 'type': '', 'level': '', 'translation': '', 'description': 'to move fast',
+                 'example': '', 'created_at': '', 'updated_at': updated_at, 'device': device, 'deleted': False,
+                 'media': {}}, **values)
+
+
+@pytest.fixture
+def service(tmp_path):
+    return VocabularyService(str(tmp_path / 'database'))
+
+
+def test_newer_compares_time_then_device():
+    assert newer(record(2, 'a'), None)
+    assert newer(record(2, 'a'), record(1, 'z'))
+    assert not newer(record(1, 'z'), record(2, 'a'))
+    assert newer(record(2, 'b'), record(2, 'a'))
+    assert not newer(record(2, 'a'), record(2, 'a'))
+
+
+def test_apply_keeps_the_last_write(service):
+    assert service.add('run', 'local', 'example')
+    local = service.record('run')
+
+    older = record(local['updated_at'] - 1, 'other', description='older')
+    assert service.apply([older]) == []
+    assert service.entry('run')['description'] == 'local'
+
+    later = record(local['updated_at'] + 1, 'other', description='later')
+    assert service.apply([later]) == ['run']
+    assert service.entry('run')['description'] == 'later'
+    assert service.record('run')['device'] == 'other'
+
+
+def test_apply_same_key_twice_in_one_batch(service):
+    assert service.apply([record(1, 'a', description='first'), record(2, 'a', vocabulary='Run', description='second')])
+    assert service.vocabularies() == ['Run']
+    assert service.entry('run')['description'] == 'second'
+
+
+def test_tombstone_is_applied_and_revived(service):
+    assert service.add('run', 'local', 'example')
+    version = service.record('run')['updated_at']
+
+    assert service.apply([record(version + 1, 'other', deleted=True)]) == ['run']
+    assert not service.exists('run')
+    assert service.record('run')['deleted']
+    assert service.vocabularies() == []
+
+    # an older change does not revive the deleted vocabulary, a newer one does
+    assert service.apply([record(version, 'z')]) == []
+    assert service.apply([record(version + 2, 'other', description='again')]) == ['run']
+    assert service.exists('run')
+
+
+def test_delete_keeps_a_tombstone_for_the_sync(service):
+    assert service.add('run', 'local', 'example')
+    version = service.record('run')['updated_at']
+    assert service.delete('Run (verb)')
+    tombstone = service.record('run')
+    assert tombstone['deleted'] and tombstone['updated_at'] > version
+    assert [r['key'] for r in service.records(since=version, device=service.sync_state.device_id)] == ['run']
+
+
+def test_copied_database_gets_a_new_device_id(tmp_path, service):
+    assert service.add('run', 'local', 'example')
+    service.sync_state.cursor = 5
+    service.sync_state.save()
+
+    copy = tmp_path / 'copy'
+    shutil.copytree(service.data_dir, copy)
+    assert SyncState(str(copy / 'sync_state.json')).device_id == service.sync_state.device_id
+
+    state = json.loads((copy / 'sync_state.json').read_text())
+    state['host'] = 'another machine'
+    (copy / 'sync_state.json').write_text(json.dumps(state))
+    moved = SyncState(str(copy / 'sync_state.json'))
+    assert moved.device_id != service.sync_state.device_id
+    assert moved.cursor == 0 and moved.pushed_at is None
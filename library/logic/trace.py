@@ -0,0 +1,173 @@
+"""
+`library/logic/trace.py`
+\nThis module consists of:
+    - `start`
+    - `span`
+    - `add_span`
+    - `until_next_frame`
+    - `save`
+
+It records timed spans of the startup and the navigation in the Chrome trace event format, the trace file can be
+opened in `chrome://tracing` or [Perfetto](https://ui.perfetto.dev). It is enabled by the environment variable
+PRACTICE_ENGLISH_TRACE, e.g. `PRACTICE_ENGLISH_TRACE=trace.json python main.py`. It only uses the standard library, so
+it can be started before kivy is imported.
+"""
+
+import atexit
+import contextlib
+import importlib.abc
+import json
+import os
+import sys
+import threading
+import time
+
+_events = []
+_trace_file = None
+_pid = os.getpid()
+
+
+def enabled() -> bool:
+    """Return True if the tracing is started."""
+    return _trace_file is not None
+
+
+def _now() -> float:
+    """Microseconds of the monotonic clock, the time unit of the trace events."""
+    return time.perf_counter_ns() / 1000
+
+
+def _add(name: str, cat: str, ts: float, dur: float, args: dict | None = None) -> None:
+    """Add a complete event."""
+    event = {'name': name, 'cat': cat, 'ph': 'X', 'ts': ts, 'dur': dur, 'pid': _pid, 'tid': threading.get_ident()}
+    if args:
+        event['args'] = args
+    _events.append(event)
+
+
+class _ImportTracer(importlib.abc.MetaPathFinder):
+    """A meta path finder which times the execution of the modules found by the other finders."""
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TracedLoader(spec.loader)
+                return spec
+        return None
+
+
+class _TracedLoader(importlib.abc.Loader):
+    """Wrap a loader to record a span for executing the module."""
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        start = _now()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            _add(f'import {module.__name__}', 'import', start, _now() - start)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+def start(trace_file: str | None = None) -> None:
+    """
+    Start tracing if the environment variable PRACTICE_ENGLISH_TRACE is set, the trace is saved when the app exits.
+
+    Args:
+        trace_file: Path of the trace file, the value of PRACTICE_ENGLISH_TRACE is used if it is not given.
+    """
+    global _trace_file
+    trace_file = trace_file or os.environ.get('PRACTICE_ENGLISH_TRACE')
+    if not trace_file or enabled():
+        return
+
+    _trace_file = os.path.abspath('practice_english_trace.json' if trace_file == '1' else trace_file)
+    _events.append({'name': 'process_name', 'ph': 'M', 'pid': _pid, 'args': {'name': 'PracticeEnglish'}})
+    sys.meta_path.insert(0, _ImportTracer())
+    atexit.register(save)
+
+
+@contextlib.contextmanager
+def span(name: str, cat: str = 'app', **args):
+    """
+    Record the time of the `with` block as a span, nothing is recorded if the tracing is not started.
+
+    Args:
+        name: Name of the span, e.g. 'build add_vocab'.
+        cat: Category of the span, e.g. 'kv', 'page' or 'navigation'.
+        **args: Extra values shown with the span.
+    """
+    if not enabled():
+        yield
+        return
+
+    begin = _now()
+    try:
+        yield
+    finally:
+        _add(name, cat, begin, _now() - begin, args)
+
+
+def add_span(name: str, cat: str, begin: float, **args) -> None:
+    """
+    Record a span which began before and ends now.
+
+    Args:
+        name: Name of the span.
+        cat: Category of the span.
+        begin: Beginning of the span from `time.perf_counter()`.
+        **args: Extra values shown with the span.
+    """
+    if enabled():
+        _add(name, cat, begin * 1e6, _now() - begin * 1e6, args)
+
+
+def until_next_frame(name: str, cat: str = 'app', **args) -> None:
+    """
+    Record a span from now until the next frame is drawn, e.g. the latency of a navigation as the user sees it.
+
+    Args:
+        name: Name of the span.
+        cat: Category of the span.
+        **args: Extra values shown with the span.
+    """
+    if not enabled():
+        return
+
+    from kivy.core.window import Window
+
+    begin = time.perf_counter()
+
+    def on_flip(*largs):
+        Window.unbind(on_flip=on_flip)
+        add_span(name, cat, begin, **args)
+
+    Window.bind(on_flip=on_flip)
+
+
+def save() -> None:
+    """Write the trace events to the trace file."""
+    if not enabled():
+        return
+
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    events = _events + [{'name': 'thread_name', 'ph': 'M', 'pid': _pid, 'tid': tid, 'args': {'name': name}}
+                        for tid, name in names.items()]
+    try:
+        with open(_trace_file + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        os.replace(_trace_file + '.tmp', _trace_file)
+        print(f"Trace saved to {_trace_file}")
+    except Exception as e:
+        print(f"Exception from trace.save:\n\t{e}")
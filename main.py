@@ -1,70 +1,106 @@
+import time
+startup_time = time.perf_counter()
+
+# set PRACTICE_ENGLISH_TRACE=trace.json to record the imports, kv loading, page building and navigation
+from library.logic import trace
+trace.start()
+
 from kivy.config import Config
 Config.set('graphics', 'resizable', False)
 import os
-from front_ends.cover_page import CoverPage
-from front_ends.add_vocab import AddVocab
-from front_ends.database import Database
-from front_ends.learn_grammar import LearnGrammar
-from front_ends.online_testing import OnlineTesting
-from front_ends.practice_listening import PracticeListening
-from front_ends.practice_vocab import PracticeVocab
-from front_ends.preview import Preview
-from front_ends.read_news import ReadNews
-from front_ends.select_photo import SelectPhoto
-from front_ends.database import PreviewUpdate, SearchPhoto
+import sys
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.core.window import Window
-from kivy.lang import Builder
-from kivy.uix.carousel import Carousel
+from kivy.logger import Logger
+import front_ends.sample_widget  # the widget classes of sample_widget.kv
+from front_ends.metrics_overlay import MetricsOverlay
+from library.logic.kv_cache import kv_saved_time, load_kv
+from library.logic.lazy_import import preimport
+from library.logic.media_queue import get_media_queue
+from library.logic.metrics import get_metrics
+from library.logic.pages import LazyPage, PageContainer
 
 
-# load kv files
+# load the shared kv file, the kv files of the pages are loaded when the pages are built
 project_dir = os.path.dirname(os.path.abspath(__file__))
 kv_dir = os.path.join(project_dir, 'front_ends', 'kv_files')
-kv_files = os.listdir(kv_dir)
-kv_files.remove('sample_widget.kv')
-Builder.load_file(os.path.join(kv_dir, 'sample_widget.kv'))
-[Builder.load_file(os.path.join(kv_dir, kv)) for kv in kv_files]
+load_kv(os.path.join(kv_dir, 'sample_widget.kv'))
 
 
 class PracticeEnglishApp(App):
     working_dir = project_dir
 
+    # pages are built the first time they are used, in the order of the carousel
+    cover_page = LazyPage('front_ends.cover_page', 'CoverPage', ['cover_page.kv'])
+    add_vocab = LazyPage('front_ends.add_vocab', 'AddVocab', ['add_vocab.kv'])
+    database = LazyPage('front_ends.database', 'Database', ['database.kv'])
+    learn_grammar = LazyPage('front_ends.learn_grammar', 'LearnGrammar', ['learn_grammar.kv'])
+    online_testing = LazyPage('front_ends.online_testing', 'OnlineTesting', ['online_testing.kv'])
+    practice_listening = LazyPage('front_ends.practice_listening', 'PracticeListening', ['practice_listening.kv'])
+    practice_vocab = LazyPage('front_ends.practice_vocab', 'PracticeVocab', ['practice_vocab.kv'])
+    preview = LazyPage('front_ends.preview', 'Preview', ['preview.kv'])
+    read_news = LazyPage('front_ends.read_news', 'ReadNews', ['read_news.kv'])
+    select_photo = LazyPage('front_ends.select_photo', 'SelectPhoto', ['select_photo.kv'])
+
+    # these classes are inherited from another classes and aren't belong to any kv file
+    preview_update = LazyPage('front_ends.database', 'PreviewUpdate', ['preview.kv'])
+    search_photos = LazyPage('front_ends.database', 'SearchPhoto', ['select_photo.kv'])
+
     def build(self):
+        with trace.span('build app', 'startup'):
+            return self.build_pages()
+
+    def build_pages(self):
         Window.size = (450, 800)
-        self.main_container = Carousel(direction='right', scroll_timeout=0)
-
-        # assign attributes and add widgets as kv_files name
-        self.cover_page = CoverPage()
-        self.add_vocab = AddVocab()
-        self.database = Database()
-        self.learn_grammar = LearnGrammar()
-        self.online_testing = OnlineTesting()
-        self.practice_listening = PracticeListening()
-        self.practice_vocab = PracticeVocab()
-        self.preview = Preview()
-        self.read_news = ReadNews()
-        self.select_photo = SelectPhoto()
-
-        self.main_container.add_widget(self.cover_page)
-        self.main_container.add_widget(self.add_vocab)
-        self.main_container.add_widget(self.database)
-        self.main_container.add_widget(self.learn_grammar)
-        self.main_container.add_widget(self.online_testing)
-        self.main_container.add_widget(self.practice_listening)
-        self.main_container.add_widget(self.practice_vocab)
-        self.main_container.add_widget(self.preview)
-        self.main_container.add_widget(self.read_news)
-        self.main_container.add_widget(self.select_photo)
-
-        # these classes are inherited from another classes and aren't belong to any kv file
-        self.preview_update = PreviewUpdate()
-        self.search_photos = SearchPhoto()
-        self.main_container.add_widget(self.preview_update)
-        self.main_container.add_widget(self.search_photos)
+        # set PRACTICE_ENGLISH_FREE_TEXTURES=1 to release the textures of the pages not shown, e.g. on low memory
+        # devices
+        free_textures = bool(os.environ.get('PRACTICE_ENGLISH_FREE_TEXTURES'))
+        self.main_container = PageContainer(kv_dir, free_textures=free_textures, direction='right', scroll_timeout=0)
+        self.main_container.register_pages(self)
+
+        # set PRACTICE_ENGLISH_EAGER_PAGES=1 to build all pages at startup, e.g. to compare the startup time
+        if os.environ.get('PRACTICE_ENGLISH_EAGER_PAGES'):
+            self.main_container.build_all()
+        else:
+            self.main_container.get_page('cover_page')
 
+        # press F12 to show the latency of the dictionary, the photos, the database and the sounds
+        self.metrics_overlay = MetricsOverlay()
+        self.metrics_overlay.install()
+
+        Window.bind(on_flip=self.on_first_frame)
         return self.main_container
 
+    def on_first_frame(self, *args):
+        Window.unbind(on_flip=self.on_first_frame)
+        trace.add_span('startup to first frame', 'startup', startup_time)
+        get_metrics().gauge('startup.first_frame_s', round(time.perf_counter() - startup_time, 3))
+        Logger.info(f"PracticeEnglish: first frame {time.perf_counter() - startup_time:.3f}s after startup, "
+                    f"{kv_saved_time() * 1000:.0f}ms of kv parsing saved by the cache")
+
+        # used by `python -m library.logic.import_check`, which checks the imports before the first frame
+        if os.environ.get('PRACTICE_ENGLISH_STARTUP_CHECK'):
+            sys.stderr.write('PracticeEnglish: startup check, first frame\n')
+            sys.stderr.flush()
+            self.stop()
+            return
+
+        Clock.schedule_once(self.after_first_frame)
+
+    def after_first_frame(self, dt):
+        # import pandas, bs4, requests in the background, and resume the media downloads left from the last session
+        preimport()
+        get_media_queue().start()
+
+    def on_stop(self):
+        # keep the metrics of the session, e.g. to compare the latency before and after a change
+        get_metrics().dump(os.path.join(self.working_dir, 'database', 'metrics.json'))
+        # the review statistics are saved every few answers, save the latest ones if a practice page has used them
+        review_log = sys.modules.get('library.logic.review_log')
+        if review_log:
+            review_log.save_review_logs()
+
 
 if __name__ == '__main__':
     PracticeEnglishApp().run()